@@ -0,0 +1,186 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pandas",
+#     "pyarrow"
+# ]
+# ///
+"""
+Load and save the ATO datasets through a typed columnar (Parquet) intermediate format.
+
+CSV/JSON files stay the export format. Each one gets a Parquet sibling with categorical
+dtypes for the dimension columns, which is rebuilt whenever the source is newer.
+Run directly to convert every known dataset, or with --measure to compare load time
+and peak memory of the text and columnar formats.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Dimension columns stored as categoricals in the columnar format
+CATEGORICAL_COLUMNS = [
+    'income_year',
+    'sex',
+    'taxable_status',
+    'age_range_display',
+    'normalized_income_range'
+]
+
+# Columns the pipeline scripts actually read
+PIPELINE_COLUMNS = CATEGORICAL_COLUMNS + [
+    'income_range_display',
+    'individuals_count',
+    'total_income_amount',
+    'net_tax_amount'
+]
+
+# Datasets used by the pipeline, converted when this module is run directly
+DATASETS = [
+    'ato_2010-2023.csv',
+    'ato_2010-2023_inflation_redistributed.csv',
+    'ato_tax_data_normalized_for_chart.csv',
+    'data/tax_data.json'
+]
+
+# Rows per chunk when a dataset is streamed
+DEFAULT_CHUNKSIZE = 100000
+
+def columnar_path(path):
+    """Return the Parquet path that sits next to a CSV/JSON dataset."""
+    return os.path.splitext(path)[0] + '.parquet'
+
+def read_source(path):
+    """Read a dataset from its text export (CSV or records-oriented JSON)."""
+    if path.endswith('.json'):
+        return pd.read_json(path)
+    return pd.read_csv(path)
+
+def apply_categoricals(df):
+    """Convert the dimension columns present in df to categorical dtype."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def is_fresh(path):
+    """Whether the Parquet sibling of path exists and is at least as new as path."""
+    parquet_path = columnar_path(path)
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+
+def convert(path):
+    """Build the typed Parquet sibling of a CSV/JSON dataset and return the DataFrame."""
+    df = apply_categoricals(read_source(path))
+    df.to_parquet(columnar_path(path), index=False)
+    return df
+
+def read_dataset(path, columns=None):
+    """Load a dataset, preferring its columnar sibling and reading only the given columns.
+    
+    The Parquet file is (re)built from the CSV/JSON source when missing or stale.
+    """
+    if not is_fresh(path):
+        df = convert(path)
+        return df[columns] if columns is not None else df
+    return pd.read_parquet(columnar_path(path), columns=columns)
+
+def iter_dataset(path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield a dataset as DataFrames of at most chunksize rows, never loading all of it.
+    
+    Reads the Parquet sibling batch by batch when it is fresh, otherwise the CSV in chunks;
+    a stale sibling is not rebuilt here, since that would need the whole file in memory.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+    if is_fresh(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(columnar_path(path)).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif path.endswith('.json'):
+        raise ValueError(f"Cannot stream '{path}': JSON datasets have to be read whole")
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+def write_dataset(df, path):
+    """Write df as a CSV export plus its typed columnar sibling."""
+    df.to_csv(path, index=False)
+    apply_categoricals(df.copy()).to_parquet(columnar_path(path), index=False)
+
+def _load(path, use_columnar, columns):
+    """Load path from its text export or its columnar sibling."""
+    if use_columnar:
+        return pd.read_parquet(columnar_path(path), columns=columns)
+    df = read_source(path)
+    return df[columns] if columns is not None else df
+
+def _measure_load(path, use_columnar, columns, repeat=3):
+    """Report (best seconds, peak bytes allocated) for loading path; run in a fresh process.
+
+    Peak memory is the tracemalloc peak (Python objects and NumPy buffers) plus the peak
+    of the Arrow memory pool, which backs Parquet reads and pandas string columns.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet  # noqa: F401 - imported up front so import cost is not measured
+    
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _load(path, use_columnar, columns)
+        timings.append(time.perf_counter() - start)
+    
+    # A proxy pool gives the traced load its own Arrow high-water mark
+    pool = pa.proxy_memory_pool(pa.default_memory_pool())
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    _load(path, use_columnar, columns)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), python_peak + pool.max_memory()
+
+def measure(path, columns=None):
+    """Compare load time and peak memory of the text and columnar formats of path."""
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for label, use_columnar in [('text', False), ('columnar', True)]:
+        with ctx.Pool(1) as pool:
+            results[label] = pool.apply(_measure_load, (path, use_columnar, columns))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', default=DATASETS, help='datasets to convert (default: all known datasets)')
+    parser.add_argument('--measure', action='store_true', help='report load time and peak memory before and after')
+    args = parser.parse_args()
+    
+    for path in args.paths:
+        if not is_fresh(path):
+            print(f"Converting {path} -> {columnar_path(path)}...")
+            convert(path)
+        
+        if args.measure:
+            source_size = os.path.getsize(path)
+            columnar_size = os.path.getsize(columnar_path(path))
+            print(f"\n{path}")
+            print(f"  Size:      {source_size / 1e6:8.2f} MB -> {columnar_size / 1e6:8.2f} MB")
+            
+            all_columns = measure(path)
+            print(f"  All columns:  {all_columns['text'][0] * 1000:7.1f} ms, {all_columns['text'][1] / 1e6:7.1f} MB peak"
+                  f" -> {all_columns['columnar'][0] * 1000:7.1f} ms, {all_columns['columnar'][1] / 1e6:7.1f} MB peak")
+            
+            available = pd.read_parquet(columnar_path(path)).columns
+            columns = [col for col in PIPELINE_COLUMNS if col in available]
+            subset = measure(path, columns)
+            print(f"  {len(columns)} columns:    {subset['text'][0] * 1000:7.1f} ms, {subset['text'][1] / 1e6:7.1f} MB peak"
+                  f" -> {subset['columnar'][0] * 1000:7.1f} ms, {subset['columnar'][1] / 1e6:7.1f} MB peak")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pandas",
+#     "numpy",
+#     "scipy",
+#     "pyarrow"
+# ]
+# ///
+"""
+Benchmark the data pipeline on the real ATO data and on synthetic datasets scaled up
+along the demographic and year dimensions.
+
+Each benchmark runs in a fresh process and reports wall time, peak RSS and peak traced
+allocations. Results are written as JSON so runs can be compared between commits; the
+reference run is tracked in benchmarks/baseline.json:
+
+    ./benchmark.py --compare
+    ./benchmark.py --output benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Synthetic scales: name -> (demographic copies, year copies)
+SCALES = {
+    '1x': (1, 1),
+    '10x': (5, 2),
+    '100x': (10, 10)
+}
+
+# The per-group reference loop is too slow to run at every scale
+SLOW_BENCHMARK_SCALES = ['1x', '10x']
+
+# Columns the pipeline reads from the source dataset
+SOURCE_COLUMNS = [
+    'income_year', 'normalized_income_range', 'income_range_display', 'sex',
+    'taxable_status', 'age_range_display', 'individuals_count', 'total_income_amount', 'net_tax_amount'
+]
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+# Tracked reference results that --compare checks against by default
+BASELINE_PATH = 'benchmarks/baseline.json'
+
+# Report fields that identify the machine; wall times are only compared between runs
+# whose fields all match
+MACHINE_FIELDS = ['python', 'platform', 'cpu', 'cpu_count']
+
+# Changes smaller than these are timer, scheduling and allocator noise, whatever the ratio
+TIME_NOISE_S = 0.005
+ALLOC_NOISE_MB = 0.5
+
+def load_source():
+    """Load the real dataset the way create_inflation_redistributed_data.main() does."""
+    from ato_data import read_dataset
+    from reference_data import normalize_years
+    
+    df = read_dataset('ato_2010-2023.csv', columns=SOURCE_COLUMNS)
+    df['income_year'] = normalize_years(df['income_year'])
+    return df
+
+def scale_dataset(df, demographic_copies, year_copies, seed=0):
+    """Replicate df into extra synthetic age groups and years, with jittered measures.
+    
+    Returns (scaled_df, factors) where factors maps every (synthetic) year to the
+    inflation factor of the real year it was copied from.
+    """
+    from ato_data import apply_categoricals
+    from reference_data import INFLATION_FACTORS
+    
+    rng = np.random.default_rng(seed)
+    copies = []
+    factors = {}
+    for year_copy in range(year_copies):
+        for demographic_copy in range(demographic_copies):
+            copy = df.copy()
+            copy['income_year'] = copy['income_year'].astype(str)
+            copy['age_range_display'] = copy['age_range_display'].astype(str)
+            if year_copy:
+                copy['income_year'] = copy['income_year'] + f' #{year_copy}'
+            if demographic_copy:
+                copy['age_range_display'] = copy['age_range_display'] + f' #{demographic_copy}'
+            if year_copy or demographic_copy:
+                jitter = rng.uniform(0.5, 1.5, size=len(copy))
+                copy['individuals_count'] = np.rint(copy['individuals_count'] * jitter)
+                copy['total_income_amount'] = copy['total_income_amount'] * jitter
+                copy['net_tax_amount'] = copy['net_tax_amount'] * jitter
+            copies.append(copy)
+        for year, factor in INFLATION_FACTORS.items():
+            factors[year + (f' #{year_copy}' if year_copy else '')] = factor
+    # Same dtypes as datasets loaded through ato_data
+    return apply_categoricals(pd.concat(copies, ignore_index=True)), factors
+
+def redistribute_all(df, factors, redistribute):
+    """Redistribute every year of df with the given per-year function."""
+    return pd.concat(
+        [redistribute(df[df['income_year'] == year], year, factors[year]) for year in df['income_year'].unique()],
+        ignore_index=True
+    )
+
+def setup_calculate_overlap(df, factors):
+    """Per year, the source brackets in 2023 dollars and the target brackets they overlap."""
+    from reference_data import TARGET_BOUNDS, bracket_bounds
+    
+    pairs = df[['income_year', 'income_range_display']].drop_duplicates()
+    tables = []
+    for year, year_pairs in pairs.groupby('income_year', observed=True):
+        source_bounds = bracket_bounds(year_pairs['income_range_display'].tolist())
+        tables.append((source_bounds * factors[year], TARGET_BOUNDS))
+    return tables
+
+def run_calculate_overlap(tables):
+    """The reference overlap function, once per (source, target) pair."""
+    from create_inflation_redistributed_data import calculate_overlap
+    
+    for source_bounds, target_bounds in tables:
+        for source_min, source_max in source_bounds:
+            for target_min, target_max in target_bounds:
+                calculate_overlap(source_min, source_max, target_min, target_max)
+
+def run_overlap_matrix(tables):
+    """The array-wide overlap function, once per year."""
+    from create_inflation_redistributed_data import overlap_matrix
+    
+    for source_bounds, target_bounds in tables:
+        overlap_matrix(source_bounds, target_bounds)
+
+def run_redistribute_year_data(inputs):
+    """The per-group reference redistribution, every year."""
+    from create_inflation_redistributed_data import redistribute_year_data
+    
+    df, factors = inputs
+    redistribute_all(df, factors, redistribute_year_data)
+
+def run_redistribute_year_data_vectorized(inputs):
+    """The vectorised redistribution used by main(), every year, without the weight cache."""
+    from create_inflation_redistributed_data import redistribute_year_data_vectorized
+    
+    df, factors = inputs
+    redistribute_all(df, factors, redistribute_year_data_vectorized)
+
+def run_redistribute_fitted(inputs):
+    """The vectorised redistribution with per-group fitted Beta weights and a Pareto top bracket."""
+    from create_inflation_redistributed_data import DISTRIBUTIONS, redistribute_year_data_vectorized
+    
+    df, factors = inputs
+    redistribute = functools.partial(
+        redistribute_year_data_vectorized, distribution=DISTRIBUTIONS['fitted-beta'], top_bracket='pareto'
+    )
+    redistribute_all(df, factors, redistribute)
+
+def run_chart_aggregation(df):
+    """The aggregation phase of create_plotly_chart.py for one dataset."""
+    from chart_data import build_aggregation_cube, cube_maxima, trace_tables
+    from reference_data import INCOME_RANGE_ORDER
+    
+    years = sorted(df['income_year'].unique())
+    cube, coords = build_aggregation_cube(df, years, INCOME_RANGE_ORDER, 'income_year')
+    cube_maxima(cube)
+    json.dumps(trace_tables(cube, coords), separators=(',', ':'))
+
+def setup_verify_redistribution(df, factors):
+    """The source dataset, its redistributed counterpart and the (synthetic) years' factors."""
+    from create_inflation_redistributed_data import redistribute_year_data_vectorized
+    
+    return df, redistribute_all(df, factors, redistribute_year_data_vectorized), factors
+
+def run_verify_redistribution(inputs):
+    """The year and demographic-cell checks and report, with the output discarded."""
+    from verify_redistribution import verify_redistribution
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        verify_redistribution(*inputs)
+
+def setup_tax_engine(df, factors):
+    """Average taxable income of every row with individuals in it."""
+    counts = df['individuals_count'].to_numpy(dtype=float)
+    incomes = df['total_income_amount'].to_numpy(dtype=float)
+    return incomes[counts > 0] / counts[counts > 0]
+
+def run_tax_engine(incomes):
+    """Tax on every row's average income under every year's tax scale."""
+    from tax_engine import load_tax_scales, tax_table
+    
+    tax_table(incomes, list(load_tax_scales().values()))
+
+def setup_tax_scenarios(df, factors):
+    """The cell cube the scenario engine works on."""
+    from chart_data import MEASURES, build_aggregation_cube
+    from reference_data import INCOME_RANGE_ORDER
+    
+    df = df.assign(year=df['income_year'])
+    cube, _ = build_aggregation_cube(df, sorted(df['year'].unique()), INCOME_RANGE_ORDER)
+    return cube[..., MEASURES.index('individuals_count')], cube[..., MEASURES.index('total_income_amount')]
+
+def run_tax_scenarios(cells):
+    """Every cell under every tax scale."""
+    from tax_engine import load_tax_scales
+    from tax_scenarios import scenario_cube
+    
+    scenario_cube(*cells, list(load_tax_scales().values()))
+
+# name -> (build inputs from (df, factors), run on those inputs, scales it runs at)
+BENCHMARKS = {
+    'calculate_overlap': (setup_calculate_overlap, run_calculate_overlap, None),
+    'overlap_matrix': (setup_calculate_overlap, run_overlap_matrix, None),
+    'redistribute_year_data': (lambda df, factors: (df, factors), run_redistribute_year_data, SLOW_BENCHMARK_SCALES),
+    'redistribute_year_data_vectorized': (lambda df, factors: (df, factors), run_redistribute_year_data_vectorized, None),
+    'redistribute_fitted': (lambda df, factors: (df, factors), run_redistribute_fitted, None),
+    'chart_aggregation': (lambda df, factors: df, run_chart_aggregation, None),
+    'verify_redistribution': (setup_verify_redistribution, run_verify_redistribution, None),
+    'tax_engine': (setup_tax_engine, run_tax_engine, None),
+    'tax_scenarios': (setup_tax_scenarios, run_tax_scenarios, None)
+}
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+def _run_benchmark(name, scale, repeat):
+    """Time one benchmark at one scale; run in a fresh process so peak RSS is its own."""
+    setup, run, _ = BENCHMARKS[name]
+    df, factors = scale_dataset(load_source(), *SCALES[scale])
+    inputs = setup(df, factors)
+    
+    # Warm up imports and caches outside the measurements
+    run(inputs)
+    gc.collect()
+    rss_before = peak_rss_mb()
+    
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(inputs)
+        timings.append(time.perf_counter() - start)
+    rss_after = peak_rss_mb()
+    
+    gc.collect()
+    tracemalloc.start()
+    run(inputs)
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'benchmark': name,
+        'scale': scale,
+        'rows': len(df),
+        'repeat': repeat,
+        'wall_time_s': {'min': min(timings), 'mean': sum(timings) / len(timings)},
+        'peak_rss_mb': rss_after,
+        'peak_rss_growth_mb': rss_after - rss_before,
+        'alloc_peak_mb': alloc_peak / 1e6
+    }
+
+def cpu_model():
+    """CPU model name, from /proc/cpuinfo where available."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def git_commit():
+    """Current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(names, scales, repeat):
+    """Run each benchmark at each scale it supports, each in its own process."""
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for name in names:
+        supported = BENCHMARKS[name][2]
+        for scale in scales:
+            if supported is not None and scale not in supported:
+                continue
+            with ctx.Pool(1) as pool:
+                result = pool.apply(_run_benchmark, (name, scale, repeat))
+            print(f"  {name:<36} {scale:>5} {result['rows']:>10,} rows "
+                  f"{result['wall_time_s']['min'] * 1000:10.1f} ms "
+                  f"{result['peak_rss_mb']:8.1f} MB RSS {result['alloc_peak_mb']:8.1f} MB alloc")
+            results.append(result)
+    return results
+
+def compare(report, baseline_path, threshold, check_times=True):
+    """Print the change against a previous results file; returns True if anything regressed.
+    
+    Traced allocations do not depend on the machine and are always checked. Wall times
+    are only checked if check_times is set and the baseline was recorded on the same
+    machine. Changes under TIME_NOISE_S or ALLOC_NOISE_MB are ignored.
+    """
+    with open(baseline_path) as f:
+        baseline_report = json.load(f)
+    baseline = {(r['benchmark'], r['scale']): r for r in baseline_report['results']}
+    same_machine = all(baseline_report.get(field) == report[field] for field in MACHINE_FIELDS)
+    
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    if not check_times:
+        print("  Wall times vary between machines and runs; only allocations are checked")
+    elif not same_machine:
+        recorded = ', '.join(f"{field} {baseline_report.get(field)}" for field in MACHINE_FIELDS)
+        print(f"  Recorded on another machine ({recorded}); only allocations are checked")
+    regressed = False
+    results = report['results']
+    for result in results:
+        previous = baseline.get((result['benchmark'], result['scale']))
+        if previous is None:
+            continue
+        time_ratio = result['wall_time_s']['min'] / previous['wall_time_s']['min']
+        alloc_ratio = result['alloc_peak_mb'] / previous['alloc_peak_mb'] if previous['alloc_peak_mb'] else 1.0
+        flag = ''
+        time_regressed = (check_times and same_machine and time_ratio > 1 + threshold
+                          and result['wall_time_s']['min'] - previous['wall_time_s']['min'] > TIME_NOISE_S)
+        alloc_regressed = (alloc_ratio > 1 + threshold
+                           and result['alloc_peak_mb'] - previous['alloc_peak_mb'] > ALLOC_NOISE_MB)
+        if time_regressed or alloc_regressed:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"  {result['benchmark']:<36} {result['scale']:>5} time x{time_ratio:5.2f}  alloc x{alloc_ratio:5.2f}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(SCALES),
+                        help='dataset scales to run at (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (default: 3)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'results file (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--compare', metavar='BASELINE', nargs='?', const=BASELINE_PATH,
+                        help=f'results file from an earlier run to compare against (default: {BASELINE_PATH})')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression (default: 0.1)')
+    args = parser.parse_args()
+    
+    if args.repeat < 1:
+        raise ValueError(f"--repeat must be at least 1, got {args.repeat}")
+    
+    print(f"Running {len(args.benchmarks)} benchmarks at scales {', '.join(args.scales)}:")
+    results = run_benchmarks(args.benchmarks, args.scales, args.repeat)
+    
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu': cpu_model(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+    
+    # The tracked baseline comes from whichever machine last refreshed it, so its wall
+    # times are only informative; an explicit results file is checked in full
+    if args.compare and compare(report, args.compare, args.threshold, check_times=args.compare != BASELINE_PATH):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
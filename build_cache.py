@@ -0,0 +1,182 @@
+"""
+Content-hash change detection and content-hashed assets for incremental site builds.
+
+Avoids pandas and numpy so an up-to-date build can be detected without importing them.
+brotli is only imported to compress assets, so scripts that just use write_if_changed
+need nothing outside the standard library.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+# Where file fingerprints and stage records are kept between builds
+MANIFEST_PATH = '.build_manifest.json'
+
+def hash_bytes(content):
+    """SHA-256 hex digest of a bytes object."""
+    return hashlib.sha256(content).hexdigest()
+
+def write_if_changed(path, content):
+    """Write content to path unless the file already holds exactly that content.
+    
+    Leaves the file (and its mtime) untouched when nothing changed. Returns True if
+    the file was written.
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def write_compressed(path, content):
+    """Write content to path plus pre-compressed .gz and .br copies; returns the paths."""
+    import brotli
+    
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    write_if_changed(path, data)
+    # mtime=0 keeps the gzip output reproducible between builds
+    write_if_changed(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    write_if_changed(path + '.br', brotli.compress(data, quality=11))
+    return [path, path + '.gz', path + '.br']
+
+def write_hashed_asset(directory, name, extension, content):
+    """Write content as <name>.<hash>.<extension> plus pre-compressed .gz and .br copies.
+
+    The file name changes whenever the content does, so the asset can be cached forever.
+    Returns the paths written.
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    return write_compressed(os.path.join(directory, f"{name}.{hash_bytes(data)[:12]}.{extension}"), data)
+
+def prune_directory(directory, keep):
+    """Delete files in directory that are not in keep (e.g. superseded hashed assets)."""
+    if not os.path.isdir(directory):
+        return
+    keep = {os.path.normpath(path) for path in keep}
+    for entry in os.listdir(directory):
+        path = os.path.normpath(os.path.join(directory, entry))
+        if os.path.isfile(path) and path not in keep:
+            os.remove(path)
+
+def list_files(paths):
+    """The files named by paths, with each directory expanded to every file beneath it."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    return sorted(files)
+
+class BuildManifest:
+    """Fingerprints of build inputs and outputs, persisted as JSON between builds.
+    
+    An input file's SHA-256 is only recomputed when its size or mtime changes. Each
+    stage keeps one digest of its inputs and one of its outputs: it is current when
+    both still match. Outputs are fingerprinted by path, size and mtime rather than
+    content, so a stage writing thousands of files adds nothing per file to the
+    manifest. Stages can also store a small JSON-serialisable result for later
+    stages to reuse.
+    """
+    
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.files = {}
+        self.stages = {}
+        # Input files looked up by this build; only their hashes are saved
+        self.seen = set()
+        
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    manifest = json.load(f)
+                self.files = manifest.get('files', {})
+                self.stages = manifest.get('stages', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable build manifest '{path}': {e}")
+    
+    def file_hash(self, path):
+        """Content hash of path, or None if it does not exist."""
+        self.seen.add(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.files.pop(path, None)
+            return None
+        
+        cached = self.files.get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        
+        with open(path, 'rb') as f:
+            digest = hash_bytes(f.read())
+        self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+    
+    def fingerprint(self, paths, after=()):
+        """Combined fingerprint of a set of input files (order-independent).
+        
+        after names earlier stages whose outputs are inputs too; their recorded output
+        digests stand in for the files themselves.
+        """
+        hasher = hashlib.sha256()
+        for path in sorted(paths):
+            hasher.update(path.encode('utf-8'))
+            hasher.update((self.file_hash(path) or 'missing').encode('utf-8'))
+        for stage in sorted(after):
+            hasher.update(stage.encode('utf-8'))
+            hasher.update(self.stages.get(stage, {}).get('outputs', 'missing').encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def output_fingerprint(self, paths):
+        """Combined fingerprint of the path, size and mtime of a stage's output files.
+        
+        Directories in paths stand for every file beneath them.
+        """
+        hasher = hashlib.sha256()
+        for path in list_files(paths):
+            try:
+                stat = os.stat(path)
+                state = f"{stat.st_size}:{stat.st_mtime_ns}"
+            except FileNotFoundError:
+                state = 'missing'
+            hasher.update(f"{path}\0{state}\0".encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def is_current(self, stage, inputs, outputs, after=()):
+        """Whether stage already ran on exactly these inputs and its outputs are untouched."""
+        record = self.stages.get(stage)
+        return bool(record
+                    and record['inputs'] == self.fingerprint(inputs, after)
+                    and record['outputs'] == self.output_fingerprint(outputs))
+    
+    def record(self, stage, inputs, outputs, result=None, after=()):
+        """Remember the inputs a stage ran on, the outputs it produced and its result."""
+        self.stages[stage] = {
+            'inputs': self.fingerprint(inputs, after),
+            'outputs': self.output_fingerprint(outputs),
+            'result': result
+        }
+    
+    def result(self, stage):
+        """The result recorded for stage by its last run."""
+        return self.stages[stage].get('result')
+    
+    def save(self):
+        """Write the manifest back to disk if it changed."""
+        if not self.path:
+            return
+        files = {path: self.files[path] for path in self.seen if path in self.files}
+        write_if_changed(self.path, json.dumps({'files': files, 'stages': self.stages}, indent=2, sort_keys=True))
@@ -0,0 +1,247 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pandas",
+#     "numpy",
+#     "pyarrow"
+# ]
+# ///
+"""
+Data stage of the chart build: load both ATO datasets, aggregate them for the front end
+and pre-calculate the axis maximums used by the generated script.
+"""
+
+import itertools
+import json
+
+import pandas as pd
+import numpy as np
+
+from ato_data import read_dataset
+from reference_data import AGE_INDEX, INCOME_RANGE_INDEX, INCOME_RANGE_ORDER
+
+# Columns needed from both the nominal and redistributed datasets
+CHART_COLUMNS = [
+    'income_year',
+    'normalized_income_range',
+    'income_range_display',
+    'sex',
+    'taxable_status',
+    'age_range_display',
+    'individuals_count',
+    'total_income_amount',
+    'net_tax_amount'
+]
+
+# Dimensions of the aggregation cube, in axis order
+CUBE_DIMENSIONS = ['year', 'normalized_income_range', 'sex', 'taxable_status', 'age_range_display']
+
+# Measures aggregated in the cube (its last axis)
+MEASURES = ['individuals_count', 'total_income_amount', 'net_tax_amount']
+
+# Cube axes summed away for each colorBy option, leaving (year, income range[, category])
+COLOR_BY_SUM_AXES = {
+    'none': (2, 3, 4),
+    'age_range_display': (2, 3),
+    'sex': (3, 4),
+    'taxable_status': (2, 4)
+}
+
+def build_aggregation_cube(data, years, income_ranges, year_column='year'):
+    """Aggregate data in one pass into a dense cube.
+    
+    Axes are year x income range x sex x taxable status x age x measure, with years and
+    income ranges in display order and the demographic categories sorted. Rows are
+    summed straight into their cells, so data can be a whole unaggregated dataset; its
+    years are read from year_column. Returns (cube, coords) where coords maps each
+    dimension name to its axis labels.
+    """
+    coords = {
+        'year': list(years),
+        'normalized_income_range': list(income_ranges),
+        'sex': sorted(data['sex'].unique()),
+        'taxable_status': sorted(data['taxable_status'].unique()),
+        'age_range_display': sorted(data['age_range_display'].unique())
+    }
+    
+    codes = []
+    for dim in CUBE_DIMENSIONS:
+        column = data[year_column if dim == 'year' else dim]
+        dim_codes = pd.Categorical(column, categories=coords[dim]).codes
+        if (dim_codes < 0).any():
+            unknown = sorted(set(column[dim_codes < 0]))
+            raise ValueError(f"Unexpected {dim} values {unknown}. Expected one of: {coords[dim]}")
+        codes.append(dim_codes)
+    
+    shape = tuple(len(coords[dim]) for dim in CUBE_DIMENSIONS)
+    cube = np.zeros(shape + (len(MEASURES),))
+    np.add.at(cube, tuple(codes), data[MEASURES].to_numpy(dtype=float))
+    return cube, coords
+
+def color_categories(coords):
+    """Legend order of the categories for each colorBy option."""
+    categories = {dim: [str(value) for value in coords[dim]] for dim in COLOR_BY_SUM_AXES if dim != 'none'}
+    # Unknown ages go first, as the front end's indexOf-based sort used to put them
+    categories['age_range_display'].sort(key=lambda age: AGE_INDEX.get(age, -1))
+    return categories
+
+def encode_values(values):
+    """Encode a float array for the front end as a JSON list.
+    
+    Whole numbers are written without the trailing ".0", which keeps the text (and its
+    compression) small.
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    return [int(value) if value.is_integer() else value for value in values.tolist()]
+
+def trace_tables(cube, coords):
+    """Pre-aggregate a cube into the chart's per-trace y-arrays, for every combination.
+    
+    For each colorBy option and measure, traces holds the absolute y-values as one flat
+    array laid out year x category (in legend order) x income range, so the front end
+    reads a trace as a slice instead of regrouping rows. yearTotals holds each year's
+    total per measure, for percentages and the summary stats.
+    """
+    categories = color_categories(coords)
+    traces = {}
+    for color_by, axes in COLOR_BY_SUM_AXES.items():
+        values = cube.sum(axis=axes)
+        if color_by == 'none':
+            values = values[:, :, np.newaxis, :]
+        else:
+            # Reorder the category axis from cube order to legend order
+            legend_order = [list(coords[color_by]).index(category) for category in categories[color_by]]
+            values = values[:, :, legend_order, :]
+        # year x income range x category x measure -> measure x year x category x income range
+        values = values.transpose(3, 0, 2, 1)
+        traces[color_by] = {measure: encode_values(values[i]) for i, measure in enumerate(MEASURES)}
+    
+    year_totals = cube.sum(axis=(1, 2, 3, 4))
+    return {
+        'years': [str(year) for year in coords['year']],
+        'incomeRanges': [str(income_range) for income_range in coords['normalized_income_range']],
+        'colorCategories': categories,
+        'yearTotals': {measure: encode_values(year_totals[:, i]) for i, measure in enumerate(MEASURES)},
+        'traces': traces
+    }
+
+def chart_frame(tables, request):
+    """The frame of one chart state, exactly as computeFrame in the page's script builds it.
+    
+    tables is a dataset from trace_tables (JSON form) and request holds the fields the
+    script sends: yearIndex, colorBy, totalBy, percentage and cumulative. Returns the
+    trace names and y-values plus the stats of the year and the one before.
+    """
+    year_index, color_by, measure = request['yearIndex'], request['colorBy'], request['totalBy']
+    categories = ['All'] if color_by == 'none' else tables['colorCategories'][color_by]
+    range_count = len(tables['incomeRanges'])
+    values = tables['traces'][color_by][measure]
+    total = float(tables['yearTotals'][measure][year_index])
+    
+    traces = []
+    for category_index, category in enumerate(categories):
+        start = (year_index * len(categories) + category_index) * range_count
+        y = [float(value) for value in values[start:start + range_count]]
+        if request['percentage']:
+            y = [(value / total) * 100 for value in y]
+        if request['cumulative']:
+            y = list(itertools.accumulate(y))
+        traces.append({'name': category, 'y': y})
+    
+    def year_stats(index):
+        totals = tables['yearTotals']
+        return {
+            'individuals': totals['individuals_count'][index],
+            'income': totals['total_income_amount'][index],
+            'tax': totals['net_tax_amount'][index]
+        }
+    
+    return {
+        'traces': traces,
+        'stats': year_stats(year_index),
+        'previousStats': year_stats(year_index - 1) if year_index > 0 else None
+    }
+
+def cube_maxima(cube):
+    """Reduce an aggregation cube to the axis maxima used by the chart.
+    
+    Returns absolute maxima for stacked bars, grouped bars per colorBy option and
+    cumulative bars, plus the matching percentage-of-year maxima.
+    """
+    # Year totals for percentages, broadcastable against every colorBy reduction
+    year_totals = cube.sum(axis=(1, 2, 3, 4))
+    
+    grouped = {}
+    grouped_pct = {}
+    for color_by, axes in COLOR_BY_SUM_AXES.items():
+        values = cube.sum(axis=axes)
+        values = values.reshape(values.shape[0], -1, len(MEASURES))
+        totals = year_totals[:, np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(totals > 0, values / totals * 100, 0)
+        grouped[color_by] = dict(zip(MEASURES, values.max(axis=(0, 1))))
+        grouped_pct[color_by] = dict(zip(MEASURES, pct.max(axis=(0, 1), initial=0)))
+    
+    return {
+        'stacked': grouped['none'],
+        'grouped': grouped,
+        'cumulative': dict(zip(MEASURES, year_totals.max(axis=0, initial=0))),
+        'stacked_pct': grouped_pct['none'],
+        'grouped_pct': grouped_pct
+    }
+
+def prepare_chart_data():
+    """Load and aggregate the nominal and redistributed datasets for the chart.
+    
+    Returns a dict with both datasets as per-trace JSON tables and the pre-calculated maximums
+    that go into the chart config.
+    """
+    # Load the normalized data
+    df = read_dataset('ato_2010-2023.csv', columns=CHART_COLUMNS)
+    
+    # Also load the inflation-redistributed data
+    df_redistributed = read_dataset('ato_2010-2023_inflation_redistributed.csv', columns=CHART_COLUMNS)
+    
+    # Get unique values for controls
+    years = sorted(df['income_year'].unique())
+    
+    # Sum each dataset in one pass into a year x income range x sex x taxable status x age
+    # cube; every axis maximum below is a cheap reduction over these cubes
+    cube, coords = build_aggregation_cube(df, years, INCOME_RANGE_ORDER, 'income_year')
+    cube_redistributed, coords_redistributed = build_aggregation_cube(df_redistributed, years, INCOME_RANGE_ORDER, 'income_year')
+    
+    # Ship both datasets as ready-to-plot trace tables
+    tables = {
+        'nominal': trace_tables(cube, coords),
+        'redistributed': trace_tables(cube_redistributed, coords_redistributed)
+    }
+    data_json = json.dumps(tables['nominal'], separators=(',', ':'))
+    data_redistributed_json = json.dumps(tables['redistributed'], separators=(',', ':'))
+    
+    maxima = cube_maxima(cube)
+    maxima_redis = cube_maxima(cube_redistributed)
+    
+    # Cumulative maximums - the largest year total, which cumulative bars approach
+    cumulative_max = maxima['cumulative']
+    
+    print(f"  Cumulative maximums - individuals: {cumulative_max['individuals_count']:,.0f}, income: ${cumulative_max['total_income_amount']:,.0f}, tax: ${cumulative_max['net_tax_amount']:,.0f}")
+    
+    # Stacked bars always sum across all demographics per income range; grouped bars use the
+    # max within each colorBy category. Percentage maximums are % of the year's total.
+    return {
+        'tables': tables,
+        'data_json': data_json,
+        'data_redistributed_json': data_redistributed_json,
+        'stacked_max_individuals': maxima['stacked']['individuals_count'],
+        'stacked_max_income': maxima['stacked']['total_income_amount'],
+        'stacked_max_tax': maxima['stacked']['net_tax_amount'],
+        'stacked_max_individuals_redis': maxima_redis['stacked']['individuals_count'],
+        'stacked_max_income_redis': maxima_redis['stacked']['total_income_amount'],
+        'stacked_max_tax_redis': maxima_redis['stacked']['net_tax_amount'],
+        'grouped_max': maxima['grouped'],
+        'grouped_max_redis': maxima_redis['grouped'],
+        'cumulative_max': cumulative_max,
+        'stacked_pct_max': maxima['stacked_pct'],
+        'grouped_pct_max': maxima['grouped_pct']
+    }
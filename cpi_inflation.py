@@ -0,0 +1,151 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "numpy"
+# ]
+# ///
+"""
+Derive financial-year inflation factors from a locally stored quarterly CPI series.
+
+Each financial year's CPI is the average of its four quarters (September to June), and a
+year's factor to the base year is CPI(base) / CPI(year), computed for every year at
+once. The factors are written to inflation_factors_fy_correct.csv, which
+reference_data.py reads; the file is only rewritten when its content changes.
+
+No network access is needed. --fetch refreshes the local series from a URL serving the
+same CSV format (for example an internal mirror), checking it before replacing the file.
+"""
+
+import argparse
+import csv
+import io
+import os
+import urllib.request
+
+import numpy as np
+
+from build_cache import write_if_changed
+
+# Quarterly CPI: ABS 6401.0, all groups, weighted average of eight capital cities
+CPI_SERIES_PATH = 'data/cpi_quarterly.csv'
+
+# Derived table read by reference_data.py
+FACTORS_PATH = 'inflation_factors_fy_correct.csv'
+
+# reference_data is not imported here: it loads the table this script writes
+DEFAULT_BASE_YEAR = '2022–23'
+
+# The RBA calculator the datasets were built with reports factors to the cent
+DEFAULT_DECIMALS = 2
+
+# Quarters in a complete financial year
+FINANCIAL_YEAR_QUARTERS = 4
+
+def parse_cpi_series(text, source=CPI_SERIES_PATH):
+    """Parse quarter_ending (YYYY-MM), cpi_index CSV text into (years, months, cpi) arrays."""
+    rows = list(csv.DictReader(io.StringIO(text)))
+    if not rows or 'quarter_ending' not in rows[0] or 'cpi_index' not in rows[0]:
+        raise ValueError(f"'{source}' needs 'quarter_ending' and 'cpi_index' columns")
+    
+    try:
+        periods = np.array([row['quarter_ending'].strip().split('-') for row in rows], dtype=int)
+        cpi = np.array([row['cpi_index'] for row in rows], dtype=float)
+    except ValueError as e:
+        raise ValueError(f"'{source}' has a malformed row: {e}")
+    years, months = periods[:, 0], periods[:, 1]
+    
+    if not np.isin(months, [3, 6, 9, 12]).all():
+        raise ValueError(f"'{source}' has quarter_ending months other than 03, 06, 09 and 12")
+    order = years * 12 + months
+    if np.any(np.diff(order) <= 0):
+        raise ValueError(f"'{source}' must list each quarter once, in date order")
+    if not np.all(cpi > 0):
+        raise ValueError(f"'{source}' has non-positive CPI values")
+    return years, months, cpi
+
+def load_cpi_series(path=CPI_SERIES_PATH):
+    """Read the local quarterly CPI series; see parse_cpi_series."""
+    with open(path, encoding='utf-8') as f:
+        return parse_cpi_series(f.read(), path)
+
+def financial_year_label(start_year):
+    """'2010–11' for the financial year starting in July 2010."""
+    return f"{start_year}–{(start_year + 1) % 100:02d}"
+
+def financial_year_cpi(years, months, cpi):
+    """Average CPI of every financial year with all four quarters in the series.
+    
+    Returns (labels, averages), in year order.
+    """
+    # September and December quarters belong to the financial year starting that July
+    start_years = np.where(months >= 9, years, years - 1)
+    first = start_years.min()
+    slots = start_years - first
+    counts = np.bincount(slots)
+    totals = np.bincount(slots, weights=cpi)
+    complete = np.flatnonzero(counts == FINANCIAL_YEAR_QUARTERS)
+    labels = [financial_year_label(first + slot) for slot in complete]
+    return labels, totals[complete] / FINANCIAL_YEAR_QUARTERS
+
+def inflation_factors(labels, averages, base_year=DEFAULT_BASE_YEAR):
+    """Factor converting each financial year's dollars to base_year dollars, as an array."""
+    base_year = base_year.replace('-', '–')
+    if base_year not in labels:
+        raise ValueError(f"No complete CPI year for base year '{base_year}'. Available years: {labels}")
+    return averages[labels.index(base_year)] / averages
+
+def factors_table(labels, factors, base_year=DEFAULT_BASE_YEAR, decimals=DEFAULT_DECIMALS):
+    """CSV text of the factors, in the layout reference_data.load_inflation_factors reads."""
+    base_year = base_year.replace('-', '–')
+    rounded = np.round(factors, decimals)
+    lines = [f"financial_year,inflation_factor_to_{base_year.replace('–', '_')},cpi_increase_percent"]
+    lines += [f"{label},{factor:.{decimals}f},{(factor - 1) * 100:.1f}" for label, factor in zip(labels, rounded)]
+    return '\n'.join(lines) + '\n'
+
+def fetch_cpi_series(url, path=CPI_SERIES_PATH, timeout=30):
+    """Download a CPI series in the local CSV format and replace path with it once it parses."""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        text = response.read().decode('utf-8')
+    parse_cpi_series(text, url)
+    return write_if_changed(path, text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cpi', default=CPI_SERIES_PATH, help=f'quarterly CPI series (default: {CPI_SERIES_PATH})')
+    parser.add_argument('--base-year', default=DEFAULT_BASE_YEAR,
+                        help=f'financial year to express dollars in (default: {DEFAULT_BASE_YEAR})')
+    parser.add_argument('--decimals', type=int, default=DEFAULT_DECIMALS,
+                        help=f'decimal places of the factors (default: {DEFAULT_DECIMALS})')
+    parser.add_argument('--output', default=FACTORS_PATH, help=f'factors table (default: {FACTORS_PATH})')
+    parser.add_argument('--fetch', metavar='URL', help='refresh the local CPI series from this URL first')
+    args = parser.parse_args()
+    
+    if args.decimals < 0:
+        raise ValueError(f"--decimals must not be negative, got {args.decimals}")
+    if args.output == FACTORS_PATH and args.base_year.replace('-', '–') != DEFAULT_BASE_YEAR:
+        raise ValueError(f"The pipeline reads {FACTORS_PATH} in {DEFAULT_BASE_YEAR} dollars; "
+                         f"write factors to another base year with --output")
+    
+    if args.fetch:
+        changed = fetch_cpi_series(args.fetch, args.cpi)
+        print(f"✓ {args.cpi} {'updated from' if changed else 'already matches'} {args.fetch}")
+    
+    if not os.path.exists(args.cpi):
+        raise ValueError(f"CPI series '{args.cpi}' not found; pass --cpi or --fetch")
+    
+    labels, averages = financial_year_cpi(*load_cpi_series(args.cpi))
+    factors = inflation_factors(labels, averages, args.base_year)
+    table = factors_table(labels, factors, args.base_year, args.decimals)
+    
+    if write_if_changed(args.output, table):
+        print(f"✓ Wrote {args.output}")
+    else:
+        print(f"✓ {args.output} unchanged")
+    
+    print(f"\n{'Year':<10} {'Average CPI':>12} {'Factor':>8}")
+    for label, average, factor in zip(labels, averages, factors):
+        print(f"{label:<10} {average:12.3f} {factor:8.{max(args.decimals, 4)}f}")
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,8 @@
 # dependencies = [
 #     "pandas",
 #     "numpy", 
-#     "scipy"
+#     "scipy",
+#     "pyarrow"
 # ]
 # ///
 """
@@ -12,61 +13,23 @@ Create inflation-adjusted dataset by redistributing historical data into 2023-eq
 This shows how people earning equivalent purchasing power fared across different years.
 """
 
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import zipfile
+
 import pandas as pd
 import numpy as np
 from scipy import stats
 
-# Inflation factors relative to 2022-23
-inflation_factors = {
-    '2010–11': 1.34,
-    '2011–12': 1.31,
-    '2012–13': 1.28,
-    '2013–14': 1.25,
-    '2014–15': 1.23,
-    '2015–16': 1.21,
-    '2016–17': 1.19,
-    '2017–18': 1.17,
-    '2018–19': 1.15,
-    '2019–20': 1.14,
-    '2020–21': 1.12,
-    '2021–22': 1.07,
-    '2022–23': 1.00
-}
-
-# Modern income brackets (2023 dollars) - these will be our target brackets
-modern_brackets = [
-    (0, 6000, '$6,000 or less'),
-    (6001, 10000, '$6,001 to $10,000'),
-    (10001, 20000, '$10,001 to $20,000'),
-    (20001, 30000, '$20,001 to $30,000'),
-    (30001, 40000, '$30,001 to $40,000'),
-    (40001, 50000, '$40,001 to $50,000'),
-    (50001, 60000, '$50,001 to $60,000'),
-    (60001, 80000, '$60,001 to $80,000'),
-    (80001, 100000, '$80,001 to $100,000'),
-    (100001, 150000, '$100,001 to $150,000'),
-    (150001, 200000, '$150,001 to $200,000'),
-    (200001, 250000, '$200,001 to $250,000'),
-    (250001, 500000, '$250,001 to $500,000'),
-    (500001, 1000000, '$500,001 to $1,000,000'),
-    (1000001, float('inf'), '$1,000,001 or more')
-]
-
-def get_bracket_bounds(bracket_label):
-    """Extract numeric bounds from bracket labels."""
-    if bracket_label == '$6,000 or less':
-        return 0, 6000
-    elif bracket_label == '$1,000,001 or more':
-        return 1000001, 2000000  # Use 2M as practical upper bound
-    else:
-        # Parse strings like '$20,001 to $30,000'
-        try:
-            parts = bracket_label.replace('$', '').replace(',', '').split(' to ')
-            if len(parts) != 2:
-                raise ValueError(f"Expected 2 parts separated by ' to ', got {len(parts)}")
-            return int(parts[0]), int(parts[1])
-        except (ValueError, IndexError) as e:
-            raise ValueError(f"Unable to parse bracket label '{bracket_label}': {e}")
+from ato_data import DEFAULT_CHUNKSIZE, iter_dataset, read_dataset, write_dataset
+from reference_data import (
+    BASE_YEAR, INCOME_BRACKETS, INCOME_RANGE_ORDER, INFLATION_FACTORS, TARGET_BOUNDS, TOP_BRACKET_LABEL, bracket_bounds,
+    normalize_years
+)
 
 def calculate_overlap(source_min, source_max, target_min, target_max):
     """Calculate what fraction of source bracket overlaps with target bracket using right-skewed distribution."""
@@ -103,22 +66,264 @@ def calculate_overlap(source_min, source_max, target_min, target_max):
     # Return the fraction of people in the overlap region
     return cdf_end - cdf_start
 
+# Within-bracket income distributions, as (name, *parameters):
+#   ('uniform',)                    incomes spread evenly across the bracket
+#   ('beta', alpha, beta)           the same right-skewed Beta shape in every bracket
+#   ('fitted-beta', concentration)  one Beta per demographic group with alpha + beta fixed,
+#                                   fitted so its mean matches the group's mean income
+DISTRIBUTIONS = {
+    'uniform': ('uniform',),
+    'beta': ('beta', 2.0, 5.0),
+    'fitted-beta': ('fitted-beta', 7.0)
+}
+
+# Within-bracket income distribution used for redistribution by default
+DISTRIBUTION = DISTRIBUTIONS['beta']
+
+# The open-ended top bracket is either modelled like the others up to the practical
+# bound from reference_data ('bounded'), or as a Pareto tail fitted to each group's
+# mean income ('pareto')
+TOP_BRACKET_MODELS = ['bounded', 'pareto']
+
+# Fitted Beta means are kept this far inside the bracket so both parameters stay positive
+FITTED_MEAN_MARGIN = 1e-3
+
+# Pareto shape used when a group's mean income is at or below the top bracket's lower bound
+PARETO_MAX_ALPHA = 50.0
+
+# On-disk cache of overlap-weight tables, kept next to the CSVs
+WEIGHT_CACHE_PATH = 'overlap_weights_cache.npz'
+
+# Columns read from the source dataset
+SOURCE_COLUMNS = [
+    'income_year', 'normalized_income_range', 'income_range_display', 'sex',
+    'taxable_status', 'age_range_display', 'individuals_count', 'total_income_amount', 'net_tax_amount'
+]
+
+# The redistributed dataset has one row per combination of these columns
+GROUPBY_COLUMNS = [
+    'income_year',
+    'normalized_income_range',
+    'income_range_display',
+    'sex',
+    'taxable_status',
+    'age_range_display'
+]
+
+VALUE_COLUMNS = ['individuals_count', 'total_income_amount', 'net_tax_amount']
+
+def fit_beta(distribution, mean_positions=None):
+    """Beta (alpha, beta) parameters of a within-bracket distribution.
+    
+    mean_positions is each source bracket's mean income as a fraction of the way through
+    the bracket, as a column array; fitted distributions return one parameter per row,
+    in a single batched calculation.
+    """
+    name = distribution[0]
+    if name == 'uniform':
+        # Beta(1, 1) is the uniform distribution
+        return 1.0, 1.0
+    if name == 'beta':
+        return distribution[1], distribution[2]
+    if name == 'fitted-beta':
+        if mean_positions is None:
+            raise ValueError("The fitted-beta distribution needs the mean income of every source bracket")
+        concentration = distribution[1]
+        mean_positions = np.clip(mean_positions, FITTED_MEAN_MARGIN, 1.0 - FITTED_MEAN_MARGIN)
+        return mean_positions * concentration, (1.0 - mean_positions) * concentration
+    raise ValueError(f"Unknown distribution '{name}'. Available distributions: {list(DISTRIBUTIONS)}")
+
+def beta_cdf(x, alpha, beta_param):
+    """Beta CDF of x, evaluated only where x is strictly inside (0, 1).
+    
+    Most source/target pairs do not overlap, and the CDF is 0 or 1 at the bracket edges,
+    so skipping those points saves most of the work when parameters vary per row.
+    """
+    alpha = np.broadcast_to(alpha, x.shape)
+    beta_param = np.broadcast_to(beta_param, x.shape)
+    result = (x >= 1.0).astype(float)
+    inner = (x > 0.0) & (x < 1.0)
+    result[inner] = stats.beta.cdf(x[inner], alpha[inner], beta_param[inner])
+    return result
+
+def pareto_overlap(lower_bounds, mean_incomes, target_bounds):
+    """Fraction of each open-ended bracket in each target bracket under a fitted Pareto tail.
+    
+    A Pareto distribution starting at the bracket's lower bound has mean
+    alpha * lower / (alpha - 1), so alpha = mean / (mean - lower) matches the known mean.
+    """
+    lower = np.asarray(lower_bounds, dtype=float)[:, np.newaxis]
+    mean = np.asarray(mean_incomes, dtype=float)[:, np.newaxis]
+    target_bounds = np.asarray(target_bounds, dtype=float)
+    
+    excess = mean - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = np.minimum(np.where(excess > 0, mean / excess, PARETO_MAX_ALPHA), PARETO_MAX_ALPHA)
+    
+    def cdf(x):
+        return 1.0 - (lower / np.maximum(x, lower)) ** alpha
+    
+    return cdf(target_bounds[np.newaxis, :, 1]) - cdf(target_bounds[np.newaxis, :, 0])
+
+def overlap_matrix(source_bounds, target_bounds, distribution=DISTRIBUTION, mean_incomes=None, open_top=None):
+    """Calculate the overlap fraction of every source bracket with every target bracket at once.
+    
+    Array-wide equivalent of calling calculate_overlap for each (source, target) pair.
+    Returns an array of shape (len(source_bounds), len(target_bounds)). mean_incomes
+    (one per source bracket, in the same dollars as the bounds) is needed by fitted
+    distributions; rows flagged in open_top get a fitted Pareto tail instead.
+    """
+    source_bounds = np.asarray(source_bounds, dtype=float)
+    target_bounds = np.asarray(target_bounds, dtype=float)
+    
+    source_min = source_bounds[:, 0][:, np.newaxis]
+    source_max = source_bounds[:, 1][:, np.newaxis]
+    target_min = target_bounds[:, 0][np.newaxis, :]
+    target_max = target_bounds[:, 1][np.newaxis, :]
+    
+    # Same early exits as calculate_overlap: no overlap, or zero-width source bracket
+    has_overlap = (source_max > target_min) & (source_min < target_max) & (source_max > source_min)
+    
+    overlap_min = np.maximum(source_min, target_min)
+    overlap_max = np.minimum(source_max, target_max)
+    
+    # Map bracket bounds to [0, 1] for the Beta distribution
+    with np.errstate(divide='ignore', invalid='ignore'):
+        source_range = source_max - source_min
+        overlap_start = np.clip((overlap_min - source_min) / source_range, 0.0, 1.0)
+        overlap_end = np.clip((overlap_max - source_min) / source_range, 0.0, 1.0)
+        mean_positions = None
+        if mean_incomes is not None:
+            mean_positions = (np.asarray(mean_incomes, dtype=float)[:, np.newaxis] - source_min) / source_range
+    
+    alpha, beta_param = fit_beta(distribution, mean_positions)
+    cdf_start = beta_cdf(overlap_start, alpha, beta_param)
+    cdf_end = beta_cdf(overlap_end, alpha, beta_param)
+    weights = np.where(has_overlap, cdf_end - cdf_start, 0.0)
+    
+    if open_top is not None and np.any(open_top):
+        if mean_incomes is None:
+            raise ValueError("A Pareto top bracket needs the mean income of every source bracket")
+        rows = np.flatnonzero(open_top)
+        weights[rows] = pareto_overlap(source_bounds[rows, 0], np.asarray(mean_incomes, dtype=float)[rows], target_bounds)
+    
+    return weights
+
+class OverlapWeightCache:
+    """Memoised overlap-weight tables, persisted to an .npz file between runs.
+    
+    Tables are keyed by a hash of the nominal source bracket bounds, the target bracket
+    bounds, the inflation factor and the within-bracket distribution (plus the mean
+    incomes and open brackets a fitted model depends on), so re-runs with unchanged
+    inputs skip the fitting and CDF work entirely.
+    """
+    
+    def __init__(self, path=WEIGHT_CACHE_PATH):
+        self.path = path
+        self.tables = {}
+        self.modified = False
+        
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as cached:
+                    self.tables = {key: cached[key] for key in cached.files}
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                print(f"Ignoring unreadable weight cache '{path}': {e}")
+    
+    @staticmethod
+    def key(source_bounds, target_bounds, inflation_factor, distribution=DISTRIBUTION, mean_incomes=None, open_top=None):
+        """Hash the inputs that fully determine an overlap-weight table."""
+        inputs = {
+            'source': np.asarray(source_bounds, dtype=float).tolist(),
+            'target': np.asarray(target_bounds, dtype=float).tolist(),
+            'factor': float(inflation_factor),
+            'distribution': list(distribution)
+        }
+        # Only fitted tables depend on these, so keys of the other tables are unchanged
+        if mean_incomes is not None:
+            inputs['means'] = np.asarray(mean_incomes, dtype=float).tolist()
+        if open_top is not None:
+            inputs['open_top'] = np.asarray(open_top, dtype=bool).tolist()
+        payload = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, source_bounds, target_bounds, inflation_factor, distribution=DISTRIBUTION, mean_incomes=None, open_top=None):
+        """Return the weight table for these brackets, computing and storing it on a miss.
+        
+        source_bounds and mean_incomes are in nominal dollars.
+        """
+        key = self.key(source_bounds, target_bounds, inflation_factor, distribution, mean_incomes, open_top)
+        if key not in self.tables:
+            self.tables[key] = overlap_matrix(
+                np.asarray(source_bounds, dtype=float) * inflation_factor,
+                target_bounds,
+                distribution,
+                None if mean_incomes is None else np.asarray(mean_incomes, dtype=float) * inflation_factor,
+                open_top
+            )
+            self.modified = True
+        return self.tables[key]
+    
+    def update(self, tables):
+        """Add tables computed elsewhere (e.g. by a worker process's copy of this cache)."""
+        if tables:
+            self.tables.update(tables)
+            self.modified = True
+    
+    def save(self):
+        """Write the cache back to disk if any new tables were computed."""
+        if not self.path or not self.modified:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self.tables)
+        os.replace(tmp_path, self.path)
+        self.modified = False
+
+def apportion(group_totals, groups, shares):
+    """Split each group's whole-number total into whole-number parts by the largest remainder method.
+    
+    groups gives the group index of every cell, in any order, and shares each cell's
+    fraction of its group, summing to 1 per group. Every cell gets the floor
+    of its quota, then each group's leftover units go to its cells with the largest
+    remainders (ties to the earlier cell), so the parts sum exactly to the group total.
+    All groups are apportioned together in one pass.
+    """
+    group_totals = np.rint(np.asarray(group_totals, dtype=float))
+    groups = np.asarray(groups)
+    
+    quotas = group_totals[groups] * shares
+    counts = np.floor(quotas)
+    shortfall = group_totals - np.bincount(groups, weights=counts, minlength=len(group_totals))
+    
+    # Rank every cell within its group, largest remainder first
+    order = np.lexsort((-(quotas - counts), groups))
+    rank = np.empty(len(groups), dtype=np.int64)
+    sorted_groups = groups[order]
+    rank[order] = np.arange(len(groups)) - np.searchsorted(sorted_groups, sorted_groups)
+    
+    return (counts + (rank < shortfall[groups])).astype('int64')
+
 def redistribute_year_data(year_df, year, inflation_factor):
-    """Redistribute one year's data into modern brackets based on inflation adjustment."""
+    """Redistribute one year's data into modern brackets based on inflation adjustment.
+    
+    Reference implementation that loops over every demographic group; see
+    redistribute_year_data_vectorized for the version used by main().
+    """
     
     redistributed_rows = []
     
     # Group by all categorical variables to preserve demographics
     groupby_cols = ['income_range_display', 'sex', 'taxable_status', 'age_range_display']
     
-    for group_keys, group_df in year_df.groupby(groupby_cols):
+    for group_keys, group_df in year_df.groupby(groupby_cols, observed=True):
         source_bracket_label = group_keys[0]
         sex = group_keys[1]
         taxable_status = group_keys[2]
         age_range = group_keys[3]
         
         # Get source bracket bounds in nominal dollars
-        source_min_nominal, source_max_nominal = get_bracket_bounds(source_bracket_label)
+        source_min_nominal, source_max_nominal = bracket_bounds([source_bracket_label])[0]
         
         # Convert to 2023 dollars
         source_min_2023 = source_min_nominal * inflation_factor
@@ -129,91 +334,264 @@ def redistribute_year_data(year_df, year, inflation_factor):
         total_income = group_df['total_income_amount'].sum()
         total_tax = group_df['net_tax_amount'].sum()
         
+        # Share of the group falling in each modern bracket, scaled so that the whole group
+        # is allocated (the modern brackets leave $1 gaps between them)
+        overlaps = np.array([
+            calculate_overlap(source_min_2023, source_max_2023, target_min, target_max)
+            for target_min, target_max, _ in INCOME_BRACKETS
+        ])
+        if not overlaps.sum() > 0:
+            raise ValueError(f"{year} bracket '{source_bracket_label}' ({sex}, {taxable_status}, {age_range}) "
+                             f"does not overlap any modern bracket")
+        overlaps = overlaps / overlaps.sum()
+        targets = np.flatnonzero(overlaps > 0)
+        counts = apportion([total_individuals], np.zeros(len(targets), dtype=np.int64), overlaps[targets])
+        
         # Redistribute into modern brackets
-        for target_min, target_max, target_label in modern_brackets:
-            overlap = calculate_overlap(source_min_2023, source_max_2023, target_min, target_max)
+        for target, count in zip(targets, counts):
+            overlap = overlaps[target]
+            target_label = INCOME_RANGE_ORDER[target]
             
-            if overlap > 0:
-                # Allocate proportional share to this target bracket
-                new_row = {
-                    'income_year': year,
-                    'normalized_income_range': target_label,
-                    'income_range_display': target_label,
-                    'sex': sex,
-                    'taxable_status': taxable_status,
-                    'age_range_display': age_range,
-                    # Note: do NOT inflate individuals count - round to nearest integer
-                    'individuals_count': round(total_individuals * overlap),
-                    # DO inflate income and tax amounts
-                    'total_income_amount': total_income * overlap * inflation_factor,
-                    'net_tax_amount': total_tax * overlap * inflation_factor
-                }
-                redistributed_rows.append(new_row)
+            # Allocate proportional share to this target bracket
+            new_row = {
+                'income_year': year,
+                'normalized_income_range': target_label,
+                'income_range_display': target_label,
+                'sex': sex,
+                'taxable_status': taxable_status,
+                'age_range_display': age_range,
+                # Note: do NOT inflate individuals count - whole people, summing to the group total
+                'individuals_count': count,
+                # DO inflate income and tax amounts
+                'total_income_amount': total_income * overlap * inflation_factor,
+                'net_tax_amount': total_tax * overlap * inflation_factor
+            }
+            redistributed_rows.append(new_row)
     
     return pd.DataFrame(redistributed_rows)
 
+def redistribute_year_data_vectorized(year_df, year, inflation_factor, weight_cache=None,
+                                      distribution=DISTRIBUTION, top_bracket='bounded'):
+    """Redistribute one year's data into modern brackets based on inflation adjustment.
+    
+    Produces the same rows as redistribute_year_data, but computes the source x target
+    overlap matrix once for the year (or takes it from weight_cache) and applies it to
+    all demographic groups together. With a fitted distribution or a Pareto top bracket
+    every group gets its own row of weights, fitted to its mean income in one batch.
+    """
+    groupby_cols = ['income_range_display', 'sex', 'taxable_status', 'age_range_display']
+    
+    # Totals for each demographic group, in the same order the reference loop visits them
+    totals = year_df.groupby(groupby_cols, observed=True)[['individuals_count', 'total_income_amount', 'net_tax_amount']].sum()
+    
+    # Overlap of each source bracket (converted to 2023 dollars) with each modern bracket
+    source_labels = totals.index.get_level_values('income_range_display')
+    unique_labels = source_labels.unique()
+    source_bounds = bracket_bounds(unique_labels)
+    target_bounds = TARGET_BOUNDS
+    label_idx = unique_labels.get_indexer(source_labels)
+    
+    mean_incomes = open_top = None
+    if distribution[0] == 'fitted-beta' or top_bracket == 'pareto':
+        # Fitted models have one row of weights per demographic group
+        source_bounds = source_bounds[label_idx]
+        label_idx = np.arange(len(totals))
+        counts = totals['individuals_count'].to_numpy(dtype=float)
+        incomes = totals['total_income_amount'].to_numpy(dtype=float)
+        # Groups with nobody in them get the bracket midpoint; their weights multiply zero
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_incomes = np.where(counts > 0, incomes / counts, source_bounds.mean(axis=1))
+        if top_bracket == 'pareto':
+            open_top = np.asarray(source_labels == TOP_BRACKET_LABEL)
+    
+    if weight_cache is not None:
+        weights = weight_cache.get(source_bounds, target_bounds, inflation_factor, distribution, mean_incomes, open_top)
+    else:
+        weights = overlap_matrix(
+            source_bounds * inflation_factor,
+            target_bounds,
+            distribution,
+            None if mean_incomes is None else mean_incomes * inflation_factor,
+            open_top
+        )
+    
+    # One row of weights per demographic group, scaled so that each group is allocated in
+    # full (the modern brackets leave $1 gaps between them)
+    group_weights = weights[label_idx]
+    weight_totals = group_weights.sum(axis=1, keepdims=True)
+    unallocated = np.flatnonzero(~(weight_totals[:, 0] > 0))
+    if len(unallocated):
+        groups = [', '.join(map(str, totals.index[i])) for i in unallocated[:5]]
+        raise ValueError(f"{year}: {len(unallocated)} source group(s) do not overlap any modern bracket, "
+                         f"e.g. {groups}")
+    group_weights = group_weights / weight_totals
+    
+    # Keep only cells with a positive share, in group-major / target-minor order like the loop
+    group_idx, target_idx = np.nonzero(group_weights > 0)
+    overlap = group_weights[group_idx, target_idx]
+    target_labels = np.array(INCOME_RANGE_ORDER, dtype=object)[target_idx]
+    
+    return pd.DataFrame({
+        'income_year': year,
+        'normalized_income_range': target_labels,
+        'income_range_display': target_labels,
+        'sex': totals.index.get_level_values('sex')[group_idx],
+        'taxable_status': totals.index.get_level_values('taxable_status')[group_idx],
+        'age_range_display': totals.index.get_level_values('age_range_display')[group_idx],
+        # Note: do NOT inflate individuals count - whole people, summing to each group's total
+        'individuals_count': apportion(totals['individuals_count'].to_numpy(), group_idx, overlap),
+        # DO inflate income and tax amounts
+        'total_income_amount': totals['total_income_amount'].to_numpy()[group_idx] * overlap * inflation_factor,
+        'net_tax_amount': totals['net_tax_amount'].to_numpy()[group_idx] * overlap * inflation_factor
+    })
+
+def redistribute_year(year_df, year, reference=False, weight_cache=None, distribution=DISTRIBUTION, top_bracket='bounded'):
+    """Redistribute one year's rows into modern brackets (2022-23 is passed through as is)."""
+    if year not in INFLATION_FACTORS:
+        raise ValueError(f"No inflation factor found for year '{year}'. Available years: {list(INFLATION_FACTORS)}")
+    
+    if year == BASE_YEAR:
+        # For 2022-23, no redistribution needed - it's already in 2023 dollars
+        return year_df.copy()
+    
+    inflation_factor = INFLATION_FACTORS[year]
+    if reference:
+        if distribution != DISTRIBUTION or top_bracket != 'bounded':
+            raise ValueError("The reference implementation only supports the default Beta(2, 5) distribution")
+        return redistribute_year_data(year_df, year, inflation_factor)
+    return redistribute_year_data_vectorized(year_df, year, inflation_factor, weight_cache, distribution, top_bracket)
+
+def _redistribute_year_job(job):
+    """Worker entry point: redistribute one year and return any weight tables it computed.
+    
+    In a worker process weight_cache is a private copy, so new tables are sent back for
+    the parent to merge into its cache.
+    """
+    year_df, year, reference, weight_cache, distribution, top_bracket = job
+    known = set(weight_cache.tables) if weight_cache is not None else set()
+    year_redistributed = redistribute_year(year_df, year, reference, weight_cache, distribution, top_bracket)
+    new_tables = {}
+    if weight_cache is not None:
+        new_tables = {key: table for key, table in weight_cache.tables.items() if key not in known}
+    return year_redistributed, new_tables
+
+def stream_group_totals(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Sum the rows of a dataset per output group, reading it chunksize rows at a time.
+    
+    Each chunk is reduced to its group totals and added to a running total, so memory is
+    bounded by the number of groups rather than the number of rows. Rows are combined
+    before redistribution rather than after because individual counts are rounded per
+    source group; this way the output does not depend on how the input was chunked.
+    """
+    totals = None
+    for chunk in iter_dataset(path, SOURCE_COLUMNS, chunksize):
+        # Plain strings, so chunks with different categories still line up
+        chunk = chunk.assign(**{col: chunk[col].astype(str) for col in GROUPBY_COLUMNS})
+        chunk['income_year'] = normalize_years(chunk['income_year'])
+        chunk_totals = chunk.groupby(GROUPBY_COLUMNS)[VALUE_COLUMNS].sum()
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+    if totals is None:
+        raise ValueError(f"No rows found in '{path}'")
+    return totals.reset_index()
+
 def main():
-    # Load original data
-    print("Loading original data...")
-    df = pd.read_csv('ato_2010-2023.csv')
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reference', action='store_true',
+                        help='use the per-group loop implementation instead of the vectorised engine')
+    parser.add_argument('--weight-cache', default=WEIGHT_CACHE_PATH,
+                        help=f'overlap-weight cache file (default: {WEIGHT_CACHE_PATH})')
+    parser.add_argument('--no-weight-cache', action='store_true',
+                        help='recompute overlap weights without reading or writing the cache')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='redistribute years in parallel across this many processes (default: 1)')
+    parser.add_argument('--distribution', choices=list(DISTRIBUTIONS), default='beta',
+                        help='income distribution assumed within each bracket (default: beta)')
+    parser.add_argument('--top-bracket', choices=TOP_BRACKET_MODELS, default='bounded',
+                        help='model for the open-ended top bracket (default: bounded)')
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help='stream the input this many rows at a time instead of loading it whole')
+    parser.add_argument('--input', default='ato_2010-2023.csv', help='source dataset (default: ato_2010-2023.csv)')
+    parser.add_argument('--output', default='ato_2010-2023_inflation_redistributed.csv',
+                        help='redistributed dataset (default: ato_2010-2023_inflation_redistributed.csv)')
+    args = parser.parse_args()
     
-    # Normalize year format to use em-dashes consistently
-    df['income_year'] = df['income_year'].str.replace('-', '–')
+    if args.jobs < 1:
+        raise ValueError(f"--jobs must be at least 1, got {args.jobs}")
+    if args.chunksize is not None and args.chunksize < 1:
+        raise ValueError(f"--chunksize must be at least 1, got {args.chunksize}")
+    distribution = DISTRIBUTIONS[args.distribution]
+    if args.reference and (distribution != DISTRIBUTION or args.top_bracket != 'bounded'):
+        raise ValueError("--reference only supports the default beta distribution and bounded top bracket")
     
-    # Process each year
-    all_redistributed = []
+    weight_cache = None if args.no_weight_cache else OverlapWeightCache(args.weight_cache)
     
-    for year in df['income_year'].unique():
-        print(f"\nProcessing {year}...")
-        
-        year_df = df[df['income_year'] == year]
-        
-        if year not in inflation_factors:
-            raise ValueError(f"No inflation factor found for year '{year}'. Available years: {list(inflation_factors.keys())}")
-        
-        inflation_factor = inflation_factors[year]
+    if args.chunksize is not None:
+        # Only the per-group totals are kept, however large the input is
+        print(f"Streaming original data in chunks of {args.chunksize:,} rows...")
+        df = stream_group_totals(args.input, args.chunksize)
+    else:
+        # Load original data
+        print("Loading original data...")
+        df = read_dataset(args.input, columns=SOURCE_COLUMNS)
         
-        if year == '2022–23':
-            # For 2022-23, no redistribution needed - it's already in 2023 dollars
-            year_redistributed = year_df.copy()
+        # Normalize year format to use em-dashes consistently
+        df['income_year'] = normalize_years(df['income_year'])
+    
+    # Each year is independent; check them all up front so workers never fail part-way
+    years = list(df['income_year'].unique())
+    for year in years:
+        if year not in INFLATION_FACTORS:
+            raise ValueError(f"No inflation factor found for year '{year}'. Available years: {list(INFLATION_FACTORS)}")
+    jobs = [
+        (df[df['income_year'] == year], year, args.reference, weight_cache, distribution, args.top_bracket)
+        for year in years
+    ]
+    
+    # Process each year, in a process pool with --jobs; results come back in year order
+    # either way, so the output does not depend on the number of jobs
+    all_redistributed = []
+    
+    with contextlib.ExitStack() as stack:
+        if args.jobs > 1:
+            pool = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs))
+            results = pool.map(_redistribute_year_job, jobs)
         else:
-            # Redistribute historical data
-            year_redistributed = redistribute_year_data(year_df, year, inflation_factor)
-        
-        all_redistributed.append(year_redistributed)
+            results = map(_redistribute_year_job, jobs)
         
-        # Print summary
-        orig_total = year_df['individuals_count'].sum()
-        new_total = year_redistributed['individuals_count'].sum()
-        print(f"  Original total individuals: {orig_total:,.0f}")
-        print(f"  Redistributed total: {new_total:,.0f}")
-        print(f"  Difference: {abs(orig_total - new_total):,.0f} ({abs(orig_total - new_total)/orig_total*100:.2f}%)")
+        for (year_df, year, *_), (year_redistributed, new_tables) in zip(jobs, results):
+            print(f"\nProcessing {year}...")
+            
+            if weight_cache is not None:
+                weight_cache.update(new_tables)
+            
+            all_redistributed.append(year_redistributed)
+            
+            # Print summary
+            orig_total = year_df['individuals_count'].sum()
+            new_total = year_redistributed['individuals_count'].sum()
+            print(f"  Original total individuals: {orig_total:,.0f}")
+            print(f"  Redistributed total: {new_total:,.0f}")
+            print(f"  Difference: {abs(orig_total - new_total):,.0f} ({abs(orig_total - new_total)/orig_total*100:.2f}%)")
     
     # Combine all years
     final_df = pd.concat(all_redistributed, ignore_index=True)
     
     # Group by the same columns and sum to consolidate any duplicate rows
-    groupby_columns = [
-        'income_year',
-        'normalized_income_range', 
-        'income_range_display',
-        'sex',
-        'taxable_status',
-        'age_range_display'
-    ]
-    
-    final_df = final_df.groupby(groupby_columns, as_index=False).agg({
+    final_df = final_df.groupby(GROUPBY_COLUMNS, as_index=False, observed=True).agg({
         'individuals_count': 'sum',
         'total_income_amount': 'sum',
         'net_tax_amount': 'sum'
     })
     
+    if weight_cache is not None:
+        weight_cache.save()
+    
     # Save the redistributed dataset
-    final_df.to_csv('ato_2010-2023_inflation_redistributed.csv', index=False)
+    write_dataset(final_df, args.output)
     
     print("\n" + "="*60)
     print("Redistribution complete!")
-    print(f"Output saved to: ato_2010-2023_inflation_redistributed.csv")
+    print(f"Output saved to: {args.output}")
     print(f"Total rows: {len(final_df):,}")
     
     # Verify a specific bracket across years
@@ -3,469 +3,130 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "pandas",
-#     "plotly"
+#     "numpy",
+#     "pyarrow",
+#     "brotli"
 # ]
 # ///
 """
 Create an animated tax visualisation using Plotly.
 """
 
-import pandas as pd
+import argparse
+import glob
+import itertools
 import json
-import plotly.graph_objects as go
-import plotly.express as px
-
-def simplify_income_range(val):
-    """Remove the sorting prefix for display."""
-    if pd.isna(val):
-        return val
-    if '. ' in str(val):
-        return str(val).split('. ', 1)[1]
-    return str(val)
-
-def simplify_age_range(val):
-    """Remove the sorting prefix for display."""
-    if pd.isna(val):
-        return val
-    if '. ' in str(val):
-        return str(val).split('. ', 1)[1]
-    return str(val)
+import os
+import re
+import subprocess
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
 
-def main():
-    # Load the normalized data
-    df = pd.read_csv('ato_2010-2023.csv')
-    
-    # Also load the inflation-redistributed data
-    df_redistributed = pd.read_csv('ato_2010-2023_inflation_redistributed.csv')
-    
-    # Get unique values for controls
-    years = sorted(df['income_year'].unique())
-    
-    # Define the proper order for income ranges
-    income_range_order = [
-        '$6,000 or less',
-        '$6,001 to $10,000',
-        '$10,001 to $20,000',
-        '$20,001 to $30,000',
-        '$30,001 to $40,000',
-        '$40,001 to $50,000',
-        '$50,001 to $60,000',
-        '$60,001 to $80,000',
-        '$80,001 to $100,000',
-        '$100,001 to $150,000',
-        '$150,001 to $200,000',
-        '$200,001 to $250,000',
-        '$250,001 to $500,000',
-        '$500,001 to $1,000,000',
-        '$1,000,001 or more'
-    ]
-    
-    income_ranges = income_range_order
-    income_ranges_display = income_ranges
-    
-    # Prepare data for Plotly
-    plot_data = []
-    
-    # Process data for each year
-    for year in years:
-        year_df = df[df['income_year'] == year].copy()
-        
-        # Group by income range and aggregate
-        grouped = year_df.groupby(['normalized_income_range', 'income_range_display', 'sex', 'taxable_status', 'age_range_display']).agg({
-            'individuals_count': 'sum',
-            'total_income_amount': 'sum',
-            'net_tax_amount': 'sum'
-        }).reset_index()
-        
-        # Add year column
-        grouped['year'] = year
-        plot_data.append(grouped)
-    
-    # Combine all data
-    all_data = pd.concat(plot_data, ignore_index=True)
-    
-    # Create sort order for income ranges
-    all_data['income_range_order'] = all_data['normalized_income_range'].apply(
-        lambda x: income_range_order.index(x) if x in income_range_order else 999
-    )
-    all_data = all_data.sort_values(['year', 'income_range_order'])
-    
-    # Convert to JSON for embedding
-    data_json = all_data.to_json(orient='records')
-    
-    # Process redistributed data the same way
-    plot_data_redistributed = []
-    
-    for year in years:
-        year_df = df_redistributed[df_redistributed['income_year'] == year].copy()
-        
-        # Group by income range and aggregate
-        grouped = year_df.groupby(['normalized_income_range', 'income_range_display', 'sex', 'taxable_status', 'age_range_display']).agg({
-            'individuals_count': 'sum',
-            'total_income_amount': 'sum',
-            'net_tax_amount': 'sum'
-        }).reset_index()
-        
-        # Add year column
-        grouped['year'] = year
-        plot_data_redistributed.append(grouped)
-    
-    # Combine all redistributed data
-    all_data_redistributed = pd.concat(plot_data_redistributed, ignore_index=True)
-    
-    # Create sort order for income ranges
-    all_data_redistributed['income_range_order'] = all_data_redistributed['normalized_income_range'].apply(
-        lambda x: income_range_order.index(x) if x in income_range_order else 999
-    )
-    all_data_redistributed = all_data_redistributed.sort_values(['year', 'income_range_order'])
-    
-    # Convert redistributed data to JSON
-    data_redistributed_json = all_data_redistributed.to_json(orient='records')
-    
-    # Calculate global maximums for each colorBy option
-    # For stacked mode - always sum across all demographics per income range
-    stacked_max_individuals = all_data.groupby(['year', 'normalized_income_range'])['individuals_count'].sum().max()
-    stacked_max_income = all_data.groupby(['year', 'normalized_income_range'])['total_income_amount'].sum().max()
-    stacked_max_tax = all_data.groupby(['year', 'normalized_income_range'])['net_tax_amount'].sum().max()
-    
-    # Also calculate maximums for redistributed data
-    stacked_max_individuals_redis = all_data_redistributed.groupby(['year', 'normalized_income_range'])['individuals_count'].sum().max()
-    stacked_max_income_redis = all_data_redistributed.groupby(['year', 'normalized_income_range'])['total_income_amount'].sum().max()
-    stacked_max_tax_redis = all_data_redistributed.groupby(['year', 'normalized_income_range'])['net_tax_amount'].sum().max()
-    
-    # Calculate cumulative maximums - these will be much larger
-    cumulative_max = {}
-    for col in ['individuals_count', 'total_income_amount', 'net_tax_amount']:
-        # For each year, calculate cumulative sum across income brackets
-        max_cumul = 0
-        for year in years:
-            year_data = all_data[all_data['year'] == year]
-            # Sum all values for the year (this is what cumulative will approach)
-            year_total = year_data[col].sum()
-            max_cumul = max(max_cumul, year_total)
-        cumulative_max[col] = max_cumul
-    
-    print(f"  Cumulative maximums - individuals: {cumulative_max['individuals_count']:,.0f}, income: ${cumulative_max['total_income_amount']:,.0f}, tax: ${cumulative_max['net_tax_amount']:,.0f}")
-    
-    # For grouped mode - need to calculate for each colorBy option
-    grouped_max = {}
-    
-    # When colorBy is 'none' - sum all demographics per income bracket
-    grouped_max['none'] = {
-        'individuals_count': all_data.groupby(['year', 'normalized_income_range'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data.groupby(['year', 'normalized_income_range'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data.groupby(['year', 'normalized_income_range'])['net_tax_amount'].sum().max()
-    }
-    
-    # When colorBy is 'age_range_display' - max within each age group per income bracket
-    grouped_max['age_range_display'] = {
-        'individuals_count': all_data.groupby(['year', 'normalized_income_range', 'age_range_display'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data.groupby(['year', 'normalized_income_range', 'age_range_display'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data.groupby(['year', 'normalized_income_range', 'age_range_display'])['net_tax_amount'].sum().max()
-    }
-    
-    # When colorBy is 'sex' - max within each sex per income bracket
-    grouped_max['sex'] = {
-        'individuals_count': all_data.groupby(['year', 'normalized_income_range', 'sex'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data.groupby(['year', 'normalized_income_range', 'sex'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data.groupby(['year', 'normalized_income_range', 'sex'])['net_tax_amount'].sum().max()
-    }
-    
-    # When colorBy is 'taxable_status' - max within each status per income bracket
-    grouped_max['taxable_status'] = {
-        'individuals_count': all_data.groupby(['year', 'normalized_income_range', 'taxable_status'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data.groupby(['year', 'normalized_income_range', 'taxable_status'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data.groupby(['year', 'normalized_income_range', 'taxable_status'])['net_tax_amount'].sum().max()
-    }
-    
-    # Calculate grouped maximums for redistributed data
-    grouped_max_redis = {}
-    
-    grouped_max_redis['none'] = {
-        'individuals_count': all_data_redistributed.groupby(['year', 'normalized_income_range'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data_redistributed.groupby(['year', 'normalized_income_range'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data_redistributed.groupby(['year', 'normalized_income_range'])['net_tax_amount'].sum().max()
-    }
-    
-    grouped_max_redis['age_range_display'] = {
-        'individuals_count': all_data_redistributed.groupby(['year', 'normalized_income_range', 'age_range_display'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'age_range_display'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'age_range_display'])['net_tax_amount'].sum().max()
-    }
-    
-    grouped_max_redis['sex'] = {
-        'individuals_count': all_data_redistributed.groupby(['year', 'normalized_income_range', 'sex'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'sex'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'sex'])['net_tax_amount'].sum().max()
-    }
-    
-    grouped_max_redis['taxable_status'] = {
-        'individuals_count': all_data_redistributed.groupby(['year', 'normalized_income_range', 'taxable_status'])['individuals_count'].sum().max(),
-        'total_income_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'taxable_status'])['total_income_amount'].sum().max(),
-        'net_tax_amount': all_data_redistributed.groupby(['year', 'normalized_income_range', 'taxable_status'])['net_tax_amount'].sum().max()
-    }
-    
-    print(f"Debug maximums:")
-    print(f"  Stacked - individuals: {stacked_max_individuals:,.0f}, income: ${stacked_max_income:,.0f}, tax: ${stacked_max_tax:,.0f}")
-    for color_by in grouped_max:
-        max_indiv = grouped_max[color_by]['individuals_count']
-        max_income = grouped_max[color_by]['total_income_amount'] 
-        max_tax = grouped_max[color_by]['net_tax_amount']
-        print(f"  Grouped ({color_by}) - individuals: {max_indiv:,.0f}, income: ${max_income:,.0f}, tax: ${max_tax:,.0f}")
-    
-    # Pre-calculate tick values for all combinations
-    def calculate_ticks(max_val, is_money=False, is_log=False):
-        """Calculate tick values and labels for a given max value."""
-        if is_log:
-            # For log scale, use powers of 10
-            if is_money:
-                ticks = [1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11, 1e12]
-                labels = ['$1K', '$10K', '$100K', '$1M', '$10M', '$100M', '$1B', '$10B', '$100B', '$1T']
-            else:
-                ticks = [1, 10, 100, 1000, 10000, 100000, 1000000, 10000000]
-                labels = ['1', '10', '100', '1K', '10K', '100K', '1M', '10M']
-            # Filter to only include ticks up to max_val * 2
-            valid_ticks = [(t, l) for t, l in zip(ticks, labels) if t <= max_val * 2]
-            return [t[0] for t in valid_ticks], [t[1] for t in valid_ticks]
-        else:
-            # Linear scale
-            if is_money:
-                if max_val <= 10e9:
-                    step = 2e9
-                elif max_val <= 30e9:
-                    step = 5e9
-                elif max_val <= 100e9:
-                    step = 10e9
-                elif max_val <= 300e9:
-                    step = 20e9
-                else:
-                    step = 50e9
-                
-                ticks = []
-                labels = []
-                for i in range(0, int(max_val * 1.2), int(step)):
-                    ticks.append(i)
-                    if i == 0:
-                        labels.append('$0')
-                    elif i < 1e9:
-                        labels.append(f'${i/1e6:.0f}M')
-                    else:
-                        labels.append(f'${i/1e9:.0f}B')
-            else:
-                # For individuals
-                if max_val <= 100e3:  # 100K
-                    step = 20e3  # 20K steps
-                elif max_val <= 500e3:  # 500K
-                    step = 100e3  # 100K steps
-                elif max_val <= 2e6:  # 2M
-                    step = 500e3  # 500K steps
-                elif max_val <= 5e6:
-                    step = 1e6
-                elif max_val <= 20e6:
-                    step = 2e6
-                elif max_val <= 50e6:
-                    step = 5e6
-                else:
-                    step = 10e6
-                
-                ticks = []
-                labels = []
-                for i in range(0, int(max_val * 1.2), int(step)):
-                    ticks.append(i)
-                    if i == 0:
-                        labels.append('0')
-                    elif i < 1e6:
-                        labels.append(f'{i/1e3:.0f}K')
-                    else:
-                        labels.append(f'{i/1e6:.0f}M')
-            
-            return ticks, labels
-    
-    # Calculate percentage ticks
-    def calculate_percentage_ticks(max_pct, is_log=False):
-        """Calculate percentage tick values and labels."""
-        if is_log:
-            ticks = [0.01, 0.1, 1, 10, 100]
-            labels = ['0.01%', '0.1%', '1%', '10%', '100%']
-            valid_ticks = [(t, l) for t, l in zip(ticks, labels) if t <= max_pct * 2]
-            return [t[0] for t in valid_ticks], [t[1] for t in valid_ticks]
-        else:
-            # Better step logic for small percentages
-            if max_pct <= 1:
-                step = 0.2
-            elif max_pct <= 3:
-                step = 0.5
-            elif max_pct <= 5:
-                step = 1
-            elif max_pct <= 10:
-                step = 2
-            elif max_pct <= 25:
-                step = 5
-            elif max_pct <= 50:
-                step = 10
-            else:
-                step = 20
-            
-            ticks = []
-            labels = []
-            i = 0
-            while i <= max_pct * 1.2:
-                ticks.append(i)
-                labels.append(f'{i:g}%')  # Use :g to avoid unnecessary decimals
-                i += step
-            
-            return ticks, labels
-    
-    # Calculate percentage max values properly
-    # For percentage mode, values are % of total year
-    # Stacked: sum of percentages in each income bracket
-    # Grouped: individual percentage values (same as stacked, just not summed visually)
-    
-    # Calculate actual percentage maximums from data
-    stacked_pct_max = {}
-    grouped_pct_max = {
-        'none': {},
-        'age_range_display': {},
-        'sex': {},
-        'taxable_status': {}
-    }
-    
-    for col in ['individuals_count', 'total_income_amount', 'net_tax_amount']:
-        max_stacked = 0
-        
-        # Initialize max for each colorBy option
-        for color_by in grouped_pct_max:
-            grouped_pct_max[color_by][col] = 0
-        
-        for year in years:
-            year_data = all_data[all_data['year'] == year]
-            year_total = year_data[col].sum()
-            
-            if year_total > 0:
-                # For each income bracket, calculate sum of percentages
-                for income_range in income_range_order:
-                    bracket_data = year_data[year_data['normalized_income_range'] == income_range]
-                    bracket_sum = bracket_data[col].sum()
-                    bracket_pct = (bracket_sum / year_total) * 100
-                    max_stacked = max(max_stacked, bracket_pct)
-                    
-                    # For 'none' - the whole bracket is one bar
-                    grouped_pct_max['none'][col] = max(grouped_pct_max['none'][col], bracket_pct)
-                    
-                    # For other colorBy options - need to group by that demographic
-                    for color_by in ['age_range_display', 'sex', 'taxable_status']:
-                        color_groups = bracket_data.groupby(color_by)[col].sum()
-                        for group_val in color_groups:
-                            group_pct = (group_val / year_total) * 100
-                            grouped_pct_max[color_by][col] = max(grouped_pct_max[color_by][col], group_pct)
-        
-        stacked_pct_max[col] = max_stacked
-        print(f"  {col} - stacked max %: {max_stacked:.2f}%")
-        print(f"    grouped max % by colorBy option:")
-        for color_by in grouped_pct_max:
-            print(f"      {color_by}: {grouped_pct_max[color_by][col]:.2f}%")
-    
-    # Pre-calculate Y-axis ranges for all combinations
-    y_ranges = {}
-    
-    # Helper to calculate range with padding
-    def calculate_range(max_val, is_log=False, is_pct=False):
-        if is_log:
-            if is_pct:
-                return [0.01, float(max_val * 2)]  # 0.01% to 2x max for log percentage
-            elif max_val < 1000:
-                return [1, float(max_val * 10)]
-            else:
-                return [1000, float(max_val * 10)]  # $1K minimum for money, 1 for counts
-        else:
-            return [0, float(max_val * 1.1)]  # 10% padding for linear
-    
-    # For now, just use the "none" grouped max as a default
-    grouped_max_individuals = grouped_max['none']['individuals_count']
-    grouped_max_income = grouped_max['none']['total_income_amount']
-    grouped_max_tax = grouped_max['none']['net_tax_amount']
-    
-    # Absolute values
-    y_ranges['stack_individuals_abs'] = calculate_range(stacked_max_individuals)
-    y_ranges['stack_individuals_log'] = calculate_range(stacked_max_individuals, is_log=True)
-    y_ranges['stack_income_abs'] = calculate_range(stacked_max_income)
-    y_ranges['stack_income_log'] = calculate_range(stacked_max_income, is_log=True)
-    y_ranges['stack_tax_abs'] = calculate_range(stacked_max_tax)
-    y_ranges['stack_tax_log'] = calculate_range(stacked_max_tax, is_log=True)
-    
-    y_ranges['group_individuals_abs'] = calculate_range(grouped_max_individuals)
-    y_ranges['group_individuals_log'] = calculate_range(grouped_max_individuals, is_log=True)
-    y_ranges['group_income_abs'] = calculate_range(grouped_max_income)
-    y_ranges['group_income_log'] = calculate_range(grouped_max_income, is_log=True)
-    y_ranges['group_tax_abs'] = calculate_range(grouped_max_tax)
-    y_ranges['group_tax_log'] = calculate_range(grouped_max_tax, is_log=True)
-    
-    # Percentage values
-    y_ranges['stack_individuals_pct'] = calculate_range(stacked_pct_max['individuals_count'], is_pct=True)
-    y_ranges['stack_individuals_pct_log'] = calculate_range(stacked_pct_max['individuals_count'], is_log=True, is_pct=True)
-    y_ranges['stack_income_pct'] = calculate_range(stacked_pct_max['total_income_amount'], is_pct=True)
-    y_ranges['stack_income_pct_log'] = calculate_range(stacked_pct_max['total_income_amount'], is_log=True, is_pct=True)
-    y_ranges['stack_tax_pct'] = calculate_range(stacked_pct_max['net_tax_amount'], is_pct=True)
-    y_ranges['stack_tax_pct_log'] = calculate_range(stacked_pct_max['net_tax_amount'], is_log=True, is_pct=True)
-    
-    # Use 'none' as default for the old y_ranges (these aren't used in the new implementation)
-    y_ranges['group_individuals_pct'] = calculate_range(grouped_pct_max['none']['individuals_count'], is_pct=True)
-    y_ranges['group_individuals_pct_log'] = calculate_range(grouped_pct_max['none']['individuals_count'], is_log=True, is_pct=True)
-    y_ranges['group_income_pct'] = calculate_range(grouped_pct_max['none']['total_income_amount'], is_pct=True)
-    y_ranges['group_income_pct_log'] = calculate_range(grouped_pct_max['none']['total_income_amount'], is_log=True, is_pct=True)
-    y_ranges['group_tax_pct'] = calculate_range(grouped_pct_max['none']['net_tax_amount'], is_pct=True)
-    y_ranges['group_tax_pct_log'] = calculate_range(grouped_pct_max['none']['net_tax_amount'], is_log=True, is_pct=True)
-    
-    # Pre-calculate all tick combinations
-    tick_configs = {}
-    
-    # Absolute values - stacked
-    tick_configs['stack_individuals_abs'] = calculate_ticks(stacked_max_individuals, is_money=False, is_log=False)
-    tick_configs['stack_individuals_log'] = calculate_ticks(stacked_max_individuals, is_money=False, is_log=True)
-    tick_configs['stack_income_abs'] = calculate_ticks(stacked_max_income, is_money=True, is_log=False)
-    tick_configs['stack_income_log'] = calculate_ticks(stacked_max_income, is_money=True, is_log=True)
-    tick_configs['stack_tax_abs'] = calculate_ticks(stacked_max_tax, is_money=True, is_log=False)
-    tick_configs['stack_tax_log'] = calculate_ticks(stacked_max_tax, is_money=True, is_log=True)
-    
-    # Absolute values - grouped
-    tick_configs['group_individuals_abs'] = calculate_ticks(grouped_max_individuals, is_money=False, is_log=False)
-    tick_configs['group_individuals_log'] = calculate_ticks(grouped_max_individuals, is_money=False, is_log=True)
-    tick_configs['group_income_abs'] = calculate_ticks(grouped_max_income, is_money=True, is_log=False)
-    tick_configs['group_income_log'] = calculate_ticks(grouped_max_income, is_money=True, is_log=True)
-    tick_configs['group_tax_abs'] = calculate_ticks(grouped_max_tax, is_money=True, is_log=False)
-    tick_configs['group_tax_log'] = calculate_ticks(grouped_max_tax, is_money=True, is_log=True)
-    
-    # Percentage values - using calculated maximums
-    tick_configs['stack_individuals_pct'] = calculate_percentage_ticks(stacked_pct_max['individuals_count'], is_log=False)
-    tick_configs['stack_individuals_pct_log'] = calculate_percentage_ticks(stacked_pct_max['individuals_count'], is_log=True)
-    tick_configs['stack_income_pct'] = calculate_percentage_ticks(stacked_pct_max['total_income_amount'], is_log=False)
-    tick_configs['stack_income_pct_log'] = calculate_percentage_ticks(stacked_pct_max['total_income_amount'], is_log=True)
-    tick_configs['stack_tax_pct'] = calculate_percentage_ticks(stacked_pct_max['net_tax_amount'], is_log=False)
-    tick_configs['stack_tax_pct_log'] = calculate_percentage_ticks(stacked_pct_max['net_tax_amount'], is_log=True)
-    
-    tick_configs['group_individuals_pct'] = calculate_percentage_ticks(grouped_pct_max['none']['individuals_count'], is_log=False)
-    tick_configs['group_individuals_pct_log'] = calculate_percentage_ticks(grouped_pct_max['none']['individuals_count'], is_log=True)
-    tick_configs['group_income_pct'] = calculate_percentage_ticks(grouped_pct_max['none']['total_income_amount'], is_log=False)
-    tick_configs['group_income_pct_log'] = calculate_percentage_ticks(grouped_pct_max['none']['total_income_amount'], is_log=True)
-    tick_configs['group_tax_pct'] = calculate_percentage_ticks(grouped_pct_max['none']['net_tax_amount'], is_log=False)
-    tick_configs['group_tax_pct_log'] = calculate_percentage_ticks(grouped_pct_max['none']['net_tax_amount'], is_log=True)
-    
-    # Convert to JSON for embedding
-    tick_configs_json = json.dumps(tick_configs)
-    y_ranges_json = json.dumps(y_ranges)
-    
-    # Debug output
-    print("\nDebug - Y-axis ranges:")
-    for key in sorted(y_ranges.keys()):
-        print(f"  {key}: {y_ranges[key]}")
-    
-    print("\nDebug - Tick configs (first few ticks):")
-    for key in sorted(tick_configs.keys()):
-        vals, labels = tick_configs[key]
-        if len(vals) > 0:
-            print(f"  {key}: vals={vals[:3]}..., labels={labels[:3]}...")
-        else:
-            print(f"  {key}: EMPTY")
+from build_cache import (BuildManifest, hash_bytes, prune_directory, write_compressed, write_hashed_asset,
+                         write_if_changed)
+
+# Inputs of each build stage. The HTML and JS template text lives in this file.
+INDEX_INPUTS = ['create_plotly_chart.py', 'public/styles.css']
+SCRIPT_INPUTS = ['create_plotly_chart.py', 'reference_data.py', 'tax_engine.py']
+WORKER_INPUTS = ['create_plotly_chart.py']
+DATA_INPUTS = [
+    'create_plotly_chart.py',
+    'chart_data.py',
+    'reference_data.py',
+    'ato_data.py',
+    'ato_2010-2023.csv',
+    'ato_2010-2023_inflation_redistributed.csv'
+]
+
+# Content-hashed dataset files fetched by the page
+DATA_DIR = 'public/data'
+
+# Vendored plotly.js source checkout (with its npm dependencies installed) used to build
+# a partial bundle holding only the trace types the chart draws. The slider and other
+# layout components are part of Plotly's core and always included.
+PLOTLY_SOURCE_DIR = 'vendor/plotly.js'
+PLOTLY_TRACES = ['bar']
+PLOTLY_BUNDLE_NAME = 'plotly-bar'
+PLOTLY_DIR = 'public/vendor'
+
+# plotly.js release whose custom-bundle task (its flags and dist/ output name) the Plotly
+# stage follows; a checkout of another version is refused rather than guessed at
+PLOTLY_VERSION = '3.0.1'
+
+# Full bundle served from public/ when no Plotly source is vendored
+PLOTLY_FALLBACK = f'plotly-{PLOTLY_VERSION}.min.js'
+
+# Stylesheet whose first-paint rules are inlined in index.html; rules whose selectors all
+# contain one of these markers (interaction states, tooltips, the help dialog's contents)
+# wait for the full file
+STYLESHEET_PATH = 'public/styles.css'
+CRITICAL_CSS_DEFERRED = (':hover', ':focus', ':active', '[data-tooltip]', '.modal ', '.modal-')
+
+# The view a URL without parameters opens on (see getURLParams in the script). Its frame is
+# inlined in index.html so the first paint does not wait for the datasets.
+FIRST_FRAME_REQUEST = {
+    'yearIndex': 0,
+    'colorBy': 'age_range_display',
+    'totalBy': 'net_tax_amount',
+    'percentage': True,
+    'cumulative': True,
+    'inflation': False
+}
+
+# Short URL codes of the colour and measure options (the c and m parameters)
+COLOR_BY_CODES = {'none': 'n', 'age_range_display': 'a', 'sex': 's', 'taxable_status': 't'}
+TOTAL_BY_CODES = {'individuals_count': 'ind', 'total_income_amount': 'inc', 'net_tax_amount': 'tax'}
+
+# Precomputed frames for deep links, one per frame request reachable from the URL. The
+# stacking (st) and log (l) parameters only change the layout, so states differing in
+# them share a file.
+SNAPSHOT_DIR = 'public/snapshots'
+
+# Tax bracket widget: one bar from $0 to TAX_BRACKET_MAX_INCOME for each year's scale
+TAX_BRACKET_FIRST_YEAR = '2010–11'
+TAX_BRACKET_MAX_INCOME = 200000
+TAX_BRACKET_COLORS = ['#f4f0fe', '#c4b5fd', '#a78bfa', '#8b5cf6', '#7c3aed']
+TAX_BRACKET_LEVY_COLOR = '#6b21a8'
+
+# Threshold labels closer than this (% of the bar) to the previous one are left out, and
+# labels past TAX_BRACKET_RIGHT_ALIGN are right-aligned to stay inside the bar
+TAX_BRACKET_LABEL_GAP = 5
+TAX_BRACKET_RIGHT_ALIGN = 85
+
+def css_blocks(css):
+    """Split a stylesheet into its top-level (prelude, body) blocks, dropping comments."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    blocks = []
+    depth = start = body_start = 0
+    for i, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude, body_start = css[start:i], i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((' '.join(prelude.split()), css[body_start:i]))
+                start = i + 1
+    return blocks
+
+def critical_css(css):
+    """The rules of a stylesheet needed for first paint (see CRITICAL_CSS_DEFERRED), minified."""
+    rules = []
+    for prelude, body in css_blocks(css):
+        if prelude.startswith('@'):
+            inner = critical_css(body)
+            if inner:
+                rules.append(prelude + '{' + inner + '}')
+        elif not all(any(marker in selector for marker in CRITICAL_CSS_DEFERRED) for selector in prelude.split(',')):
+            declarations = [' '.join(declaration.split()) for declaration in body.split(';')]
+            rules.append(prelude + '{' + ';'.join(filter(None, declarations)) + '}')
+    return ''.join(rules)
+
+def render_index_html(config, plotly_bundle=PLOTLY_FALLBACK):
+    """Render the page shell written to public/index.html, with the per-build config inlined."""
+    with open(STYLESHEET_PATH, encoding='utf-8') as f:
+        inline_css = critical_css(f.read())
     
     # Create the HTML template with Plotly
     html_content = '''<!DOCTYPE html>
@@ -534,8 +195,10 @@ def main():
     <link rel="sitemap" type="application/xml" title="Sitemap" href="https://aussie.tax/sitemap.xml">
 
     <!-- Stylesheets and scripts -->
-    <link rel="stylesheet" href="/styles.css">
-    <script src="plotly-3.0.1.min.js" charset="utf-8" defer></script>
+    <style>''' + inline_css + '''</style>
+    <link rel="preload" href="/styles.css" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="/styles.css"></noscript>
+    <script src="''' + plotly_bundle + '''" charset="utf-8" defer></script>
 </head>
 <body>
     <div class="container">
@@ -729,1102 +392,1424 @@ def main():
         </div>
     </div>
     
-    <script src="script.js"></script>
+    <script id="chartConfig" type="application/json">''' + json.dumps(config).replace('</', '<\\/') + '''</script>
+    <script src="script.js" defer></script>
 </body>
 </html>'''
+    
+    return html_content
 
-    script_content = '''// Wait for Plotly to be loaded
-if (typeof Plotly === 'undefined') {
-    window.addEventListener('load', initChart);
-} else {
-    initChart();
+def tax_bracket_widget():
+    """Per-year layout of the tax bracket bar, from the scales in tax_rates/.
+    
+    Segment widths, colours and rate text, and which threshold labels show and where, are
+    all worked out here, so the page only copies them onto its elements.
+    """
+    from tax_engine import load_tax_scales
+    
+    widget = {}
+    for year, scale in load_tax_scales().items():
+        if year < TAX_BRACKET_FIRST_YEAR:
+            continue
+        
+        thresholds = scale.thresholds.tolist()
+        ends = thresholds[1:] + [TAX_BRACKET_MAX_INCOME]
+        # A levy starting at a bracket threshold (the budget repair levy) is shown as part of
+        # the rate; levies with thresholds of their own (the flood levy) are not
+        levies = [(threshold, rate) for threshold, rate in scale.levy_steps if threshold in thresholds]
+        
+        segments, labels = [], []
+        for i, (start, end, rate) in enumerate(zip(thresholds, ends, scale.rates.tolist())):
+            width = ((min(end, TAX_BRACKET_MAX_INCOME) - start) / TAX_BRACKET_MAX_INCOME) * 100
+            if width <= 0:
+                continue
+            
+            levy = sum(levy_rate for threshold, levy_rate in levies if threshold <= start)
+            segments.append({
+                'width': width,
+                'color': TAX_BRACKET_LEVY_COLOR if levy else TAX_BRACKET_COLORS[min(i, len(TAX_BRACKET_COLORS) - 1)],
+                'text': f"{round((rate + levy) * 100, 4):g}%"
+            })
+            
+            position = (start / TAX_BRACKET_MAX_INCOME) * 100
+            if labels and position - labels[-1]['position'] < TAX_BRACKET_LABEL_GAP:
+                continue
+            labels.append({'text': '$0' if start == 0 else f"${start / 1000:g}k", 'position': position})
+        
+        for label in labels:
+            position = label.pop('position')
+            if position > TAX_BRACKET_RIGHT_ALIGN:
+                label['right'] = 100 - position
+            else:
+                label['left'] = position
+        if thresholds[-1] < TAX_BRACKET_MAX_INCOME:
+            labels.append({'text': f"${TAX_BRACKET_MAX_INCOME / 1000:g}k+", 'left': 100})
+        
+        widget[year] = {'segments': segments, 'labels': labels}
+    return widget
+
+def render_dataset_functions():
+    """JavaScript shared by script.js and the worker: dataset decoding and frame aggregation."""
+    return '''// Decode both datasets (pre-aggregated trace tables, see trace_tables in chart_data.py)
+// from the raw bytes of their JSON files
+function decodeDatasets(buffers) {
+    const decoder = new TextDecoder();
+    return {
+        nominal: JSON.parse(decoder.decode(buffers.nominal)),
+        redistributed: JSON.parse(decoder.decode(buffers.redistributed))
+    };
+}
+
+// Absolute y-values of one trace: tables are laid out year x category x income range
+function traceValues(dataset, colorBy, totalBy, yearIndex, categoryIndex) {
+    const categoryCount = colorBy === 'none' ? 1 : dataset.colorCategories[colorBy].length;
+    const rangeCount = dataset.incomeRanges.length;
+    const start = (yearIndex * categoryCount + categoryIndex) * rangeCount;
+    return Array.from(dataset.traces[colorBy][totalBy].slice(start, start + rangeCount));
+}
+
+// Year totals shown in the stats panel
+function yearStats(dataset, yearIndex) {
+    return {
+        individuals: dataset.yearTotals.individuals_count[yearIndex],
+        income: dataset.yearTotals.total_income_amount[yearIndex],
+        tax: dataset.yearTotals.net_tax_amount[yearIndex]
+    };
 }
 
-function initChart() {
-    // Embedded data
-    const rawData = ''' + data_json + ''';
-    const rawDataRedistributed = ''' + data_redistributed_json + ''';
+// Trace names and y-values for one chart state, plus the stats of that year and the one before.
+// request: { yearIndex, colorBy, totalBy, percentage, cumulative, inflation }
+function computeFrame(datasets, request) {
+    const data = request.inflation ? datasets.redistributed : datasets.nominal;
+    const { yearIndex, colorBy, totalBy } = request;
+    
+    // Year total for percentage mode
+    const totalValue = data.yearTotals[totalBy][yearIndex];
+    
+    // Pre-sorted at build time (age ranges in age order)
+    const colorCategories = colorBy === 'none' ? ['All'] : data.colorCategories[colorBy];
+    
+    const traces = colorCategories.map((category, categoryIndex) => {
+        // Pre-aggregated at build time; percentage is always % of the year total
+        const yValues = traceValues(data, colorBy, totalBy, yearIndex, categoryIndex).map(value => {
+            return request.percentage ? (value / totalValue) * 100 : value;
+        });
+        
+        // Apply cumulative calculation if enabled
+        if (request.cumulative) {
+            let cumulativeSum = 0;
+            for (let i = 0; i < yValues.length; i++) {
+                cumulativeSum += yValues[i];
+                yValues[i] = cumulativeSum;
+            }
+        }
+        return { name: category, y: yValues };
+    });
     
-    // Store both datasets
-    const datasets = {
-        nominal: rawData,
-        redistributed: rawDataRedistributed
+    return {
+        traces: traces,
+        stats: yearStats(data, yearIndex),
+        previousStats: yearIndex > 0 ? yearStats(data, yearIndex - 1) : null
     };
+}'''
 
-    // Pre-calculated maximums for each combination
-const maximums = {
-    nominal: {
-        stacked: {
-            individuals_count: ''' + str(int(stacked_max_individuals)) + ''',
-            total_income_amount: ''' + str(int(stacked_max_income)) + ''',
-            net_tax_amount: ''' + str(int(stacked_max_tax)) + '''
-        },
-        grouped: ''' + json.dumps({k: {col: int(v[col]) for col in v} for k, v in grouped_max.items()}) + '''
-    },
-    redistributed: {
-        stacked: {
-            individuals_count: ''' + str(int(stacked_max_individuals_redis)) + ''',
-            total_income_amount: ''' + str(int(stacked_max_income_redis)) + ''',
-            net_tax_amount: ''' + str(int(stacked_max_tax_redis)) + '''
-        },
-        grouped: ''' + json.dumps({k: {col: int(v[col]) for col in v} for k, v in grouped_max_redis.items()}) + '''
-    },
-    cumulative: {
-        individuals_count: ''' + str(int(cumulative_max['individuals_count'])) + ''',
-        total_income_amount: ''' + str(int(cumulative_max['total_income_amount'])) + ''',
-        net_tax_amount: ''' + str(int(cumulative_max['net_tax_amount'])) + '''
+def render_worker():
+    """Render public/chart-worker.js, which owns the datasets and answers frame requests."""
+    worker_content = '''// Chart data worker: decodes the datasets (transferred as raw ArrayBuffers) and
+// aggregates each frame off the main thread.
+// Messages in:  { type: 'load', buffers: { nominal, redistributed } }
+//               { type: 'frame', id, request }  (request as for computeFrame)
+// Messages out: { type: 'ready', years }
+//               { type: 'frame', id, frame }
+//               { type: 'error', id, message }  (id is omitted if loading failed)
+
+''' + render_dataset_functions() + '''
+
+let datasets = null;
+
+self.onmessage = function(event) {
+    const message = event.data;
+    try {
+        if (message.type === 'load') {
+            datasets = decodeDatasets(message.buffers);
+            self.postMessage({ type: 'ready', years: datasets.nominal.years });
+        } else if (message.type === 'frame') {
+            self.postMessage({ type: 'frame', id: message.id, frame: computeFrame(datasets, message.request) });
+        }
+    } catch (error) {
+        self.postMessage({ type: 'error', id: message.id, message: error.message || String(error) });
     }
 };
+'''
+    
+    return worker_content
 
-// Pre-calculated percentage maximums
-const percentageMaximums = {
-    stacked: {
-        individuals_count: ''' + str(stacked_pct_max['individuals_count']) + ''',
-        total_income_amount: ''' + str(stacked_pct_max['total_income_amount']) + ''',
-        net_tax_amount: ''' + str(stacked_pct_max['net_tax_amount']) + '''
-    },
-    grouped: ''' + json.dumps(grouped_pct_max) + '''
-};
+def render_script():
+    """Render public/script.js. It holds only the chart logic; data is fetched at runtime."""
+    from reference_data import javascript_constants
+    
+    script_content = '''// Per-build configuration: dataset URLs and pre-calculated axis maximums
+const chartConfig = JSON.parse(document.getElementById('chartConfig').textContent);
 
-// Get current dataset based on inflation toggle
-function getCurrentData() {
-    const isInflationAdjusted = document.getElementById('inflationToggle') && 
-                                document.getElementById('inflationToggle').checked;
-    return isInflationAdjusted ? datasets.redistributed : datasets.nominal;
+''' + render_dataset_functions() + '''
+
+// Fetch both datasets as raw bytes; decoding happens wherever the frame source lives
+function fetchDatasets() {
+    const fetchBytes = url => fetch(url).then(response => response.arrayBuffer());
+    return Promise.all([
+        fetchBytes(chartConfig.dataFiles.nominal),
+        fetchBytes(chartConfig.dataFiles.redistributed)
+    ]).then(([nominal, redistributed]) => ({ nominal, redistributed }));
 }
 
-// Parse and prepare data
-let data = getCurrentData();
-const years = [...new Set(datasets.nominal.map(d => d.year))].sort();
-
-// Use the proper order for income ranges
-const incomeRanges = [
-    '$6,000 or less',
-    '$6,001 to $10,000',
-    '$10,001 to $20,000',
-    '$20,001 to $30,000',
-    '$30,001 to $40,000',
-    '$40,001 to $50,000',
-    '$50,001 to $60,000',
-    '$60,001 to $80,000',
-    '$80,001 to $100,000',
-    '$100,001 to $150,000',
-    '$150,001 to $200,000',
-    '$200,001 to $250,000',
-    '$250,001 to $500,000',
-    '$500,001 to $1,000,000',
-    '$1,000,001 or more'
-];
-
-// Mobile-friendly abbreviated labels
-const incomeRangesMobile = [
-    '≤$6K',
-    '$6-10K',
-    '$10-20K',
-    '$20-30K',
-    '$30-40K',
-    '$40-50K',
-    '$50-60K',
-    '$60-80K',
-    '$80-100K',
-    '$100-150K',
-    '$150-200K',
-    '$200-250K',
-    '$250-500K',
-    '$500K-1M',
-    '>$1M'
-];
-
-const incomeRangesDisplay = window.innerWidth <= 768 ? incomeRangesMobile : incomeRanges;
-
-let currentFrame = 0;
-let isPlaying = false;
-let animationInterval = null;
-let currentTheme = window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
-
-// Theme management
-function updateTheme(theme) {
-    currentTheme = theme;
-    document.body.classList.remove('light-theme', 'dark-theme');
-    if (theme !== 'auto') {
-        document.body.classList.add(theme + '-theme');
+// Frame source backed by a chart-worker.js worker. The buffers are transferred, not copied.
+// A frame the worker fails to compute is rejected; if the worker itself fails, so are
+// ready and every outstanding and later request.
+function createWorkerSource(worker, buffersPromise) {
+    const pending = new Map();
+    let nextId = 0;
+    let failure = null;
+    let rejectReady;
+    
+    function fail(error) {
+        failure = failure || error;
+        rejectReady(failure);
+        pending.forEach(({ reject }) => reject(failure));
+        pending.clear();
     }
-    // Update chart with current settings to apply new theme colors
-    const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-    updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+    
+    const ready = new Promise((resolve, reject) => {
+        rejectReady = reject;
+        worker.onmessage = function(event) {
+            const message = event.data;
+            if (message.type === 'ready') {
+                resolve({ years: message.years });
+            } else if (message.type === 'frame' || message.type === 'error') {
+                if (message.id === undefined) {
+                    fail(new Error(message.message));
+                    return;
+                }
+                const request = pending.get(message.id);
+                pending.delete(message.id);
+                if (message.type === 'frame') {
+                    request.resolve(message.frame);
+                } else {
+                    request.reject(new Error(message.message));
+                }
+            }
+        };
+    });
+    worker.onerror = fail;
+    worker.onmessageerror = fail;
+    
+    buffersPromise.then(buffers => {
+        worker.postMessage({ type: 'load', buffers: buffers }, [buffers.nominal, buffers.redistributed]);
+    }, fail);
+    
+    return {
+        ready: ready,
+        frame(request) {
+            if (failure) {
+                return Promise.reject(failure);
+            }
+            const id = nextId++;
+            return new Promise((resolve, reject) => {
+                pending.set(id, { resolve, reject });
+                worker.postMessage({ type: 'frame', id: id, request: request });
+            });
+        }
+    };
 }
 
-// Theme toggle button
-document.getElementById('themeToggle').addEventListener('click', function() {
-            const themes = ['auto', 'light', 'dark'];
-            const themeNames = ['System theme', 'Light theme', 'Dark theme'];
-            const currentIndex = document.body.classList.contains('light-theme') ? 1 : 
-                               document.body.classList.contains('dark-theme') ? 2 : 0;
-            const nextIndex = (currentIndex + 1) % 3;
-            const nextTheme = themes[nextIndex];
-            
-            this.textContent = nextTheme === 'auto' ? '◐' : nextTheme === 'light' ? '☀' : '☾';
-            this.setAttribute('data-tooltip', themeNames[nextIndex]);
-            updateTheme(nextTheme);
-        });
-        
-        // Helper functions for Y-axis formatting
-        function getYAxisTitle(totalBy, valueMode, isCumulative, isInflationAdjusted) {
-            let title = '';
-            if (valueMode === 'percentage') {
-                title = 'Percentage';
-            } else {
-                switch(totalBy) {
-                    case 'individuals_count': title = 'Individuals'; break;
-                    case 'total_income_amount': title = isInflationAdjusted ? 'Total Income (2022-23 $)' : 'Total Income (AUD)'; break;
-                    case 'net_tax_amount': title = isInflationAdjusted ? 'Tax Paid (2022-23 $)' : 'Tax Paid (AUD)'; break;
-                    default: title = 'Value';
-                }
+// Frame source running the same code on the main thread, where workers are unavailable
+function createLocalSource(buffersPromise) {
+    let datasets = null;
+    return {
+        ready: buffersPromise.then(buffers => {
+            datasets = decodeDatasets(buffers);
+            return { years: datasets.nominal.years };
+        }),
+        frame(request) {
+            return Promise.resolve(computeFrame(datasets, request));
+        }
+    };
+}
+
+// Frame source over the full datasets: the worker where possible, else the main thread
+function createFrameSource() {
+    let worker = null;
+    if (typeof Worker !== 'undefined') {
+        try {
+            worker = new Worker('chart-worker.js');
+        } catch (error) {
+            // Fall back to the main thread below
+        }
+    }
+    if (!worker) {
+        return createLocalSource(fetchDatasets());
+    }
+    
+    const workerSource = createWorkerSource(worker, fetchDatasets());
+    // If the worker fails to start its buffers may be gone, so fetch again
+    const active = workerSource.ready.then(() => workerSource, () => createLocalSource(fetchDatasets()));
+    return {
+        ready: active.then(source => source.ready),
+        frame: request => active.then(source => source.frame(request))
+    };
+}
+
+// Short URL codes of the colour and measure options, and the reverse lookups
+const colorByCodes = ''' + json.dumps(COLOR_BY_CODES) + ''';
+const totalByCodes = ''' + json.dumps(TOTAL_BY_CODES) + ''';
+const colorByOptions = Object.fromEntries(Object.entries(colorByCodes).map(([option, code]) => [code, option]));
+const totalByOptions = Object.fromEntries(Object.entries(totalByCodes).map(([option, code]) => [code, option]));
+
+// The view described by the page URL, with defaults for missing parameters
+function readURLState(years) {
+    const params = new URLSearchParams(window.location.search);
+    return {
+        colorBy: colorByOptions[params.get('c')] || 'age_range_display',
+        totalBy: totalByOptions[params.get('m')] || 'net_tax_amount',
+        stack: params.get('st') !== '0',  // default true, 0 = false
+        percentage: params.get('p') !== '0',  // default true, 0 = false
+        cumulative: params.get('cu') !== '0',  // default true, 0 = false
+        log: params.get('l') === '1',  // default false, 1 = true
+        inflation: params.get('i') === '1',  // default false, 1 = true
+        year: params.get('y') || years[0]
+    };
+}
+
+// File name stem of a frame request's snapshot (snapshot_key in create_plotly_chart.py)
+function snapshotKey(request) {
+    const flags = [request.percentage, request.cumulative, request.inflation].map(flag => flag ? '1' : '0').join('');
+    return `${request.yearIndex}-${colorByCodes[request.colorBy]}-${totalByCodes[request.totalBy]}-${flags}`;
+}
+
+// Precomputed frame of a request, written by the build for every state a URL can reach.
+// Snapshots are versioned per dataset and year, so the file name needs no lookup.
+function fetchSnapshot(request) {
+    const versions = chartConfig.snapshotVersions[request.inflation ? 'redistributed' : 'nominal'];
+    return fetch(`snapshots/${snapshotKey(request)}.${versions[request.yearIndex]}.json`).then(response => {
+        if (!response.ok) {
+            throw new Error(`Snapshot request failed with status ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+// Serves one precomputed frame (a promise) as soon as it arrives and anything else from
+// the full datasets, which are only fetched on the first other request or a call to load().
+// If the snapshot cannot be loaded, its request falls back to the datasets too.
+function createSnapshotSource(snapshot) {
+    let fullSource = null;
+    const full = () => {
+        fullSource = fullSource || createFrameSource();
+        return fullSource;
+    };
+    const isSnapshot = request => Object.keys(snapshot.request).every(key => snapshot.request[key] === request[key]);
+    
+    return {
+        ready: Promise.resolve({ years: snapshot.years }),
+        load() {
+            return full().ready;
+        },
+        frame(request) {
+            const fromDatasets = () => full().ready.then(() => full().frame(request));
+            if (isSnapshot(request)) {
+                return snapshot.frame.catch(fromDatasets);
             }
-            return isCumulative ? 'Cumulative ' + title : title;
+            return fromDatasets();
         }
-        
-        function getTickFormat(totalBy, valueMode) {
-            if (valueMode === 'percentage') return '.1f';
-            if (totalBy === 'individuals_count') return ',.0f';
-            return '$.3s'; // Better currency format (e.g., $1.23B)
+    };
+}
+
+// The first frame paints as soon as Plotly is ready, and the datasets load after it. The
+// default view's frame is inlined in index.html; a deep link to any other view fetches
+// that view's snapshot instead.
+const firstFrame = chartConfig.firstFrame;
+const linkedView = readURLState(firstFrame.years);
+const linkedRequest = {
+    yearIndex: Math.max(0, firstFrame.years.indexOf(linkedView.year)),
+    colorBy: linkedView.colorBy,
+    totalBy: linkedView.totalBy,
+    percentage: linkedView.percentage,
+    cumulative: linkedView.cumulative,
+    inflation: linkedView.inflation
+};
+const isDefaultView = snapshotKey(linkedRequest) === snapshotKey(firstFrame.request);
+const frameSource = createSnapshotSource({
+    years: firstFrame.years,
+    request: linkedRequest,
+    frame: isDefaultView ? Promise.resolve(firstFrame.frame) : fetchSnapshot(linkedRequest)
+});
+
+// Wait for Plotly to be loaded
+if (typeof Plotly === 'undefined') {
+    window.addEventListener('load', initChart);
+} else {
+    initChart();
+}
+
+async function initChart() {
+    const meta = await frameSource.ready;
+
+    // Pre-calculated maximums for each combination
+    const maximums = chartConfig.maximums;
+
+    // Pre-calculated percentage maximums
+    const percentageMaximums = chartConfig.percentageMaximums;
+
+    const years = meta.years;
+
+    // Income range labels (full and abbreviated for mobile) and the legend order of the age
+    // ranges, emitted from reference_data.py
+    ''' + textwrap.indent(javascript_constants(), '    ').lstrip() + '''
+
+    const incomeRangesDisplay = window.innerWidth <= 768 ? incomeRangesMobile : incomeRanges;
+
+    let currentFrame = 0;
+    let isPlaying = false;
+    let animationFrame = null;
+
+    // Playback shows one year per PLAY_FRAME_MS. A render taking longer than
+    // RENDER_BUDGET_MS delays the next year by the overrun, so input still gets time.
+    const PLAY_FRAME_MS = 1500;
+    const RENDER_BUDGET_MS = 50;
+    let currentTheme = window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
+
+    // Theme management
+    function updateTheme(theme) {
+        currentTheme = theme;
+        document.body.classList.remove('light-theme', 'dark-theme');
+        if (theme !== 'auto') {
+            document.body.classList.add(theme + '-theme');
         }
+        // Update chart with current settings to apply new theme colors
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+    }
+
+    // Theme toggle button
+    document.getElementById('themeToggle').addEventListener('click', function() {
+        const themes = ['auto', 'light', 'dark'];
+        const themeNames = ['System theme', 'Light theme', 'Dark theme'];
+        const currentIndex = document.body.classList.contains('light-theme') ? 1 : 
+                           document.body.classList.contains('dark-theme') ? 2 : 0;
+        const nextIndex = (currentIndex + 1) % 3;
+        const nextTheme = themes[nextIndex];
         
-        function getHoverTemplate(totalBy, valueMode, category) {
-            if (valueMode === 'percentage') {
-                return '<b>%{x}</b><br>' + category + ': %{y:.2f}%<extra></extra>';
-            }
+        this.textContent = nextTheme === 'auto' ? '◐' : nextTheme === 'light' ? '☀' : '☾';
+        this.setAttribute('data-tooltip', themeNames[nextIndex]);
+        updateTheme(nextTheme);
+    });
+    
+    // Helper functions for Y-axis formatting
+    function getYAxisTitle(totalBy, valueMode, isCumulative, isInflationAdjusted) {
+        let title = '';
+        if (valueMode === 'percentage') {
+            title = 'Percentage';
+        } else {
             switch(totalBy) {
-                case 'individuals_count':
-                    return '<b>%{x}</b><br>' + category + ': %{y:,.0f}<extra></extra>';
-                case 'total_income_amount':
-                    return '<b>%{x}</b><br>' + category + ': $%{y:,.0f}<extra></extra>';
-                case 'net_tax_amount':
-                    return '<b>%{x}</b><br>' + category + ': $%{y:,.0f}<extra></extra>';
-                default:
-                    return '<b>%{x}</b><br>' + category + ': %{y:,.0f}<extra></extra>';
+                case 'individuals_count': title = 'Individuals'; break;
+                case 'total_income_amount': title = isInflationAdjusted ? 'Total Income (2022-23 $)' : 'Total Income (AUD)'; break;
+                case 'net_tax_amount': title = isInflationAdjusted ? 'Tax Paid (2022-23 $)' : 'Tax Paid (AUD)'; break;
+                default: title = 'Value';
             }
         }
+        return isCumulative ? 'Cumulative ' + title : title;
+    }
+    
+    function getTickFormat(totalBy, valueMode) {
+        if (valueMode === 'percentage') return '.1f';
+        if (totalBy === 'individuals_count') return ',.0f';
+        return '$.3s'; // Better currency format (e.g., $1.23B)
+    }
+    
+    function getHoverTemplate(totalBy, valueMode, category) {
+        if (valueMode === 'percentage') {
+            return '<b>%{x}</b><br>' + category + ': %{y:.2f}%<extra></extra>';
+        }
+        switch(totalBy) {
+            case 'individuals_count':
+                return '<b>%{x}</b><br>' + category + ': %{y:,.0f}<extra></extra>';
+            case 'total_income_amount':
+                return '<b>%{x}</b><br>' + category + ': $%{y:,.0f}<extra></extra>';
+            case 'net_tax_amount':
+                return '<b>%{x}</b><br>' + category + ': $%{y:,.0f}<extra></extra>';
+            default:
+                return '<b>%{x}</b><br>' + category + ': %{y:,.0f}<extra></extra>';
+        }
+    }
+    
+    
+    // Only the most recent request is drawn; answers to superseded ones are dropped
+    let latestRequest = 0;
+    
+    // Frame request and display settings for a year, from the current controls
+    function chartRequest(yearIndex, colorBy) {
+        const request = {
+            yearIndex: yearIndex,
+            colorBy: colorBy,
+            totalBy: document.getElementById('totalBy').value,
+            percentage: document.getElementById('percentageToggle').checked,
+            cumulative: document.getElementById('cumulativeToggle').checked,
+            inflation: document.getElementById('inflationToggle').checked
+        };
+        // Display-only settings, which the frame source does not need
+        const view = {
+            stackMode: document.getElementById('stackToggle').checked ? 'stack' : 'group',
+            logScale: document.getElementById('logToggle').checked
+        };
+        return { request: request, view: view };
+    }
+    
+    // Ask the frame source for the traces of a chart state, then draw them
+    function updateChart(yearIndex, colorBy, stackMode) {
+        const { request, view } = chartRequest(yearIndex, colorBy);
+        const requestId = ++latestRequest;
         
+        return frameSource.frame(request).then(frame => {
+            if (requestId === latestRequest) {
+                renderFrame(frame, request, view);
+            }
+        }).catch(error => {
+            console.error('Could not compute the chart:', error);
+        });
+    }
+    
+    // Build the traces and layout of a computed frame and hand them to Plotly
+    function renderFrame(frame, request, view) {
+        const { yearIndex, colorBy, totalBy } = request;
+        const { stackMode, logScale } = view;
+        const year = years[yearIndex];
+        const valueMode = request.percentage ? 'percentage' : 'absolute';
+        const isCumulative = request.cumulative;
+        const isInflationAdjusted = request.inflation;
         
-        function updateChart(yearIndex, colorBy, stackMode) {
-            const year = years[yearIndex];
-            
-            // Update data based on inflation toggle
-            data = getCurrentData();
-            
-            const yearData = data.filter(d => d.year === year);
-            const valueMode = document.getElementById('percentageToggle').checked ? 'percentage' : 'absolute';
-            const logScale = document.getElementById('logToggle').checked;
-            const isCumulative = document.getElementById('cumulativeToggle').checked;
-            const isStacked = document.getElementById('stackToggle').checked;
-            const isInflationAdjusted = document.getElementById('inflationToggle').checked;
-            stackMode = isStacked ? 'stack' : 'group';
-            const totalBy = document.getElementById('totalBy').value;
-            
-            // Calculate total for percentage mode
-            const totalValue = yearData.reduce((sum, d) => sum + d[totalBy], 0);
-            
-            // Group data by income range and color category
-            const grouped = {};
-            yearData.forEach(d => {
-                const key = d.normalized_income_range;
-                if (!grouped[key]) {
-                    grouped[key] = {};
-                }
-                const colorKey = d[colorBy];
-                if (!grouped[key][colorKey]) {
-                    grouped[key][colorKey] = 0;
-                }
-                grouped[key][colorKey] += d[totalBy];
-            });
-            
-            // Get unique color categories
-            let colorCategories;
-            
+        // Create traces for each color category
+        const traces = frame.traces.map(({ name: category, y: yValues }) => {
+            // Get color based on category
+            let color;
             if (colorBy === 'none') {
-                colorCategories = ['All'];
+                color = '#8b5cf6';
+            } else if (colorBy === 'age_range_display') {
+                const index = ageIndex[category];
+                const colors = [
+                    '#440154', '#482878', '#3e4989', '#31688e', '#26828e',
+                    '#1f9e89', '#35b779', '#6ece58', '#b5de2b', '#fde725',
+                    '#fee825', '#ffda25', '#ffc925'
+                ];
+                color = colors[index] || '#666666';
+            } else if (colorBy === 'sex') {
+                color = category === 'Female' ? '#9b59b6' : '#f39c12';
             } else {
-                colorCategories = [...new Set(data.map(d => d[colorBy]))].sort();
-                
-                // Special sorting for age ranges to ensure proper order
-                if (colorBy === 'age_range_display') {
-                    const ageOrder = [
-                        'Under 18', '18 - 24', '25 - 29', '30 - 34', '35 - 39',
-                        '40 - 44', '45 - 49', '50 - 54', '55 - 59', '60 - 64',
-                        '65 - 69', '70 - 74', '75 and over'
-                    ];
-                    colorCategories = colorCategories.sort((a, b) => {
-                        return ageOrder.indexOf(a) - ageOrder.indexOf(b);
-                    });
-                }
+                color = category === 'Taxable' ? '#8b5cf6' : '#e74c3c';
             }
             
-            // Create traces for each color category
-            const traces = colorCategories.map(category => {
-                const yValues = incomeRanges.map(range => {
-                    if (colorBy === 'none') {
-                        // Sum all values for this income range
-                        const value = Object.values(grouped[range] || {}).reduce((sum, val) => sum + val, 0);
-                        return valueMode === 'percentage' ? (value / totalValue) * 100 : value;
-                    } else {
-                        const value = grouped[range] && grouped[range][category] ? grouped[range][category] : 0;
-                        // Percentage is always calculated the same way - as % of total year
-                        return valueMode === 'percentage' ? (value / totalValue) * 100 : value;
-                    }
-                });
+            return {
+                name: category,
+                type: 'bar',
+                x: window.innerWidth <= 768 ? incomeRangesMobile : incomeRanges,
+                y: yValues,
+                hovertemplate: getHoverTemplate(totalBy, valueMode, category),
+                marker: { color: color }
+            };
+        });
+        
+        // Get theme colors - get computed styles to handle all theme cases
+        const computedStyle = getComputedStyle(document.body);
+        const colors = {
+            bg: computedStyle.getPropertyValue('--bg-secondary').trim(),
+            text: computedStyle.getPropertyValue('--text-primary').trim(),
+            textSecondary: computedStyle.getPropertyValue('--text-secondary').trim(),
+            grid: computedStyle.getPropertyValue('--grid').trim(),
+            border: computedStyle.getPropertyValue('--border').trim(),
+            accent: computedStyle.getPropertyValue('--accent').trim()
+        };
+        
+        // Update layout
+        const layout = {
+            title: {
+                text: '',  // Remove title from top-left
+            },
+            barmode: stackMode,
+            xaxis: {
+                title: {
+                    text: 'Income Range (AUD)',
+                    font: { size: 11, color: colors.textSecondary }
+                },
+                tickangle: -45,
+                automargin: true,
+                tickfont: { size: 11, color: colors.textSecondary },
+                gridcolor: colors.grid,
+                zerolinecolor: colors.border
+            },
+            yaxis: (() => {
+                // Get the correct maximum for current settings
+                let maxVal;
+                const datasetKey = isInflationAdjusted ? 'redistributed' : 'nominal';
                 
-                // Apply cumulative calculation if enabled
                 if (isCumulative) {
-                    let cumulativeSum = 0;
-                    for (let i = 0; i < yValues.length; i++) {
-                        cumulativeSum += yValues[i];
-                        yValues[i] = cumulativeSum;
-                    }
-                }
-                
-                // Get color based on category
-                let color;
-                if (colorBy === 'none') {
-                    color = '#8b5cf6';
-                } else if (colorBy === 'age_range_display') {
-                    const ageOrder = [
-                        'Under 18', '18 - 24', '25 - 29', '30 - 34', '35 - 39',
-                        '40 - 44', '45 - 49', '50 - 54', '55 - 59', '60 - 64',
-                        '65 - 69', '70 - 74', '75 and over'
-                    ];
-                    const index = ageOrder.indexOf(category);
-                    const colors = [
-                        '#440154', '#482878', '#3e4989', '#31688e', '#26828e',
-                        '#1f9e89', '#35b779', '#6ece58', '#b5de2b', '#fde725',
-                        '#fee825', '#ffda25', '#ffc925'
-                    ];
-                    color = colors[index] || '#666666';
-                } else if (colorBy === 'sex') {
-                    color = category === 'Female' ? '#9b59b6' : '#f39c12';
+                    // For cumulative, use the pre-calculated cumulative maximums
+                    maxVal = maximums.cumulative[totalBy];
+                } else if (stackMode === 'stack') {
+                    maxVal = maximums[datasetKey].stacked[totalBy];
                 } else {
-                    color = category === 'Taxable' ? '#8b5cf6' : '#e74c3c';
+                    maxVal = maximums[datasetKey].grouped[colorBy][totalBy];
                 }
                 
-                return {
-                    name: category,
-                    type: 'bar',
-                    x: window.innerWidth <= 768 ? incomeRangesMobile : incomeRanges,
-                    y: yValues,
-                    hovertemplate: getHoverTemplate(totalBy, valueMode, category),
-                    marker: { color: color }
-                };
-            });
-            
-            // Get theme colors - get computed styles to handle all theme cases
-            const computedStyle = getComputedStyle(document.body);
-            const colors = {
-                bg: computedStyle.getPropertyValue('--bg-secondary').trim(),
-                text: computedStyle.getPropertyValue('--text-primary').trim(),
-                textSecondary: computedStyle.getPropertyValue('--text-secondary').trim(),
-                grid: computedStyle.getPropertyValue('--grid').trim(),
-                border: computedStyle.getPropertyValue('--border').trim(),
-                accent: computedStyle.getPropertyValue('--accent').trim()
-            };
-            
-            // Update layout
-            const layout = {
-                title: {
-                    text: '',  // Remove title from top-left
-                },
-                barmode: stackMode,
-                xaxis: {
+                // For linear scale only, set a fixed range based on the maximum
+                // For log scale, let Plotly auto-scale
+                let yAxisConfig = {
                     title: {
-                        text: 'Income Range (AUD)',
+                        text: getYAxisTitle(totalBy, valueMode, isCumulative, isInflationAdjusted) + (logScale ? ' (log)' : ''),
                         font: { size: 11, color: colors.textSecondary }
                     },
-                    tickangle: -45,
-                    automargin: true,
+                    type: logScale ? 'log' : 'linear',
                     tickfont: { size: 11, color: colors.textSecondary },
                     gridcolor: colors.grid,
                     zerolinecolor: colors.border
-                },
-                yaxis: (() => {
-                    // Get the correct maximum for current settings
-                    let maxVal;
-                    const datasetKey = isInflationAdjusted ? 'redistributed' : 'nominal';
-                    
-                    if (isCumulative) {
-                        // For cumulative, use the pre-calculated cumulative maximums
-                        maxVal = maximums.cumulative[totalBy];
-                    } else if (stackMode === 'stack') {
-                        maxVal = maximums[datasetKey].stacked[totalBy];
-                    } else {
-                        maxVal = maximums[datasetKey].grouped[colorBy][totalBy];
-                    }
-                    
-                    // For linear scale only, set a fixed range based on the maximum
-                    // For log scale, let Plotly auto-scale
-                    let yAxisConfig = {
-                        title: {
-                            text: getYAxisTitle(totalBy, valueMode, isCumulative, isInflationAdjusted) + (logScale ? ' (log)' : ''),
-                            font: { size: 11, color: colors.textSecondary }
-                        },
-                        type: logScale ? 'log' : 'linear',
-                        tickfont: { size: 11, color: colors.textSecondary },
-                        gridcolor: colors.grid,
-                        zerolinecolor: colors.border
-                    };
-                    
-                    // Add prefix/suffix for money and percentage
+                };
+                
+                // Add prefix/suffix for money and percentage
+                if (valueMode === 'percentage') {
+                    yAxisConfig.ticksuffix = '%';
+                } else if (totalBy !== 'individuals_count') {
+                    yAxisConfig.tickprefix = '$';
+                }
+                
+                // Set range for both linear and log scale to keep consistent
+                if (logScale) {
+                    // For log scale, set min/max range but let Plotly handle tickers
                     if (valueMode === 'percentage') {
-                        yAxisConfig.ticksuffix = '%';
-                    } else if (totalBy !== 'individuals_count') {
-                        yAxisConfig.tickprefix = '$';
-                    }
-                    
-                    // Set range for both linear and log scale to keep consistent
-                    if (logScale) {
-                        // For log scale, set min/max range but let Plotly handle tickers
-                        if (valueMode === 'percentage') {
-                            // Use pre-calculated percentage maximums
-                            let pctMax;
-                            if (isCumulative) {
-                                // For cumulative percentages, max should be exactly 100%
-                                pctMax = 100;
-                                yAxisConfig.range = [Math.log10(0.01), Math.log10(100)]; // Cap at 100%
-                            } else {
-                                pctMax = stackMode === 'stack' ? 
-                                    percentageMaximums.stacked[totalBy] : 
-                                    percentageMaximums.grouped[colorBy][totalBy];
-                                yAxisConfig.range = [Math.log10(0.01), Math.log10(pctMax * 1.2)]; // log range with padding
-                            }
+                        // Use pre-calculated percentage maximums
+                        let pctMax;
+                        if (isCumulative) {
+                            // For cumulative percentages, max should be exactly 100%
+                            pctMax = 100;
+                            yAxisConfig.range = [Math.log10(0.01), Math.log10(100)]; // Cap at 100%
                         } else {
-                            const minVal = Math.max(1, maxVal * 0.001); // Avoid log(0)
-                            yAxisConfig.range = [Math.log10(minVal), Math.log10(maxVal * 1.1)];
+                            pctMax = stackMode === 'stack' ? 
+                                percentageMaximums.stacked[totalBy] : 
+                                percentageMaximums.grouped[colorBy][totalBy];
+                            yAxisConfig.range = [Math.log10(0.01), Math.log10(pctMax * 1.2)]; // log range with padding
                         }
                     } else {
-                        // Linear scale
-                        if (valueMode === 'percentage') {
-                            // Use pre-calculated percentage maximums
-                            let pctMax;
-                            if (isCumulative) {
-                                // For cumulative percentages, max should be exactly 100%
-                                pctMax = 100;
-                                yAxisConfig.range = [0, 100]; // Cap at 100%
-                            } else {
-                                pctMax = stackMode === 'stack' ? 
-                                    percentageMaximums.stacked[totalBy] : 
-                                    percentageMaximums.grouped[colorBy][totalBy];
-                                yAxisConfig.range = [0, pctMax * 1.2]; // 20% padding
-                            }
+                        const minVal = Math.max(1, maxVal * 0.001); // Avoid log(0)
+                        yAxisConfig.range = [Math.log10(minVal), Math.log10(maxVal * 1.1)];
+                    }
+                } else {
+                    // Linear scale
+                    if (valueMode === 'percentage') {
+                        // Use pre-calculated percentage maximums
+                        let pctMax;
+                        if (isCumulative) {
+                            // For cumulative percentages, max should be exactly 100%
+                            pctMax = 100;
+                            yAxisConfig.range = [0, 100]; // Cap at 100%
                         } else {
-                            yAxisConfig.range = [0, maxVal * 1.1];
+                            pctMax = stackMode === 'stack' ? 
+                                percentageMaximums.stacked[totalBy] : 
+                                percentageMaximums.grouped[colorBy][totalBy];
+                            yAxisConfig.range = [0, pctMax * 1.2]; // 20% padding
                         }
+                    } else {
+                        yAxisConfig.range = [0, maxVal * 1.1];
                     }
-                    
-                    return yAxisConfig;
-                })(),
-                margin: window.innerWidth <= 768 ? 
-                    { t: 20, r: 10, b: 80, l: 60 } : 
-                    { t: 40, r: 150, b: 120, l: 70 },
-                showlegend: window.innerWidth > 768,
-                legend: {
-                    orientation: 'v',
-                    yanchor: 'top',
-                    y: 0.75,
-                    xanchor: 'left',
-                    x: 1.01,
-                    font: { size: 11, color: colors.textSecondary },
-                    bgcolor: colors.bg,
-                    bordercolor: colors.border,
-                    borderwidth: 1,
-                    traceorder: 'normal'
-                },
-                hovermode: 'closest',
-                plot_bgcolor: colors.bg,
-                paper_bgcolor: colors.bg,
-                font: {
-                    family: '"SF Mono", Monaco, "Cascadia Code", "Roboto Mono", Consolas, monospace',
-                    color: colors.textSecondary
-                },
-                annotations: window.innerWidth > 768 ? [{
-                    text: year,
-                    xref: 'paper',
-                    yref: 'paper',
-                    x: 1.01,
-                    xanchor: 'left',
-                    y: 0.85,
-                    yanchor: 'bottom',
-                    showarrow: false,
-                    font: {
-                        size: 16,
-                        color: colors.text,
-                        family: '"SF Mono", Monaco, "Cascadia Code", "Roboto Mono", Consolas, monospace'
-                    }
-                }] : []
-            };
-            
-            // Update tax reform note
-            const taxReformNote = document.getElementById('taxReformNote');
-            const taxReformText = document.getElementById('taxReformText');
-            
-            if (year === '2012–13') {
-                taxReformNote.classList.remove('empty');
-                taxReformText.textContent = 'Tax-free increased from $6,000 to $18,200';
-            } else if (year === '2014–15' || year === '2015–16') {
-                taxReformNote.classList.remove('empty');
-                taxReformText.textContent = 'Repair Levy: 45% + 2% = 47% rate >$180k';
-            } else if (year === '2016–17') {
-                taxReformNote.classList.remove('empty');
-                taxReformText.textContent = '32.5% to $87k; Repair Levy: 47% on >$180k';
-            } else if (year === '2020–21') {
-                taxReformNote.classList.remove('empty');
-                taxReformText.textContent = 'Tax cuts: 32.5% to $120k, 37% to $180k';
-            } else if (year === '2024–25' || year === '2025–26') {
-                taxReformNote.classList.remove('empty');
-                taxReformText.textContent = 'Stage 3 tax cuts';
-            } else {
-                taxReformNote.classList.add('empty');
-                taxReformText.textContent = '-';
-            }
-            
-            // Always add slider with current position
-            layout.sliders = [{
-                active: yearIndex,
-                currentvalue: {
-                    visible: false
-                },
-                steps: years.map((yr, i) => ({
-                    method: 'skip',
-                    label: yr,
-                    args: [i]
-                })),
-                pad: { t: window.innerWidth <= 768 ? 10 : 40, b: 10 },
-                len: 0.9,
-                x: 0.05,
-                xanchor: 'left',
-                y: window.innerWidth <= 768 ? -0.15 : -0.22,
+                }
+                
+                return yAxisConfig;
+            })(),
+            margin: window.innerWidth <= 768 ? 
+                { t: 20, r: 10, b: 80, l: 60 } : 
+                { t: 40, r: 150, b: 120, l: 70 },
+            showlegend: window.innerWidth > 768,
+            legend: {
+                orientation: 'v',
                 yanchor: 'top',
+                y: 0.75,
+                xanchor: 'left',
+                x: 1.01,
+                font: { size: 11, color: colors.textSecondary },
                 bgcolor: colors.bg,
                 bordercolor: colors.border,
                 borderwidth: 1,
-                font: { size: 11, color: colors.textSecondary },
-                activebgcolor: colors.accent,
-                tickcolor: colors.border
-            }];
-            
-            // Create/update plot
-            Plotly.react('chart', traces, layout, {
-                responsive: true,
-                displayModeBar: false
-            });
-            
-            // Update stats and tax brackets
-            updateStats(yearData, yearIndex);
-            updateTaxBrackets(year);
-        }
+                traceorder: 'normal'
+            },
+            hovermode: 'closest',
+            plot_bgcolor: colors.bg,
+            paper_bgcolor: colors.bg,
+            font: {
+                family: '"SF Mono", Monaco, "Cascadia Code", "Roboto Mono", Consolas, monospace',
+                color: colors.textSecondary
+            },
+            annotations: window.innerWidth > 768 ? [{
+                text: year,
+                xref: 'paper',
+                yref: 'paper',
+                x: 1.01,
+                xanchor: 'left',
+                y: 0.85,
+                yanchor: 'bottom',
+                showarrow: false,
+                font: {
+                    size: 16,
+                    color: colors.text,
+                    family: '"SF Mono", Monaco, "Cascadia Code", "Roboto Mono", Consolas, monospace'
+                }
+            }] : []
+        };
         
-        let previousYearStats = null;
+        // Update tax reform note
+        const taxReformNote = document.getElementById('taxReformNote');
+        const taxReformText = document.getElementById('taxReformText');
         
-        function updateStats(yearData, yearIndex) {
-            const totalIndividuals = yearData.reduce((sum, d) => sum + d.individuals_count, 0);
-            const totalIncome = yearData.reduce((sum, d) => sum + d.total_income_amount, 0);
-            const totalTax = yearData.reduce((sum, d) => sum + d.net_tax_amount, 0);
-            const effectiveRate = totalIncome > 0 ? (totalTax / totalIncome) * 100 : 0;
-            
-            // Update current values
-            document.getElementById('totalIndividuals').textContent = 
-                totalIndividuals.toLocaleString();
-            document.getElementById('totalIncome').textContent = 
-                '$' + (totalIncome / 1e9).toFixed(1) + 'B';
-            document.getElementById('totalTax').textContent = 
-                '$' + (totalTax / 1e9).toFixed(1) + 'B';
-            document.getElementById('effectiveRate').textContent = 
-                effectiveRate.toFixed(1) + '%';
-            
-            // Calculate and show percentage changes if we have previous year data
-            if (yearIndex > 0) {
-                const prevYear = years[yearIndex - 1];
-                const prevYearData = data.filter(d => d.year === prevYear);
-                
-                const prevTotalIndividuals = prevYearData.reduce((sum, d) => sum + d.individuals_count, 0);
-                const prevTotalIncome = prevYearData.reduce((sum, d) => sum + d.total_income_amount, 0);
-                const prevTotalTax = prevYearData.reduce((sum, d) => sum + d.net_tax_amount, 0);
-                const prevEffectiveRate = prevTotalIncome > 0 ? (prevTotalTax / prevTotalIncome) * 100 : 0;
-                
-                // Calculate percentage changes
-                const indivChange = ((totalIndividuals - prevTotalIndividuals) / prevTotalIndividuals) * 100;
-                const incomeChange = ((totalIncome - prevTotalIncome) / prevTotalIncome) * 100;
-                const taxChange = ((totalTax - prevTotalTax) / prevTotalTax) * 100;
-                const rateChange = effectiveRate - prevEffectiveRate;
-                
-                // Update percentage displays
-                updatePercentageDisplay('totalIndividualsChange', indivChange);
-                updatePercentageDisplay('totalIncomeChange', incomeChange);
-                updatePercentageDisplay('totalTaxChange', taxChange);
-                updatePercentageDisplay('effectiveRateChange', rateChange, true);
-            } else {
-                // Show greyed out placeholders for first year
-                document.getElementById('totalIndividualsChange').textContent = '(-%)'
-                document.getElementById('totalIndividualsChange').className = 'stat-change';
-                document.getElementById('totalIncomeChange').textContent = '(-%)'
-                document.getElementById('totalIncomeChange').className = 'stat-change';
-                document.getElementById('totalTaxChange').textContent = '(-%)'
-                document.getElementById('totalTaxChange').className = 'stat-change';
-                document.getElementById('effectiveRateChange').textContent = '(-pp)'
-                document.getElementById('effectiveRateChange').className = 'stat-change';
-            }
-        }
-        
-        function updatePercentageDisplay(elementId, change, isPoints = false) {
-            const element = document.getElementById(elementId);
-            if (Math.abs(change) < 0.01) {
-                element.textContent = '(0.0%)';
-                element.className = 'stat-change';
-            } else {
-                const sign = change > 0 ? '+' : '';
-                const unit = isPoints ? 'pp' : '%';
-                element.textContent = `(${sign}${change.toFixed(1)}${unit})`;
-                element.className = change > 0 ? 'stat-change positive' : 'stat-change negative';
-            }
+        if (year === '2012–13') {
+            taxReformNote.classList.remove('empty');
+            taxReformText.textContent = 'Tax-free increased from $6,000 to $18,200';
+        } else if (year === '2014–15' || year === '2015–16') {
+            taxReformNote.classList.remove('empty');
+            taxReformText.textContent = 'Repair Levy: 45% + 2% = 47% rate >$180k';
+        } else if (year === '2016–17') {
+            taxReformNote.classList.remove('empty');
+            taxReformText.textContent = '32.5% to $87k; Repair Levy: 47% on >$180k';
+        } else if (year === '2020–21') {
+            taxReformNote.classList.remove('empty');
+            taxReformText.textContent = 'Tax cuts: 32.5% to $120k, 37% to $180k';
+        } else if (year === '2024–25' || year === '2025–26') {
+            taxReformNote.classList.remove('empty');
+            taxReformText.textContent = 'Stage 3 tax cuts';
+        } else {
+            taxReformNote.classList.add('empty');
+            taxReformText.textContent = '-';
         }
         
-        // Event listeners
-        document.getElementById('colorBy').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, this.value, stackMode);
-            updateURLParams();
-        });
+        // Always add slider with current position
+        layout.sliders = [{
+            active: yearIndex,
+            currentvalue: {
+                visible: false
+            },
+            steps: years.map((yr, i) => ({
+                method: 'skip',
+                label: yr,
+                args: [i]
+            })),
+            pad: { t: window.innerWidth <= 768 ? 10 : 40, b: 10 },
+            len: 0.9,
+            x: 0.05,
+            xanchor: 'left',
+            y: window.innerWidth <= 768 ? -0.15 : -0.22,
+            yanchor: 'top',
+            bgcolor: colors.bg,
+            bordercolor: colors.border,
+            borderwidth: 1,
+            font: { size: 11, color: colors.textSecondary },
+            activebgcolor: colors.accent,
+            tickcolor: colors.border
+        }];
         
-        document.getElementById('totalBy').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
-        });
-        
-        document.getElementById('stackToggle').addEventListener('change', function() {
-            const stackMode = this.checked ? 'stack' : 'group';
-            const stackIcon = document.getElementById('stackIcon');
-            stackIcon.textContent = this.checked ? '≡' : '⦀';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
+        // Create/update plot
+        Plotly.react('chart', traces, layout, {
+            responsive: true,
+            displayModeBar: false
         });
         
-        document.getElementById('percentageToggle').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
-        });
+        // Update stats and tax brackets
+        updateStats(frame);
+        updateTaxBrackets(year);
+    }
+    
+    function updateStats(frame) {
+        const totalIndividuals = frame.stats.individuals;
+        const totalIncome = frame.stats.income;
+        const totalTax = frame.stats.tax;
+        const effectiveRate = totalIncome > 0 ? (totalTax / totalIncome) * 100 : 0;
         
-        document.getElementById('logToggle').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
-        });
+        // Update current values
+        document.getElementById('totalIndividuals').textContent = 
+            totalIndividuals.toLocaleString();
+        document.getElementById('totalIncome').textContent = 
+            '$' + (totalIncome / 1e9).toFixed(1) + 'B';
+        document.getElementById('totalTax').textContent = 
+            '$' + (totalTax / 1e9).toFixed(1) + 'B';
+        document.getElementById('effectiveRate').textContent = 
+            effectiveRate.toFixed(1) + '%';
         
-        document.getElementById('cumulativeToggle').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
-        });
+        // Calculate and show percentage changes if we have previous year data
+        if (frame.previousStats) {
+            const prevTotalIndividuals = frame.previousStats.individuals;
+            const prevTotalIncome = frame.previousStats.income;
+            const prevTotalTax = frame.previousStats.tax;
+            const prevEffectiveRate = prevTotalIncome > 0 ? (prevTotalTax / prevTotalIncome) * 100 : 0;
+            
+            // Calculate percentage changes
+            const indivChange = ((totalIndividuals - prevTotalIndividuals) / prevTotalIndividuals) * 100;
+            const incomeChange = ((totalIncome - prevTotalIncome) / prevTotalIncome) * 100;
+            const taxChange = ((totalTax - prevTotalTax) / prevTotalTax) * 100;
+            const rateChange = effectiveRate - prevEffectiveRate;
+            
+            // Update percentage displays
+            updatePercentageDisplay('totalIndividualsChange', indivChange);
+            updatePercentageDisplay('totalIncomeChange', incomeChange);
+            updatePercentageDisplay('totalTaxChange', taxChange);
+            updatePercentageDisplay('effectiveRateChange', rateChange, true);
+        } else {
+            // Show greyed out placeholders for first year
+            document.getElementById('totalIndividualsChange').textContent = '(-%)'
+            document.getElementById('totalIndividualsChange').className = 'stat-change';
+            document.getElementById('totalIncomeChange').textContent = '(-%)'
+            document.getElementById('totalIncomeChange').className = 'stat-change';
+            document.getElementById('totalTaxChange').textContent = '(-%)'
+            document.getElementById('totalTaxChange').className = 'stat-change';
+            document.getElementById('effectiveRateChange').textContent = '(-pp)'
+            document.getElementById('effectiveRateChange').className = 'stat-change';
+        }
+    }
+    
+    function updatePercentageDisplay(elementId, change, isPoints = false) {
+        const element = document.getElementById(elementId);
+        if (Math.abs(change) < 0.01) {
+            element.textContent = '(0.0%)';
+            element.className = 'stat-change';
+        } else {
+            const sign = change > 0 ? '+' : '';
+            const unit = isPoints ? 'pp' : '%';
+            element.textContent = `(${sign}${change.toFixed(1)}${unit})`;
+            element.className = change > 0 ? 'stat-change positive' : 'stat-change negative';
+        }
+    }
+    
+    // Event listeners
+    document.getElementById('colorBy').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, this.value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('totalBy').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('stackToggle').addEventListener('change', function() {
+        const stackMode = this.checked ? 'stack' : 'group';
+        const stackIcon = document.getElementById('stackIcon');
+        stackIcon.textContent = this.checked ? '≡' : '⦀';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('percentageToggle').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('logToggle').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('cumulativeToggle').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    document.getElementById('inflationToggle').addEventListener('change', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+        updateURLParams();
+    });
+    
+    // Request a year's frame ahead of time; the promise fills in frame once it arrives, or
+    // error if the request fails
+    function prefetchFrame(yearIndex) {
+        const pending = chartRequest(yearIndex, document.getElementById('colorBy').value);
+        pending.yearIndex = yearIndex;
+        pending.key = JSON.stringify([pending.request, pending.view]);
+        pending.frame = null;
+        pending.error = null;
+        frameSource.frame(pending.request).then(frame => { pending.frame = frame; }, error => { pending.error = error; });
+        return pending;
+    }
+    
+    // Playback driven by requestAnimationFrame. The next year is computed while the
+    // current one is on screen; controls changed mid-playback trigger a fresh request.
+    function startPlayback() {
+        isPlaying = true;
+        const button = document.getElementById('playButton');
+        button.textContent = '⏸ Pause';
+        button.classList.add('playing');
         
-        document.getElementById('inflationToggle').addEventListener('change', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-            updateURLParams();
-        });
+        let next = prefetchFrame((currentFrame + 1) % years.length);
+        let dueAt = performance.now() + PLAY_FRAME_MS;
         
-        document.getElementById('playButton').addEventListener('click', function() {
-            if (isPlaying) {
-                clearInterval(animationInterval);
-                isPlaying = false;
-                this.textContent = '▶ Play Animation';
-                this.classList.remove('playing');
-            } else {
-                isPlaying = true;
-                this.textContent = '⏸ Pause';
-                this.classList.add('playing');
-                
-                // Get current settings before starting animation
-                const currentColorBy = document.getElementById('colorBy').value;
-                const currentStackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        function tick(now) {
+            if (!isPlaying) return;
+            
+            if (now >= dueAt) {
+                // The year or controls may have changed since the prefetch
+                const target = (currentFrame + 1) % years.length;
+                const current = chartRequest(target, document.getElementById('colorBy').value);
+                if (target !== next.yearIndex || JSON.stringify([current.request, current.view]) !== next.key) {
+                    next = prefetchFrame(target);
+                }
                 
-                animationInterval = setInterval(() => {
-                    currentFrame = (currentFrame + 1) % years.length;
-                    updateChart(currentFrame, currentColorBy, currentStackMode);
+                if (next.error) {
+                    // The frame cannot be computed; stop rather than wait for it forever
+                    console.error('Playback stopped:', next.error);
+                    stopPlayback();
+                    return;
+                }
+                if (next.frame) {
+                    const renderStart = performance.now();
+                    // Supersede any request still in flight for the previous state
+                    latestRequest++;
+                    currentFrame = next.yearIndex;
+                    renderFrame(next.frame, next.request, next.view);
                     updateNavButtons();
-                    updateURLParams();
                     
                     if (currentFrame === years.length - 1) {
-                        clearInterval(animationInterval);
-                        isPlaying = false;
-                        document.getElementById('playButton').textContent = '▶ Play Animation';
-                        document.getElementById('playButton').classList.remove('playing');
-                    }
-                }, 1500);
-            }
-        });
-        
-        // Tax bracket data for each year
-        const taxBrackets = {
-            '2010–11': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 6000, rate: 15, color: '#c4b5fd' },
-                { threshold: 37000, rate: 30, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2011–12': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 6000, rate: 15, color: '#c4b5fd' },
-                { threshold: 37000, rate: 30, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2012–13': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2013–14': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2014–15': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 47, color: '#6b21a8' }  // Includes 2% budget repair levy
-            ],
-            '2015–16': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 80000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 47, color: '#6b21a8' }  // Includes 2% budget repair levy
-            ],
-            '2016–17': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 87000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 47, color: '#6b21a8' }  // Includes 2% budget repair levy
-            ],
-            '2017–18': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 87000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2018–19': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 90000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2019–20': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 37000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 90000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2020–21': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 45000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 120000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2021–22': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 45000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 120000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2022–23': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 45000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 120000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2023–24': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 19, color: '#c4b5fd' },
-                { threshold: 45000, rate: 32.5, color: '#a78bfa' },
-                { threshold: 120000, rate: 37, color: '#8b5cf6' },
-                { threshold: 180000, rate: 45, color: '#7c3aed' }
-            ],
-            '2024–25': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 16, color: '#c4b5fd' },
-                { threshold: 45000, rate: 30, color: '#a78bfa' },
-                { threshold: 135000, rate: 37, color: '#8b5cf6' },
-                { threshold: 190000, rate: 45, color: '#7c3aed' }
-            ],
-            '2025–26': [
-                { threshold: 0, rate: 0, color: '#f4f0fe' },
-                { threshold: 18200, rate: 16, color: '#c4b5fd' },
-                { threshold: 45000, rate: 30, color: '#a78bfa' },
-                { threshold: 135000, rate: 37, color: '#8b5cf6' },
-                { threshold: 190000, rate: 45, color: '#7c3aed' }
-            ]
-        };
-        
-        // Function to update tax brackets visualisation
-        function updateTaxBrackets(year) {
-            const brackets = taxBrackets[year];
-            if (!brackets) return;
-            
-            const viz = document.getElementById('taxBracketsViz');
-            viz.innerHTML = '';
-            
-            // Create bar container
-            const barContainer = document.createElement('div');
-            barContainer.className = 'tax-bracket-bar';
-            
-            // Create labels container
-            const labelsContainer = document.createElement('div');
-            labelsContainer.className = 'tax-bracket-labels';
-            
-            const maxIncome = 200000; // Cap visualisation at $200k
-            
-            brackets.forEach((bracket, i) => {
-                const nextBracket = brackets[i + 1];
-                const start = bracket.threshold;
-                const end = nextBracket ? Math.min(nextBracket.threshold, maxIncome) : maxIncome;
-                const width = ((end - start) / maxIncome) * 100;
-                
-                if (width > 0) {
-                    // Create bracket segment
-                    const div = document.createElement('div');
-                    div.className = 'tax-bracket';
-                    div.style.width = width + '%';
-                    div.style.backgroundColor = bracket.color;
-                    div.textContent = bracket.rate + '%';
-                    barContainer.appendChild(div);
-                    
-                    // Create threshold label - only for major thresholds to avoid overlap
-                    if (i === 0 || bracket.threshold === 18200 || bracket.threshold === 37000 || 
-                        bracket.threshold === 45000 || bracket.threshold === 80000 || 
-                        bracket.threshold === 87000 || bracket.threshold === 90000 || 
-                        bracket.threshold === 120000 || bracket.threshold === 135000 ||
-                        bracket.threshold === 180000 || bracket.threshold === 190000) {
-                        const label = document.createElement('div');
-                        label.className = 'tax-bracket-label';
-                        const position = (start / maxIncome) * 100;
-                        // Adjust position for labels near the end to prevent overlap
-                        if (position > 85) {
-                            label.style.right = (100 - position) + '%';
-                            label.style.transform = 'none';
-                        } else {
-                            label.style.left = position + '%';
-                        }
-                        label.textContent = bracket.threshold === 0 ? '$0' : '$' + (bracket.threshold / 1000) + 'k';
-                        labelsContainer.appendChild(label);
+                        stopPlayback();
+                        return;
                     }
+                    const overrun = Math.max(0, performance.now() - renderStart - RENDER_BUDGET_MS);
+                    dueAt = now + PLAY_FRAME_MS + overrun;
+                    next = prefetchFrame(currentFrame + 1);
                 }
-            });
-            
-            // Add final threshold if needed
-            const lastBracket = brackets[brackets.length - 1];
-            if (lastBracket && lastBracket.threshold < maxIncome) {
-                const label = document.createElement('div');
-                label.className = 'tax-bracket-label';
-                label.style.left = '100%';
-                label.textContent = '$200k+';
-                labelsContainer.appendChild(label);
             }
-            
-            viz.appendChild(barContainer);
-            viz.appendChild(labelsContainer);
+            animationFrame = requestAnimationFrame(tick);
         }
-        
-        // Define color schemes
-        const colorSchemes = {
-            age_range_display: [
-                '#440154', '#482878', '#3e4989', '#31688e', '#26828e',
-                '#1f9e89', '#35b779', '#6ece58', '#b5de2b', '#fde725',
-                '#fee825', '#ffda25', '#ffc925'
-            ],
-            sex: ['#9b59b6', '#f39c12'],
-            taxable_status: ['#8b5cf6', '#e74c3c']
-        };
-        
-        // Override Plotly's default color assignment
-        Plotly.addTraces = (function(originalAddTraces) {
-            return function(graphDiv, traces) {
-                const colorBy = document.getElementById('colorBy').value;
-                const colors = colorSchemes[colorBy];
-                if (colors) {
-                    traces.forEach((trace, i) => {
-                        trace.marker = trace.marker || {};
-                        trace.marker.color = colors[i % colors.length];
-                    });
-                }
-                return originalAddTraces.apply(this, arguments);
-            };
-        })(Plotly.addTraces);
-        
-        // URL parameter handling
-        function getURLParams() {
-            const params = new URLSearchParams(window.location.search);
-            
-            // Map short parameter names to full values
-            const colorByMap = {
-                'n': 'none',
-                'a': 'age_range_display', 
-                's': 'sex',
-                't': 'taxable_status'
-            };
-            
-            const totalByMap = {
-                'ind': 'individuals_count',
-                'inc': 'total_income_amount',
-                'tax': 'net_tax_amount'
-            };
-            
-            return {
-                colorBy: colorByMap[params.get('c')] || 'age_range_display',
-                totalBy: totalByMap[params.get('m')] || 'net_tax_amount',
-                stack: params.get('st') !== '0',  // default true, 0 = false
-                percentage: params.get('p') !== '0',  // default true, 0 = false
-                cumulative: params.get('cu') !== '0',  // default true, 0 = false
-                log: params.get('l') === '1',  // default false, 1 = true
-                inflation: params.get('i') === '1',  // default false, 1 = true
-                year: params.get('y') || years[0]
-            };
+        animationFrame = requestAnimationFrame(tick);
+    }
+    
+    function stopPlayback() {
+        isPlaying = false;
+        cancelAnimationFrame(animationFrame);
+        const button = document.getElementById('playButton');
+        button.textContent = '▶ Play Animation';
+        button.classList.remove('playing');
+        // URL writes are held back during playback; record where it stopped
+        updateURLParams();
+    }
+    
+    document.getElementById('playButton').addEventListener('click', function() {
+        if (isPlaying) {
+            stopPlayback();
+        } else {
+            startPlayback();
         }
-        
-        function updateURLParams() {
-            const params = new URLSearchParams();
-            
-            // Map full values to short parameter names
-            const colorByReverseMap = {
-                'none': 'n',
-                'age_range_display': 'a',
-                'sex': 's',
-                'taxable_status': 't'
-            };
-            
-            const totalByReverseMap = {
-                'individuals_count': 'ind',
-                'total_income_amount': 'inc',
-                'net_tax_amount': 'tax'
-            };
-            
-            const colorBy = document.getElementById('colorBy').value;
-            const totalBy = document.getElementById('totalBy').value;
-            
-            // Only add parameters that differ from defaults
-            if (colorBy !== 'age_range_display') {
-                params.set('c', colorByReverseMap[colorBy]);
-            }
-            if (totalBy !== 'net_tax_amount') {
-                params.set('m', totalByReverseMap[totalBy]);
-            }
-            if (!document.getElementById('stackToggle').checked) {
-                params.set('st', '0');
-            }
-            if (!document.getElementById('percentageToggle').checked) {
-                params.set('p', '0');
-            }
-            if (!document.getElementById('cumulativeToggle').checked) {
-                params.set('cu', '0');
-            }
-            if (document.getElementById('logToggle').checked) {
-                params.set('l', '1');
-            }
-            if (document.getElementById('inflationToggle').checked) {
-                params.set('i', '1');
-            }
-            if (years[currentFrame] !== years[0]) {
-                params.set('y', years[currentFrame]);
-            }
-            
-            const newURL = window.location.pathname + (params.toString() ? '?' + params.toString() : '');
-            window.history.replaceState({}, '', newURL);
+    });
+    
+    // Tax bracket bar layout for each year, generated from tax_rates/*.json
+    const taxBracketWidget = ''' + json.dumps(tax_bracket_widget(), ensure_ascii=False) + ''';
+    
+    // The widget's elements are created once and updated in place on year changes,
+    // which also lets the CSS transition animate the segment widths
+    const taxBracketViz = document.getElementById('taxBracketsViz');
+    const taxBracketBar = document.createElement('div');
+    taxBracketBar.className = 'tax-bracket-bar';
+    const taxBracketLabels = document.createElement('div');
+    taxBracketLabels.className = 'tax-bracket-labels';
+    taxBracketViz.appendChild(taxBracketBar);
+    taxBracketViz.appendChild(taxBracketLabels);
+    
+    // Pools of segment and label elements, grown as needed and reused across years
+    const taxBracketSegmentPool = [];
+    const taxBracketLabelPool = [];
+    let shownTaxBracketYear = null;
+    
+    // Attach the first count elements of a pool to container, creating any missing ones
+    function useElements(pool, container, className, count) {
+        while (pool.length < count) {
+            const element = document.createElement('div');
+            element.className = className;
+            pool.push(element);
         }
+        if (container.children.length !== count) {
+            container.replaceChildren(...pool.slice(0, count));
+        }
+        return pool;
+    }
+    
+    // Function to update tax brackets visualisation
+    function updateTaxBrackets(year) {
+        const layout = taxBracketWidget[year];
+        if (!layout || year === shownTaxBracketYear) return;
+        shownTaxBracketYear = year;
         
-        // Initialize from URL parameters
-        const urlParams = getURLParams();
-        document.getElementById('colorBy').value = urlParams.colorBy;
-        document.getElementById('totalBy').value = urlParams.totalBy;
-        document.getElementById('stackToggle').checked = urlParams.stack;
-        document.getElementById('percentageToggle').checked = urlParams.percentage;
-        document.getElementById('cumulativeToggle').checked = urlParams.cumulative;
-        document.getElementById('logToggle').checked = urlParams.log;
-        document.getElementById('inflationToggle').checked = urlParams.inflation;
-        
-        // Find the year index
-        const yearIndex = years.indexOf(urlParams.year);
-        currentFrame = yearIndex >= 0 ? yearIndex : 0;
-        
-        // Update stack icon based on initial state
-        document.getElementById('stackIcon').textContent = urlParams.stack ? '≡' : '⦀';
-        
-        // Initialize chart with URL parameters
-        updateChart(currentFrame, urlParams.colorBy, urlParams.stack ? 'stack' : 'group');
-        updateNavButtons();
-        updateURLParams();
+        const segments = useElements(taxBracketSegmentPool, taxBracketBar, 'tax-bracket', layout.segments.length);
+        layout.segments.forEach((segment, i) => {
+            segments[i].style.width = segment.width + '%';
+            segments[i].style.backgroundColor = segment.color;
+            segments[i].textContent = segment.text;
+        });
         
-        // Handle slider events
-        document.getElementById('chart').on('plotly_sliderchange', function(eventdata) {
-            if (!isPlaying) {  // Only respond to manual slider changes
-                currentFrame = eventdata.slider.active;
-                const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-                updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
-                updateNavButtons();
-                updateURLParams();
+        const labels = useElements(taxBracketLabelPool, taxBracketLabels, 'tax-bracket-label', layout.labels.length);
+        layout.labels.forEach((spec, i) => {
+            const style = labels[i].style;
+            if ('right' in spec) {
+                style.left = '';
+                style.right = spec.right + '%';
+                style.transform = 'none';
+            } else {
+                style.right = '';
+                style.transform = '';
+                style.left = spec.left + '%';
             }
+            labels[i].textContent = spec.text;
         });
-        
-        // Add keyboard navigation
-        document.addEventListener('keydown', function(event) {
-            // Only ignore text inputs, not selects or checkboxes
-            if (event.target.tagName === 'INPUT' && event.target.type !== 'checkbox') return;
-            
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+    }
+    
+    // Define color schemes
+    const colorSchemes = {
+        age_range_display: [
+            '#440154', '#482878', '#3e4989', '#31688e', '#26828e',
+            '#1f9e89', '#35b779', '#6ece58', '#b5de2b', '#fde725',
+            '#fee825', '#ffda25', '#ffc925'
+        ],
+        sex: ['#9b59b6', '#f39c12'],
+        taxable_status: ['#8b5cf6', '#e74c3c']
+    };
+    
+    // Override Plotly's default color assignment
+    Plotly.addTraces = (function(originalAddTraces) {
+        return function(graphDiv, traces) {
             const colorBy = document.getElementById('colorBy').value;
-            
-            if (event.key === 'ArrowLeft' || event.key === 'Left') {
-                event.preventDefault();
-                if (currentFrame > 0) {
-                    currentFrame--;
-                    updateChart(currentFrame, colorBy, stackMode);
-                    updateNavButtons();
-                    updateURLParams();
-                }
-            } else if (event.key === 'ArrowRight' || event.key === 'Right') {
-                event.preventDefault();
-                if (currentFrame < years.length - 1) {
-                    currentFrame++;
-                    updateChart(currentFrame, colorBy, stackMode);
-                    updateNavButtons();
-                    updateURLParams();
-                }
+            const colors = colorSchemes[colorBy];
+            if (colors) {
+                traces.forEach((trace, i) => {
+                    trace.marker = trace.marker || {};
+                    trace.marker.color = colors[i % colors.length];
+                });
             }
-        });
+            return originalAddTraces.apply(this, arguments);
+        };
+    })(Plotly.addTraces);
+    
+    // URL parameter handling
+    function getURLParams() {
+        return readURLState(years);
+    }
+    
+    function updateURLParams() {
+        // Coalesced during playback: stopPlayback writes the final state once
+        if (isPlaying) return;
         
-        // Handle window resize for responsive legend
-        window.addEventListener('resize', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            const colorBy = document.getElementById('colorBy').value;
-            updateChart(currentFrame, colorBy, stackMode);
-        });
+        const params = new URLSearchParams();
+        
+        const colorBy = document.getElementById('colorBy').value;
+        const totalBy = document.getElementById('totalBy').value;
         
-        // Mobile navigation buttons
-        document.getElementById('prevYear').addEventListener('click', function() {
+        // Only add parameters that differ from defaults
+        if (colorBy !== 'age_range_display') {
+            params.set('c', colorByCodes[colorBy]);
+        }
+        if (totalBy !== 'net_tax_amount') {
+            params.set('m', totalByCodes[totalBy]);
+        }
+        if (!document.getElementById('stackToggle').checked) {
+            params.set('st', '0');
+        }
+        if (!document.getElementById('percentageToggle').checked) {
+            params.set('p', '0');
+        }
+        if (!document.getElementById('cumulativeToggle').checked) {
+            params.set('cu', '0');
+        }
+        if (document.getElementById('logToggle').checked) {
+            params.set('l', '1');
+        }
+        if (document.getElementById('inflationToggle').checked) {
+            params.set('i', '1');
+        }
+        if (years[currentFrame] !== years[0]) {
+            params.set('y', years[currentFrame]);
+        }
+        
+        const newURL = window.location.pathname + (params.toString() ? '?' + params.toString() : '');
+        window.history.replaceState({}, '', newURL);
+    }
+    
+    // Initialize from URL parameters
+    const urlParams = getURLParams();
+    document.getElementById('colorBy').value = urlParams.colorBy;
+    document.getElementById('totalBy').value = urlParams.totalBy;
+    document.getElementById('stackToggle').checked = urlParams.stack;
+    document.getElementById('percentageToggle').checked = urlParams.percentage;
+    document.getElementById('cumulativeToggle').checked = urlParams.cumulative;
+    document.getElementById('logToggle').checked = urlParams.log;
+    document.getElementById('inflationToggle').checked = urlParams.inflation;
+    
+    // Find the year index
+    const yearIndex = years.indexOf(urlParams.year);
+    currentFrame = yearIndex >= 0 ? yearIndex : 0;
+    
+    // Update stack icon based on initial state
+    document.getElementById('stackIcon').textContent = urlParams.stack ? '≡' : '⦀';
+    
+    // Initialize chart with URL parameters, then load the full datasets for interaction
+    updateChart(currentFrame, urlParams.colorBy, urlParams.stack ? 'stack' : 'group').then(() => frameSource.load());
+    updateNavButtons();
+    updateURLParams();
+    
+    // Handle slider events
+    document.getElementById('chart').on('plotly_sliderchange', function(eventdata) {
+        if (!isPlaying) {  // Only respond to manual slider changes
+            currentFrame = eventdata.slider.active;
             const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            const colorBy = document.getElementById('colorBy').value;
-            
+            updateChart(currentFrame, document.getElementById('colorBy').value, stackMode);
+            updateNavButtons();
+            updateURLParams();
+        }
+    });
+    
+    // Add keyboard navigation
+    document.addEventListener('keydown', function(event) {
+        // Only ignore text inputs, not selects or checkboxes
+        if (event.target.tagName === 'INPUT' && event.target.type !== 'checkbox') return;
+        
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        const colorBy = document.getElementById('colorBy').value;
+        
+        if (event.key === 'ArrowLeft' || event.key === 'Left') {
+            event.preventDefault();
             if (currentFrame > 0) {
                 currentFrame--;
                 updateChart(currentFrame, colorBy, stackMode);
                 updateNavButtons();
                 updateURLParams();
             }
-        });
-        
-        document.getElementById('nextYear').addEventListener('click', function() {
-            const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
-            const colorBy = document.getElementById('colorBy').value;
-            
+        } else if (event.key === 'ArrowRight' || event.key === 'Right') {
+            event.preventDefault();
             if (currentFrame < years.length - 1) {
                 currentFrame++;
                 updateChart(currentFrame, colorBy, stackMode);
                 updateNavButtons();
                 updateURLParams();
             }
-        });
+        }
+    });
+    
+    // Handle window resize for responsive legend
+    window.addEventListener('resize', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        const colorBy = document.getElementById('colorBy').value;
+        updateChart(currentFrame, colorBy, stackMode);
+    });
+    
+    // Mobile navigation buttons
+    document.getElementById('prevYear').addEventListener('click', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        const colorBy = document.getElementById('colorBy').value;
         
-// Update navigation button states
-function updateNavButtons() {
-    document.getElementById('prevYear').disabled = currentFrame === 0;
-    document.getElementById('nextYear').disabled = currentFrame === years.length - 1;
-}
-
-// Initialize nav button states
-updateNavButtons();
-
-// Force resize on mobile after first render to fix slider text cutoff
-if (window.innerWidth <= 768) {
-    let resizeTriggered = false;
-    document.getElementById('chart').on('plotly_afterplot', function() {
-        if (!resizeTriggered) {
-            resizeTriggered = true;
-            window.dispatchEvent(new Event('resize'));
+        if (currentFrame > 0) {
+            currentFrame--;
+            updateChart(currentFrame, colorBy, stackMode);
+            updateNavButtons();
+            updateURLParams();
         }
     });
-}
+    
+    document.getElementById('nextYear').addEventListener('click', function() {
+        const stackMode = document.getElementById('stackToggle').checked ? 'stack' : 'group';
+        const colorBy = document.getElementById('colorBy').value;
+        
+        if (currentFrame < years.length - 1) {
+            currentFrame++;
+            updateChart(currentFrame, colorBy, stackMode);
+            updateNavButtons();
+            updateURLParams();
+        }
+    });
+    
+    // Update navigation button states
+    function updateNavButtons() {
+        document.getElementById('prevYear').disabled = currentFrame === 0;
+        document.getElementById('nextYear').disabled = currentFrame === years.length - 1;
+    }
 
-// Modal functionality
-const modal = document.getElementById('helpModal');
-const helpBtn = document.getElementById('helpButton');
-const helpBtnMobile = document.getElementById('helpButtonMobile');
-const closeBtn = document.getElementById('modalClose');
+    // Initialize nav button states
+    updateNavButtons();
 
-helpBtn.onclick = function() {
-    modal.style.display = 'block';
-    document.body.style.overflow = 'hidden'; // Prevent background scrolling
-}
+    // Force resize on mobile after first render to fix slider text cutoff
+    if (window.innerWidth <= 768) {
+        let resizeTriggered = false;
+        document.getElementById('chart').on('plotly_afterplot', function() {
+            if (!resizeTriggered) {
+                resizeTriggered = true;
+                window.dispatchEvent(new Event('resize'));
+            }
+        });
+    }
 
-// Also handle mobile help button
-if (helpBtnMobile) {
-    helpBtnMobile.onclick = function() {
+    // Modal functionality
+    const modal = document.getElementById('helpModal');
+    const helpBtn = document.getElementById('helpButton');
+    const helpBtnMobile = document.getElementById('helpButtonMobile');
+    const closeBtn = document.getElementById('modalClose');
+
+    helpBtn.onclick = function() {
         modal.style.display = 'block';
         document.body.style.overflow = 'hidden'; // Prevent background scrolling
     }
-}
 
-closeBtn.onclick = function() {
-    modal.style.display = 'none';
-    document.body.style.overflow = ''; // Restore scrolling
-}
-
-// Close modal when clicking outside of it
-window.onclick = function(event) {
-    if (event.target == modal) {
-        modal.style.display = 'none';
-        document.body.style.overflow = ''; // Restore scrolling
+    // Also handle mobile help button
+    if (helpBtnMobile) {
+        helpBtnMobile.onclick = function() {
+            modal.style.display = 'block';
+            document.body.style.overflow = 'hidden'; // Prevent background scrolling
+        }
     }
-}
 
-// Close modal with Escape key
-document.addEventListener('keydown', function(event) {
-    if (event.key === 'Escape' && modal.style.display === 'block') {
+    closeBtn.onclick = function() {
         modal.style.display = 'none';
         document.body.style.overflow = ''; // Restore scrolling
     }
-});
 
-// Open modal with shift + ? (which is just ?)
-document.addEventListener('keydown', function(event) {
-    if (event.key === '?' && modal.style.display !== 'block') {
-        modal.style.display = 'block';
-        document.body.style.overflow = 'hidden'; // Prevent background scrolling
+    // Close modal when clicking outside of it
+    window.onclick = function(event) {
+        if (event.target == modal) {
+            modal.style.display = 'none';
+            document.body.style.overflow = ''; // Restore scrolling
+        }
     }
-});
+
+    // Close modal with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape' && modal.style.display === 'block') {
+            modal.style.display = 'none';
+            document.body.style.overflow = ''; // Restore scrolling
+        }
+    });
+
+    // Open modal with shift + ? (which is just ?)
+    document.addEventListener('keydown', function(event) {
+        if (event.key === '?' && modal.style.display !== 'block') {
+            modal.style.display = 'block';
+            document.body.style.overflow = 'hidden'; // Prevent background scrolling
+        }
+    });
 
 } // End of initChart function'''
     
-    # Create public directory if it doesn't exist
-    import os
-    os.makedirs('public', exist_ok=True)
+    return script_content
+
+def chart_config(chart, data_files, snapshot_versions):
+    """Per-build configuration embedded in index.html: dataset URLs, axis maximums and the first frame."""
+    from chart_data import chart_frame
+    
+    def as_ints(values):
+        return {col: int(values[col]) for col in values}
+    
+    def as_floats(values):
+        return {col: float(values[col]) for col in values}
+    
+    nominal = chart['tables']['nominal']
+    return {
+        'dataFiles': data_files,
+        'snapshotVersions': snapshot_versions,
+        'firstFrame': {
+            'years': nominal['years'],
+            'request': FIRST_FRAME_REQUEST,
+            'frame': chart_frame(nominal, FIRST_FRAME_REQUEST)
+        },
+        'maximums': {
+            'nominal': {
+                'stacked': as_ints({
+                    'individuals_count': chart['stacked_max_individuals'],
+                    'total_income_amount': chart['stacked_max_income'],
+                    'net_tax_amount': chart['stacked_max_tax']
+                }),
+                'grouped': {k: as_ints(v) for k, v in chart['grouped_max'].items()}
+            },
+            'redistributed': {
+                'stacked': as_ints({
+                    'individuals_count': chart['stacked_max_individuals_redis'],
+                    'total_income_amount': chart['stacked_max_income_redis'],
+                    'net_tax_amount': chart['stacked_max_tax_redis']
+                }),
+                'grouped': {k: as_ints(v) for k, v in chart['grouped_max_redis'].items()}
+            },
+            'cumulative': as_ints(chart['cumulative_max'])
+        },
+        'percentageMaximums': {
+            'stacked': as_floats(chart['stacked_pct_max']),
+            'grouped': {k: as_floats(v) for k, v in chart['grouped_pct_max'].items()}
+        }
+    }
+
+def snapshot_key(request):
+    """File name stem of a frame request's snapshot; snapshotKey in the script matches it."""
+    flags = ''.join('1' if request[flag] else '0' for flag in ('percentage', 'cumulative', 'inflation'))
+    return f"{request['yearIndex']}-{COLOR_BY_CODES[request['colorBy']]}-{TOTAL_BY_CODES[request['totalBy']]}-{flags}"
+
+def build_snapshots(tables):
+    """Write the snapshot of every frame request a URL can make; returns their versions.
+    
+    Files are named <key>.<version>.json. Snapshots are versioned in shards, one per
+    dataset and year, by a hash of the shard's content. versions maps each dataset to its
+    per-year versions, so the page can derive a deep link's file name without a lookup and
+    a data change only renames the shards it touches. The files are compressed and written
+    in parallel.
+    """
+    from chart_data import chart_frame
+    
+    years = tables['nominal']['years']
+    shards = {}
+    for dataset, year_index in itertools.product(('nominal', 'redistributed'), range(len(years))):
+        contents = shards[dataset, year_index] = {}
+        for color_by in COLOR_BY_CODES:
+            for total_by in TOTAL_BY_CODES:
+                for percentage, cumulative in itertools.product([True, False], repeat=2):
+                    request = {
+                        'yearIndex': year_index,
+                        'colorBy': color_by,
+                        'totalBy': total_by,
+                        'percentage': percentage,
+                        'cumulative': cumulative,
+                        'inflation': dataset == 'redistributed'
+                    }
+                    frame = chart_frame(tables[dataset], request)
+                    contents[snapshot_key(request)] = json.dumps(frame, separators=(',', ':'), ensure_ascii=False)
+    
+    versions = {dataset: [] for dataset in ('nominal', 'redistributed')}
+    files = []
+    for (dataset, year_index), contents in shards.items():
+        version = hash_bytes(json.dumps(contents, sort_keys=True).encode('utf-8'))[:12]
+        versions[dataset].append(version)
+        files.extend((os.path.join(SNAPSHOT_DIR, f"{key}.{version}.json"), content) for key, content in contents.items())
+    
+    with ThreadPoolExecutor() as pool:
+        written = pool.map(lambda item: write_compressed(*item), files)
+        paths = [path for item_paths in written for path in item_paths]
+    
+    # Drop snapshots from previous builds
+    prune_directory(SNAPSHOT_DIR, paths)
+    return versions
+
+def plotly_inputs():
+    """Files that pin the vendored Plotly source: its package manifest and lockfile."""
+    return [os.path.join(PLOTLY_SOURCE_DIR, name) for name in ('package.json', 'package-lock.json')]
+
+def build_plotly_bundle():
+    """Run the Plotly stage: build the partial bundle and return (bundle URL, paths).
+    
+    Uses plotly.js's own custom-bundle task, which runs offline against the installed
+    dependencies of the vendored checkout. Without a vendored source the page keeps
+    loading the full bundle.
+    """
+    if not os.path.exists(os.path.join(PLOTLY_SOURCE_DIR, 'package.json')):
+        print(f"⚠️  No Plotly source in {PLOTLY_SOURCE_DIR}/; index.html loads the full {PLOTLY_FALLBACK}")
+        return PLOTLY_FALLBACK, []
+    
+    with open(os.path.join(PLOTLY_SOURCE_DIR, 'package.json')) as f:
+        version = json.load(f).get('version')
+    if version != PLOTLY_VERSION:
+        raise ValueError(f"{PLOTLY_SOURCE_DIR} is plotly.js {version}; the Plotly stage expects {PLOTLY_VERSION}")
+    
+    out_name = 'aussie-tax'
+    bundle_path = os.path.join(PLOTLY_SOURCE_DIR, 'dist', f'plotly-{out_name}.min.js')
+    # Remove a bundle left by an earlier run so a stale file is never mistaken for this one
+    if os.path.exists(bundle_path):
+        os.remove(bundle_path)
+    subprocess.run(
+        ['npm', 'run', 'custom-bundle', '--', '--traces', ','.join(PLOTLY_TRACES), '--out', out_name],
+        cwd=PLOTLY_SOURCE_DIR, check=True
+    )
+    if not os.path.exists(bundle_path):
+        raise ValueError(f"plotly.js custom-bundle finished but did not write {bundle_path}")
+    with open(bundle_path, 'rb') as f:
+        bundle = f.read()
+    
+    paths = write_hashed_asset(PLOTLY_DIR, PLOTLY_BUNDLE_NAME, 'min.js', bundle)
+    # Drop bundles from previous builds
+    prune_directory(PLOTLY_DIR, paths)
+    return os.path.relpath(paths[0], 'public'), paths
+
+def build_data():
+    """Run the data stage: write the dataset files and deep-link snapshots; returns the config."""
+    # Imported here so an up-to-date incremental build never loads pandas
+    from chart_data import prepare_chart_data
+    chart = prepare_chart_data()
+    
+    data_files = {}
+    written = []
+    for name, content in [('nominal', chart['data_json']), ('redistributed', chart['data_redistributed_json'])]:
+        paths = write_hashed_asset(DATA_DIR, name, 'json', content)
+        data_files[name] = os.path.relpath(paths[0], 'public')
+        written.extend(paths)
+    
+    # Drop datasets from previous builds
+    prune_directory(DATA_DIR, written)
+    
+    snapshot_versions = build_snapshots(chart['tables'])
+    return chart_config(chart, data_files, snapshot_versions)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--incremental', action='store_true',
+                        help='skip stages whose inputs have not changed since the last build')
+    args = parser.parse_args()
+    
+    manifest = BuildManifest()
+    built = False
+    
+    # Data stage: the datasets as separately cacheable, content-hashed files
+    tax_rate_files = sorted(glob.glob('tax_rates/*.json'))
+    data_inputs = DATA_INPUTS + tax_rate_files
+    data_outputs = [DATA_DIR, SNAPSHOT_DIR]
+    if args.incremental and manifest.is_current('data', data_inputs, data_outputs):
+        config = manifest.result('data')
+        print(f"✓ {DATA_DIR}/ is up to date")
+    else:
+        config = build_data()
+        manifest.record('data', data_inputs, data_outputs, result=config)
+        print(f"✓ Wrote {DATA_DIR}/: {', '.join(config['dataFiles'].values())}")
+        print(f"✓ Wrote {SNAPSHOT_DIR}/: {sum(map(len, config['snapshotVersions'].values()))} shards")
+        built = True
+    
+    # Plotly stage: a partial bundle with only the trace types in PLOTLY_TRACES
+    if (args.incremental and manifest.is_current('plotly', plotly_inputs(), [PLOTLY_DIR])
+            and manifest.result('plotly')['traces'] == PLOTLY_TRACES):
+        plotly_bundle = manifest.result('plotly')['bundle']
+        print(f"✓ public/{plotly_bundle} is up to date")
+    else:
+        plotly_bundle, plotly_outputs = build_plotly_bundle()
+        manifest.record('plotly', plotly_inputs(), [PLOTLY_DIR], result={'traces': PLOTLY_TRACES, 'bundle': plotly_bundle})
+        if plotly_outputs:
+            print(f"✓ Wrote public/{plotly_bundle}")
+        built = True
+    
+    # Each stage: (name, input files, earlier stages it reads, output, builder)
+    stages = [
+        ('index.html', INDEX_INPUTS, ['data', 'plotly'], 'public/index.html',
+         lambda: render_index_html(config, plotly_bundle)),
+        ('script.js', SCRIPT_INPUTS + tax_rate_files, [], 'public/script.js', render_script),
+        ('chart-worker.js', WORKER_INPUTS, [], 'public/chart-worker.js', render_worker)
+    ]
+    
+    for stage, inputs, after, output, build in stages:
+        if args.incremental and manifest.is_current(stage, inputs, [output], after):
+            print(f"✓ {output} is up to date")
+            continue
+        
+        # Outputs are only rewritten (and their mtime touched) when their content changes
+        if write_if_changed(output, build()):
+            print(f"✓ Wrote {output}")
+        else:
+            print(f"✓ {output} unchanged")
+        manifest.record(stage, inputs, [output], after=after)
+        built = True
     
-    # Write the HTML file
-    with open('public/index.html', 'w') as f:
-        f.write(html_content)
+    manifest.save()
     
-    # Write the JavaScript file
-    with open('public/script.js', 'w') as f:
-        f.write(script_content)
+    if not built:
+        return
     
     print("✓ Created Plotly-based animated chart: public/index.html")
     print("✓ Features:")
@@ -1836,4 +1821,4 @@ document.addEventListener('keydown', function(event) {
     print("  - Real-time statistics display")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
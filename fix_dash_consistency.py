@@ -2,7 +2,8 @@
 # /// script
 # requires-python = ">=3.8"
 # dependencies = [
-#     "pandas"
+#     "pandas",
+#     "pyarrow"
 # ]
 # ///
 """
@@ -11,21 +12,24 @@ Fix dash inconsistency in ato_2010-2023.csv to use em-dashes consistently.
 
 import pandas as pd
 
+from ato_data import read_dataset, write_dataset
+from reference_data import normalize_years
+
 def main():
     print("Loading ato_2010-2023.csv...")
-    df = pd.read_csv('ato_2010-2023.csv')
+    df = read_dataset('ato_2010-2023.csv')
     
     print("Original year format sample:")
     print(df['income_year'].unique())
     
     # Replace regular dashes with em-dashes in income_year column
-    df['income_year'] = df['income_year'].str.replace('-', '–')
+    df['income_year'] = normalize_years(df['income_year'])
     
     print("\nFixed year format sample:")
     print(df['income_year'].unique())
     
     # Save the fixed file
-    df.to_csv('ato_2010-2023.csv', index=False)
+    write_dataset(df, 'ato_2010-2023.csv')
     
     print("\n✓ Fixed dash consistency in ato_2010-2023.csv")
     print("✓ All years now use em-dashes consistently")
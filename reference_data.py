@@ -0,0 +1,179 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "numpy"
+# ]
+# ///
+"""
+Reference data shared by every script: financial year labels, inflation factors, income
+brackets and the display order of the demographic categories.
+
+Everything is parsed and validated once, at import, into ready-made lookups (bounds
+arrays and label -> index maps), so callers never re-parse labels or search lists per
+row. The chart generator emits its JavaScript constants from here too. Run directly to
+print the tables.
+"""
+
+import csv
+import json
+
+import numpy as np
+
+# Inflation factors to the base year, one row per financial year
+INFLATION_FACTORS_PATH = 'inflation_factors_fy_correct.csv'
+
+# The year every dollar amount is converted to
+BASE_YEAR = '2022–23'
+
+# Income brackets in display order. The same brackets are used by the ATO data and, in
+# 2023 dollars, as the targets of the inflation redistribution.
+INCOME_RANGE_ORDER = [
+    '$6,000 or less',
+    '$6,001 to $10,000',
+    '$10,001 to $20,000',
+    '$20,001 to $30,000',
+    '$30,001 to $40,000',
+    '$40,001 to $50,000',
+    '$50,001 to $60,000',
+    '$60,001 to $80,000',
+    '$80,001 to $100,000',
+    '$100,001 to $150,000',
+    '$150,001 to $200,000',
+    '$200,001 to $250,000',
+    '$250,001 to $500,000',
+    '$500,001 to $1,000,000',
+    '$1,000,001 or more'
+]
+
+# Abbreviated labels for narrow screens, in the same order
+INCOME_RANGE_SHORT_LABELS = [
+    '≤$6K',
+    '$6-10K',
+    '$10-20K',
+    '$20-30K',
+    '$30-40K',
+    '$40-50K',
+    '$50-60K',
+    '$60-80K',
+    '$80-100K',
+    '$100-150K',
+    '$150-200K',
+    '$200-250K',
+    '$250-500K',
+    '$500K-1M',
+    '>$1M'
+]
+
+# The open-ended top bracket, and the practical upper bound used for it as a source
+TOP_BRACKET_LABEL = '$1,000,001 or more'
+TOP_BRACKET_PRACTICAL_MAX = 2000000
+
+# Legend order of the age ranges
+AGE_ORDER = [
+    'Under 18', '18 - 24', '25 - 29', '30 - 34', '35 - 39',
+    '40 - 44', '45 - 49', '50 - 54', '55 - 59', '60 - 64',
+    '65 - 69', '70 - 74', '75 and over'
+]
+
+def normalize_year(year):
+    """Financial year label in the datasets' form ('2010–11', with an en dash)."""
+    return str(year).replace('-', '–')
+
+def normalize_years(values):
+    """normalize_year for a pandas Series (categorical or not); returns plain strings."""
+    return values.astype(str).str.replace('-', '–', regex=False)
+
+def parse_bracket_label(label):
+    """Numeric (min, max) of a bracket label; the open top bracket's max is infinity."""
+    if label == '$6,000 or less':
+        return 0, 6000
+    if label == TOP_BRACKET_LABEL:
+        return 1000001, float('inf')
+    try:
+        parts = label.replace('$', '').replace(',', '').split(' to ')
+        if len(parts) != 2:
+            raise ValueError(f"Expected 2 parts separated by ' to ', got {len(parts)}")
+        return int(parts[0]), int(parts[1])
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"Unable to parse bracket label '{label}': {e}")
+
+def load_inflation_factors(path=INFLATION_FACTORS_PATH):
+    """Read and validate the inflation factors table; returns {year: factor} in year order."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    
+    factor_column = 'inflation_factor_to_' + BASE_YEAR.replace('–', '_')
+    if not rows or 'financial_year' not in rows[0] or factor_column not in rows[0]:
+        raise ValueError(f"'{path}' needs 'financial_year' and '{factor_column}' columns")
+    
+    factors = {}
+    for row in rows:
+        year = normalize_year(row['financial_year'].strip())
+        factor = float(row[factor_column])
+        if year in factors:
+            raise ValueError(f"'{path}' lists {year} more than once")
+        if not factor > 0:
+            raise ValueError(f"'{path}' has a non-positive inflation factor for {year}: {factor}")
+        factors[year] = factor
+    
+    if factors.get(BASE_YEAR) != 1.0:
+        raise ValueError(f"'{path}' must give the base year {BASE_YEAR} a factor of 1.0")
+    return dict(sorted(factors.items()))
+
+def _bracket_tables(labels):
+    """Bounds of every bracket, checked to be contiguous and in increasing order."""
+    bounds = [parse_bracket_label(label) for label in labels]
+    for (_, previous_max), (bracket_min, _), label in zip(bounds, bounds[1:], labels[1:]):
+        if bracket_min != previous_max + 1:
+            raise ValueError(f"Income bracket '{label}' does not follow on from the previous bracket")
+    return bounds
+
+# Inflation factors relative to the base year, keyed by normalised year
+INFLATION_FACTORS = load_inflation_factors()
+
+# Position of each label in its display order
+INCOME_RANGE_INDEX = {label: i for i, label in enumerate(INCOME_RANGE_ORDER)}
+AGE_INDEX = {age: i for i, age in enumerate(AGE_ORDER)}
+
+# (min, max, label) of every bracket, with an open top bracket, as redistribution targets
+INCOME_BRACKETS = [(low, high, label) for (low, high), label in zip(_bracket_tables(INCOME_RANGE_ORDER), INCOME_RANGE_ORDER)]
+
+# Bracket bounds as arrays in display order: as targets (open top) and as sources
+# (top bracket capped at its practical maximum)
+TARGET_BOUNDS = np.array([(low, high) for low, high, _ in INCOME_BRACKETS], dtype=float)
+SOURCE_BOUNDS = np.minimum(TARGET_BOUNDS, TOP_BRACKET_PRACTICAL_MAX)
+
+def bracket_bounds(labels):
+    """Source bounds of each label as an (n, 2) array; unknown labels are parsed."""
+    bounds = np.empty((len(labels), 2))
+    for i, label in enumerate(labels):
+        if label in INCOME_RANGE_INDEX:
+            bounds[i] = SOURCE_BOUNDS[INCOME_RANGE_INDEX[label]]
+        else:
+            low, high = parse_bracket_label(label)
+            bounds[i] = low, min(high, TOP_BRACKET_PRACTICAL_MAX)
+    return bounds
+
+def javascript_constants():
+    """JavaScript declarations of the lookups the chart script uses."""
+    constants = {
+        'incomeRanges': INCOME_RANGE_ORDER,
+        'incomeRangesMobile': INCOME_RANGE_SHORT_LABELS,
+        'ageIndex': AGE_INDEX
+    }
+    return '\n'.join(f"const {name} = {json.dumps(value, ensure_ascii=False)};" for name, value in constants.items())
+
+def main():
+    print(f"Inflation factors (to {BASE_YEAR}) from {INFLATION_FACTORS_PATH}:")
+    for year, factor in INFLATION_FACTORS.items():
+        print(f"  {year}  {factor:.2f}")
+    
+    print("\nIncome brackets:")
+    for (low, high, label), short_label in zip(INCOME_BRACKETS, INCOME_RANGE_SHORT_LABELS):
+        print(f"  {label:<25} {short_label:<10} {low:>12,.0f} - {high:>12,.0f}")
+    
+    print(f"\nAge ranges: {', '.join(AGE_ORDER)}")
+
+if __name__ == '__main__':
+    main()
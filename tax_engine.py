@@ -0,0 +1,233 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "numpy"
+# ]
+# ///
+"""
+Vectorised Australian individual income tax calculator driven by tax_rates/*.json.
+
+Each year's scale is loaded once into sorted threshold / base-tax / marginal-rate arrays,
+so tax for millions of incomes is one binary search plus a little array arithmetic.
+Run directly to print the tax on some incomes under every scale (or chosen years).
+"""
+
+import argparse
+import functools
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from reference_data import normalize_year
+
+# Bracket definitions, one tax_rates_<year>.json file per financial year
+TAX_RATES_DIR = 'tax_rates'
+
+# 2011-12 flood levy: 0.5% of income over $50,000 plus another 0.5% over $100,000
+FLOOD_LEVY = [(50000, 0.005), (100000, 0.005)]
+
+def piecewise_tax(incomes, thresholds, base, rates):
+    """Evaluate a piecewise-linear tax schedule for an array of incomes.
+    
+    thresholds must be sorted; income above thresholds[k] (and up to thresholds[k + 1])
+    pays base[k] plus rates[k] on the part over thresholds[k]. Incomes at or below the
+    first threshold pay nothing.
+    """
+    intercepts, slopes = linear_pieces(thresholds, base, rates)
+    return evaluate_pieces(incomes, thresholds, intercepts, slopes)
+
+def linear_pieces(thresholds, base, rates):
+    """Per-bracket (intercept, slope) of a schedule, with a zero piece below the first threshold."""
+    return np.concatenate([[0.0], base - thresholds * rates]), np.concatenate([[0.0], rates])
+
+def evaluate_pieces(incomes, thresholds, intercepts, slopes):
+    """Binary-search each income's piece and evaluate intercept + slope * income."""
+    incomes = np.asarray(incomes, dtype=float)
+    piece = np.searchsorted(thresholds, incomes, side='left')
+    return intercepts.take(piece) + incomes * slopes.take(piece)
+
+def marginal_schedule(steps):
+    """Turn (threshold, extra marginal rate) steps into (thresholds, base, rates) arrays."""
+    thresholds = np.array([threshold for threshold, _ in steps], dtype=float)
+    rates = np.cumsum([rate for _, rate in steps])
+    base = np.concatenate([[0.0], np.cumsum(np.diff(thresholds) * rates[:-1])])
+    return thresholds, base, rates
+
+class TaxScale:
+    """One financial year's resident tax scale as arrays.
+    
+    thresholds[k] is the income above which bracket k's marginal rate applies, base[k]
+    is the tax payable at that threshold. Temporary levies (budget repair, flood) are a
+    second marginal schedule; the Medicare levy is a flat rate on taxable income
+    (low-income thresholds and offsets are not modelled).
+    """
+    
+    def __init__(self, year, thresholds, base, rates, medicare_levy=0.0, levy_steps=()):
+        self.year = year
+        self.thresholds = np.asarray(thresholds, dtype=float)
+        self.base = np.asarray(base, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        self.medicare_levy = float(medicare_levy)
+        self.levy_steps = list(levy_steps)
+        
+        if not (len(self.thresholds) == len(self.base) == len(self.rates)) or len(self.thresholds) == 0:
+            raise ValueError(f"Tax scale {year}: thresholds, base and rates must be non-empty and the same length")
+        if np.any(np.diff(self.thresholds) <= 0):
+            raise ValueError(f"Tax scale {year}: thresholds must be strictly increasing, got {self.thresholds.tolist()}")
+        
+        self.levy_schedule = marginal_schedule(self.levy_steps) if self.levy_steps else None
+        self._combined = {}
+    
+    @classmethod
+    def from_json(cls, definition):
+        """Build a scale from a parsed tax_rates_<year>.json definition."""
+        year = normalize_year(definition['year'])
+        brackets = definition['brackets']
+        for previous, bracket in zip(brackets, brackets[1:]):
+            if previous['max'] is None or bracket['min'] != previous['max'] + 1:
+                raise ValueError(f"Tax scale {year}: bracket starting at {bracket['min']} does not follow "
+                                 f"the bracket ending at {previous['max']}")
+            expected = previous['tax'] + (previous['max'] - max(previous['min'] - 1, 0)) * previous['rate']
+            if abs(expected - bracket['tax']) > 1:
+                raise ValueError(f"Tax scale {year}: base tax {bracket['tax']} at {bracket['min']} does not match "
+                                 f"the previous bracket ({expected:.2f})")
+        
+        # "Tax on income over $X": each bracket starts where the previous one ended
+        thresholds = [0] + [bracket['max'] for bracket in brackets[:-1]]
+        
+        levy_steps = []
+        repair_levy = definition.get('temporary_budget_repair_levy')
+        if repair_levy:
+            levy_steps.append((repair_levy['threshold'], repair_levy['rate']))
+        if definition.get('flood_levy'):
+            levy_steps.extend(FLOOD_LEVY)
+        
+        return cls(
+            year,
+            thresholds,
+            [bracket['tax'] for bracket in brackets],
+            [bracket['rate'] for bracket in brackets],
+            definition.get('medicare_levy', 0.0),
+            sorted(levy_steps)
+        )
+    
+    def indexed(self, factor):
+        """This scale with every threshold (and so every base amount) scaled by factor."""
+        return TaxScale(
+            self.year,
+            self.thresholds * factor,
+            self.base * factor,
+            self.rates,
+            self.medicare_levy,
+            [(threshold * factor, rate) for threshold, rate in self.levy_steps]
+        )
+    
+    def income_tax(self, incomes):
+        """Tax on taxable income from the bracket schedule alone."""
+        return piecewise_tax(incomes, self.thresholds, self.base, self.rates)
+    
+    def levies(self, incomes):
+        """Temporary levies (budget repair, flood) on taxable income."""
+        if self.levy_schedule is None:
+            return np.zeros(np.shape(incomes))
+        return piecewise_tax(incomes, *self.levy_schedule)
+    
+    def medicare(self, incomes):
+        """Flat Medicare levy on taxable income."""
+        return np.maximum(np.asarray(incomes, dtype=float), 0.0) * self.medicare_levy
+    
+    def combined_schedule(self, medicare=True):
+        """Brackets, levies and (optionally) the Medicare levy merged into one schedule.
+        
+        Returns (thresholds, intercepts, slopes) for evaluate_pieces, so the total needs a
+        single binary search per income.
+        """
+        if medicare not in self._combined:
+            thresholds = self.thresholds
+            if self.levy_schedule is not None:
+                thresholds = np.union1d(thresholds, self.levy_schedule[0])
+            # The marginal rate just above each threshold, and the exact tax at it
+            slopes = self.rates[np.searchsorted(self.thresholds, thresholds, side='right') - 1]
+            if self.levy_schedule is not None:
+                levy_piece = np.searchsorted(self.levy_schedule[0], thresholds, side='right') - 1
+                slopes = slopes + np.where(levy_piece >= 0, self.levy_schedule[2][np.maximum(levy_piece, 0)], 0.0)
+            if medicare:
+                slopes = slopes + np.where(thresholds >= 0, self.medicare_levy, 0.0)
+            at_threshold = self.income_tax(thresholds) + self.levies(thresholds)
+            if medicare:
+                at_threshold = at_threshold + self.medicare(thresholds)
+            intercepts, slopes = linear_pieces(thresholds, at_threshold, slopes)
+            self._combined[medicare] = (thresholds, intercepts, slopes)
+        return self._combined[medicare]
+    
+    def tax(self, incomes, medicare=True):
+        """Total tax: bracket tax plus temporary levies, and optionally the Medicare levy."""
+        return evaluate_pieces(incomes, *self.combined_schedule(medicare))
+
+@functools.lru_cache(maxsize=None)
+def load_tax_scales(directory=TAX_RATES_DIR):
+    """Load every tax_rates_<year>.json in directory into TaxScales keyed by year ('2010–11').
+    
+    Cached, so the files are parsed once per process.
+    """
+    scales = {}
+    for path in sorted(glob.glob(os.path.join(directory, 'tax_rates_*.json'))):
+        with open(path) as f:
+            scale = TaxScale.from_json(json.load(f))
+        scales[scale.year] = scale
+    if not scales:
+        raise ValueError(f"No tax_rates_*.json files found in '{directory}'")
+    return scales
+
+def get_tax_scale(year, directory=TAX_RATES_DIR):
+    """The tax scale for a financial year, accepting '2010-11' or '2010–11'."""
+    scales = load_tax_scales(directory)
+    year = normalize_year(year)
+    if year not in scales:
+        raise ValueError(f"No tax scale for year '{year}'. Available years: {list(scales)}")
+    return scales[year]
+
+def tax_table(incomes, scales, medicare=True):
+    """Tax on every income under every scale, as an array of shape (len(scales), len(incomes)).
+    
+    Incomes are sorted once up front: binary searches over sorted keys are several times
+    faster, which outweighs the sort when there are many scales.
+    """
+    incomes = np.asarray(incomes, dtype=float)
+    order = np.argsort(incomes)
+    sorted_incomes = incomes[order]
+    table = np.empty((len(scales), len(incomes)))
+    for row, scale in zip(table, scales):
+        row[order] = scale.tax(sorted_incomes, medicare=medicare)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('incomes', nargs='*', type=float, default=[18200, 45000, 90000, 135000, 200000],
+                        help='taxable incomes to calculate tax for')
+    parser.add_argument('--year', action='append', help='financial year(s) to use (default: every scale)')
+    parser.add_argument('--no-medicare', action='store_true', help='leave out the Medicare levy')
+    parser.add_argument('--time', type=int, metavar='N',
+                        help='also time tax on N random incomes under every scale')
+    args = parser.parse_args()
+    
+    scales = [get_tax_scale(year) for year in args.year] if args.year else list(load_tax_scales().values())
+    table = tax_table(args.incomes, scales, medicare=not args.no_medicare)
+    
+    print(f"{'Year':<10}" + ''.join(f"{income:>14,.0f}" for income in args.incomes))
+    for scale, taxes in zip(scales, table):
+        print(f"{scale.year:<10}" + ''.join(f"{tax:>14,.2f}" for tax in taxes))
+    
+    if args.time:
+        incomes = np.random.default_rng(0).lognormal(np.log(60000), 0.8, size=args.time)
+        start = time.perf_counter()
+        tax_table(incomes, scales, medicare=not args.no_medicare)
+        elapsed = time.perf_counter() - start
+        print(f"\n{args.time:,} incomes x {len(scales)} scales in {elapsed * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
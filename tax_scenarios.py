@@ -0,0 +1,163 @@
+#!/usr/bin/env -S uv run --quiet
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pandas",
+#     "numpy",
+#     "scipy",
+#     "pyarrow"
+# ]
+# ///
+"""
+Counterfactual tax scenarios: what each year's taxpayers would have paid under any
+other year's tax scale, optionally with that scale's brackets indexed to the year.
+
+The ATO rows are aggregated into year x income range x sex x taxable status x age
+cells, and each cell's tax is estimated as individuals x tax(average income) under
+every scale in tax_rates/. The result is saved as one cube (scale first, then the cell
+dimensions) so bracket creep can be charted without recomputing anything.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from chart_data import CUBE_DIMENSIONS, MEASURES, build_aggregation_cube
+from reference_data import INCOME_RANGE_ORDER, INFLATION_FACTORS, normalize_year, normalize_years
+from tax_engine import load_tax_scales
+
+# Output cube, kept next to the CSVs
+SCENARIO_PATH = 'tax_scenarios.npz'
+
+# Columns needed from the source dataset
+SCENARIO_COLUMNS = [
+    'income_year', 'normalized_income_range', 'sex', 'taxable_status', 'age_range_display',
+    'individuals_count', 'total_income_amount', 'net_tax_amount'
+]
+
+def load_cells(path='ato_2010-2023.csv'):
+    """Aggregate the ATO rows into cells; returns (measures by name, coords).
+    
+    Each measure is an array over CUBE_DIMENSIONS (year, income range, sex, taxable
+    status, age).
+    """
+    from ato_data import read_dataset
+    
+    df = read_dataset(path, columns=SCENARIO_COLUMNS)
+    df['year'] = normalize_years(df['income_year'])
+    years = sorted(df['year'].unique())
+    cube, coords = build_aggregation_cube(df, years, INCOME_RANGE_ORDER)
+    return {measure: cube[..., i] for i, measure in enumerate(MEASURES)}, coords
+
+def indexation_factors(scale_years, years, inflation_factors):
+    """Threshold multipliers that carry each scale's brackets into each year's dollars.
+    
+    Returns an array of shape (len(scale_years), len(years)). inflation_factors converts
+    a year's dollars to a common base year, so a threshold set in scale year s is worth
+    factor[s] / factor[y] of itself in year y.
+    """
+    missing = sorted(set(scale_years) - set(inflation_factors)) + sorted(set(years) - set(inflation_factors))
+    if missing:
+        raise ValueError(f"No inflation factor for {missing}; indexation needs one for every scale and data year. "
+                         f"Available years: {list(inflation_factors)}")
+    scale_factors = np.array([inflation_factors[year] for year in scale_years], dtype=float)
+    year_factors = np.array([inflation_factors[year] for year in years], dtype=float)
+    return scale_factors[:, np.newaxis] / year_factors[np.newaxis, :]
+
+def scenario_cube(individuals, income, scales, indexation=None, medicare=False):
+    """Estimated tax of every cell under every scale.
+    
+    individuals and income are cell arrays whose first axis is the data year. Returns an
+    array of shape (len(scales),) + individuals.shape. indexation, if given, is the
+    (scale, year) threshold multiplier from indexation_factors; an indexed scale's tax is
+    factor * tax(income / factor).
+    """
+    individuals = np.asarray(individuals, dtype=float)
+    income = np.asarray(income, dtype=float)
+    
+    # Average income per cell; empty cells have no one to tax
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average_income = np.where(individuals > 0, income / individuals, 0.0)
+    
+    result = np.empty((len(scales),) + individuals.shape)
+    year_shape = (-1,) + (1,) * (individuals.ndim - 1)
+    for i, scale in enumerate(scales):
+        # One batched call per scale covers every year and cell
+        factor = np.ones(individuals.shape[0]) if indexation is None else indexation[i]
+        factor = factor.reshape(year_shape)
+        taxes = scale.tax((average_income / factor).ravel(), medicare=medicare).reshape(individuals.shape)
+        result[i] = individuals * taxes * factor
+    return result
+
+def save_scenarios(path, estimated_tax, cells, coords, scale_years, indexed, medicare):
+    """Write the scenario cube, the source cells and the axis labels to an .npz file."""
+    dims = ['scale'] + CUBE_DIMENSIONS
+    labels = {'scale': list(scale_years), **{dim: [str(value) for value in coords[dim]] for dim in CUBE_DIMENSIONS}}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            estimated_tax=estimated_tax,
+            individuals_count=cells['individuals_count'],
+            total_income_amount=cells['total_income_amount'],
+            net_tax_amount=cells['net_tax_amount'],
+            metadata=np.array(json.dumps({'dims': dims, 'coords': labels, 'indexed': indexed, 'medicare': medicare}))
+        )
+    os.replace(tmp_path, path)
+
+def load_scenarios(path=SCENARIO_PATH):
+    """Read a scenario cube back; returns (arrays by name, metadata)."""
+    with np.load(path) as saved:
+        arrays = {name: saved[name] for name in saved.files if name != 'metadata'}
+        metadata = json.loads(str(saved['metadata']))
+    return arrays, metadata
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', metavar='YEAR', help='tax scales to apply (default: every scale)')
+    parser.add_argument('--index', action='store_true',
+                        help="index each scale's brackets to the data year using the inflation factors")
+    parser.add_argument('--medicare', action='store_true', help='include the Medicare levy (net tax excludes it)')
+    parser.add_argument('--output', default=SCENARIO_PATH, help=f'output file (default: {SCENARIO_PATH})')
+    args = parser.parse_args()
+    
+    all_scales = load_tax_scales()
+    if args.scales:
+        scale_years = [normalize_year(year) for year in args.scales]
+        unknown = [year for year in scale_years if year not in all_scales]
+        if unknown:
+            raise ValueError(f"No tax scale for {unknown}. Available years: {list(all_scales)}")
+    else:
+        scale_years = list(all_scales)
+    
+    print("Aggregating ATO rows into cells...")
+    cells, coords = load_cells()
+    years = coords['year']
+    
+    indexation = None
+    if args.index:
+        if not args.scales:
+            # Only scales with a known inflation factor can be indexed
+            scale_years = [year for year in scale_years if year in INFLATION_FACTORS]
+        indexation = indexation_factors(scale_years, years, INFLATION_FACTORS)
+    
+    scales = [all_scales[year] for year in scale_years]
+    estimated_tax = scenario_cube(cells['individuals_count'], cells['total_income_amount'], scales, indexation, args.medicare)
+    save_scenarios(args.output, estimated_tax, cells, coords, scale_years, args.index, args.medicare)
+    
+    print(f"✓ {len(scales)} scales x {cells['individuals_count'].size:,} cells saved to {args.output}")
+    
+    # Headline: each year's estimated total under its own scale and the latest one
+    sum_axes = tuple(range(2, estimated_tax.ndim))
+    totals = estimated_tax.sum(axis=sum_axes)
+    actual = cells['net_tax_amount'].sum(axis=tuple(range(1, cells['net_tax_amount'].ndim)))
+    latest = len(scale_years) - 1
+    print(f"\n{'Year':<10} {'Actual net tax':>16} {'Own scale':>16} {'Scale ' + scale_years[latest]:>16}")
+    for j, year in enumerate(years):
+        own = totals[scale_years.index(year), j] if year in scale_years else float('nan')
+        print(f"{year:<10} {actual[j] / 1e9:15.1f}B {own / 1e9:15.1f}B {totals[latest, j] / 1e9:15.1f}B")
+
+if __name__ == '__main__':
+    main()
@@ -3,146 +3,168 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "pandas",
-#     "numpy"
+#     "numpy",
+#     "pyarrow"
 # ]
 # ///
 """
 Verify that the redistributed inflation-adjusted data maintains integrity:
-1. Total individuals should remain the same (or very close due to rounding)
-2. Total income should equal original total * inflation factor
-3. Report on tax changes (which are expected due to bracket changes)
+1. Total individuals should remain exactly the same, every year and in every
+   demographic cell (sex x taxable status x age)
+2. Total income should equal original total * inflation factor (up to floating point)
+3. Total net tax should likewise equal original total * inflation factor
+
+Results are written as a table (JSON and CSV) and the exit code is non-zero if any
+check fails, so CI can gate on it.
 """
 
+import argparse
+import json
+import sys
+
 import pandas as pd
 import numpy as np
 
-# Inflation factors relative to 2022-23
-inflation_factors = {
-    '2010–11': 1.34,
-    '2011–12': 1.31,
-    '2012–13': 1.28,
-    '2013–14': 1.25,
-    '2014–15': 1.23,
-    '2015–16': 1.21,
-    '2016–17': 1.19,
-    '2017–18': 1.17,
-    '2018–19': 1.15,
-    '2019–20': 1.14,
-    '2020–21': 1.12,
-    '2021–22': 1.07,
-    '2022-23': 1.00
-}
-
-def verify_redistribution():
-    # Load both datasets
-    print("Loading datasets...")
-    df_original = pd.read_csv('ato_2010-2023.csv')
-    df_redistributed = pd.read_csv('ato_2010-2023_inflation_redistributed.csv')
+from ato_data import read_dataset
+from reference_data import INCOME_RANGE_INDEX, INFLATION_FACTORS, normalize_years
+
+# Columns needed from both datasets
+VERIFY_COLUMNS = [
+    'income_year',
+    'normalized_income_range',
+    'sex',
+    'taxable_status',
+    'age_range_display',
+    'individuals_count',
+    'total_income_amount',
+    'net_tax_amount'
+]
+
+# Demographic cells that must be conserved; year totals are sums of these
+CELL_COLUMNS = ['income_year', 'sex', 'taxable_status', 'age_range_display']
+
+MEASURES = ['individuals_count', 'total_income_amount', 'net_tax_amount']
+
+# Income and tax may differ from original x factor by floating point error only
+INCOME_RTOL = 1e-9
+INCOME_ATOL = 0.01
+
+RESULTS_JSON = 'verification_results.json'
+RESULTS_CSV = 'verification_results.csv'
+
+def cell_totals(df):
+    """Sum the measures of df per demographic cell, with years normalised to en dashes."""
+    # Group on the stored keys first; only the (small) result needs plain-string years
+    totals = df.groupby(CELL_COLUMNS, observed=True)[MEASURES].sum().reset_index()
+    for col in CELL_COLUMNS[1:]:
+        totals[col] = totals[col].astype(str)
+    totals['income_year'] = normalize_years(totals['income_year'])
+    return totals.groupby(CELL_COLUMNS).sum()
+
+def check_totals(totals, factors):
+    """Add the expected values and pass/fail columns to joined original/redistributed totals."""
+    years = totals.index.get_level_values('income_year')
+    factor = years.map(factors).to_numpy(dtype=float)
+    
+    result = pd.DataFrame({
+        'inflation_factor': factor,
+        'individuals_original': totals['individuals_count_original'].to_numpy(),
+        'individuals_redistributed': totals['individuals_count_redistributed'].to_numpy(),
+        'income_original': totals['total_income_amount_original'].to_numpy(),
+        'income_expected': totals['total_income_amount_original'].to_numpy() * factor,
+        'income_redistributed': totals['total_income_amount_redistributed'].to_numpy(),
+        'tax_original': totals['net_tax_amount_original'].to_numpy(),
+        'tax_inflated': totals['net_tax_amount_original'].to_numpy() * factor,
+        'tax_redistributed': totals['net_tax_amount_redistributed'].to_numpy()
+    }, index=totals.index)
+    
+    result['individuals_diff'] = result['individuals_redistributed'] - result['individuals_original']
+    result['income_diff'] = result['income_redistributed'] - result['income_expected']
+    result['tax_diff'] = result['tax_redistributed'] - result['tax_inflated']
+    
+    result['individuals_ok'] = result['individuals_diff'] == 0
+    result['income_ok'] = np.isclose(result['income_redistributed'], result['income_expected'],
+                                     rtol=INCOME_RTOL, atol=INCOME_ATOL)
+    result['tax_ok'] = np.isclose(result['tax_redistributed'], result['tax_inflated'],
+                                  rtol=INCOME_RTOL, atol=INCOME_ATOL)
+    result['passed'] = result['individuals_ok'] & result['income_ok'] & result['tax_ok']
+    return result
+
+def verification_table(df_original, df_redistributed, factors=None):
+    """Check every year and every demographic cell in one grouped pass.
+    
+    Both datasets are summed per cell once and joined; year totals are sums of the cell
+    totals. Returns one row per year (level 'year') followed by one row per cell
+    (level 'cell'), with the expected values and pass/fail flags.
+    """
+    factors = INFLATION_FACTORS if factors is None else factors
+    
+    cells = cell_totals(df_original).join(
+        cell_totals(df_redistributed), how='outer', lsuffix='_original', rsuffix='_redistributed'
+    ).fillna(0)
+    
+    missing = sorted(set(cells.index.get_level_values('income_year')) - set(factors))
+    if missing:
+        raise ValueError(f"No inflation factor found for {missing}. Available years: {list(factors)}")
+    
+    years = cells.groupby(level='income_year').sum()
+    year_results = check_totals(years, factors).reset_index()
+    cell_results = check_totals(cells, factors).reset_index()
+    year_results.insert(0, 'level', 'year')
+    cell_results.insert(0, 'level', 'cell')
+    
+    return pd.concat([year_results, cell_results], ignore_index=True)[
+        ['level'] + CELL_COLUMNS + [col for col in cell_results.columns if col not in CELL_COLUMNS + ['level']]
+    ]
+
+def print_report(results):
+    """Print the per-year table, any failing cells and an overall summary."""
+    years = results[results['level'] == 'year']
+    cells = results[results['level'] == 'cell']
     
     print("\nVerifying data integrity for each year:")
     print("=" * 100)
+    print(f"{'Year':<9} {'Factor':>6} {'Individuals':>14} {'Diff':>6} {'Expected income':>20} "
+          f"{'Income diff':>13} {'Tax diff':>11}  {'Result'}")
+    for row in years.itertuples():
+        print(f"{row.income_year:<9} {row.inflation_factor:6.2f} {row.individuals_redistributed:14,.0f} "
+              f"{row.individuals_diff:+6,.0f} ${row.income_expected:19,.0f} ${row.income_diff:+12,.0f} "
+              f"${row.tax_diff:+10,.0f}  {'✓' if row.passed else '❌'}")
     
-    all_years_valid = True
-    
-    for year in sorted(df_original['income_year'].unique()):
-        print(f"\n{year}:")
-        
-        # Get data for this year
-        orig_year = df_original[df_original['income_year'] == year]
-        redis_year = df_redistributed[df_redistributed['income_year'] == year]
-        
-        # Get inflation factor
-        inflation_factor = inflation_factors.get(year, 1.0)
-        
-        # Calculate totals
-        orig_individuals = orig_year['individuals_count'].sum()
-        redis_individuals = redis_year['individuals_count'].sum()
-        
-        orig_income = orig_year['total_income_amount'].sum()
-        redis_income = redis_year['total_income_amount'].sum()
-        
-        orig_tax = orig_year['net_tax_amount'].sum()
-        redis_tax = redis_year['net_tax_amount'].sum()
-        
-        # Expected values
-        expected_individuals = orig_individuals
-        expected_income = orig_income * inflation_factor
-        
-        # Calculate differences
-        indiv_diff = redis_individuals - expected_individuals
-        indiv_pct_diff = (indiv_diff / expected_individuals * 100) if expected_individuals > 0 else 0
-        
-        income_diff = redis_income - expected_income
-        income_pct_diff = (income_diff / expected_income * 100) if expected_income > 0 else 0
-        
-        # Tax comparison (just for information)
-        tax_change = redis_tax - (orig_tax * inflation_factor)
-        tax_pct_change = (tax_change / (orig_tax * inflation_factor) * 100) if orig_tax > 0 else 0
-        
-        # Print results
-        print(f"  Inflation factor: {inflation_factor}")
-        print(f"\n  Individuals:")
-        print(f"    Original:      {orig_individuals:15,.0f}")
-        print(f"    Redistributed: {redis_individuals:15,.0f}")
-        print(f"    Difference:    {indiv_diff:15,.0f} ({indiv_pct_diff:+.2f}%)")
-        
-        print(f"\n  Total Income:")
-        print(f"    Original:      ${orig_income:18,.0f}")
-        print(f"    Expected:      ${expected_income:18,.0f} (original × {inflation_factor})")
-        print(f"    Redistributed: ${redis_income:18,.0f}")
-        print(f"    Difference:    ${income_diff:18,.0f} ({income_pct_diff:+.2f}%)")
-        
-        print(f"\n  Tax (for reference - changes expected due to bracket redistribution):")
-        print(f"    Original:      ${orig_tax:18,.0f}")
-        print(f"    Inflated orig: ${orig_tax * inflation_factor:18,.0f} (original × {inflation_factor})")
-        print(f"    Redistributed: ${redis_tax:18,.0f}")
-        print(f"    Change:        ${tax_change:18,.0f} ({tax_pct_change:+.2f}%)")
-        
-        # Validation
-        individuals_valid = abs(indiv_pct_diff) < 0.1  # Allow 0.1% difference due to rounding
-        income_valid = abs(income_pct_diff) < 0.01  # Allow 0.01% difference due to floating point
-        
-        if not individuals_valid:
-            print(f"\n  ⚠️  WARNING: Individual count difference exceeds 0.1%!")
-            all_years_valid = False
-            
-        if not income_valid:
-            print(f"\n  ⚠️  WARNING: Income total difference exceeds 0.01%!")
-            all_years_valid = False
-            
-        if individuals_valid and income_valid:
-            print(f"\n  ✓ Data integrity verified")
+    failed_cells = cells[~cells['passed']]
+    print(f"\nDemographic cells: {len(cells) - len(failed_cells):,} of {len(cells):,} conserved")
+    for row in failed_cells.head(20).itertuples():
+        print(f"  ⚠️  {row.income_year} {row.sex} / {row.taxable_status} / {row.age_range_display}: "
+              f"individuals {row.individuals_diff:+,.0f}, income ${row.income_diff:+,.2f}, tax ${row.tax_diff:+,.2f}")
+    if len(failed_cells) > 20:
+        print(f"  ... and {len(failed_cells) - 20:,} more")
     
     # Summary
     print("\n" + "=" * 100)
     print("SUMMARY:")
     
-    if all_years_valid:
+    if results['passed'].all():
         print("✓ All years pass validation!")
-        print("  - Individual counts are preserved (within rounding tolerance)")
-        print("  - Income totals are correctly inflated")
-        print("  - Tax amounts have changed as expected due to bracket redistribution")
+        print("  - Individual counts are preserved exactly, in every demographic cell")
+        print("  - Income and tax totals are correctly inflated")
     else:
-        print("❌ Some years failed validation - check warnings above")
-    
-    # Additional analysis - show bracket distribution changes
+        print("❌ Some checks failed - see the table above")
+
+def print_bracket_changes(df_original, df_redistributed, year='2010–11'):
+    """Show how one year's individuals moved between brackets."""
     print("\n" + "=" * 100)
-    print("BRACKET DISTRIBUTION ANALYSIS (2010-11 vs 2022-23):")
-    
-    # Compare bracket distributions for first and last year
-    first_year = '2010–11'
-    last_year = '2022–23'
+    print(f"BRACKET DISTRIBUTION ANALYSIS ({year}):")
     
-    orig_first = df_original[df_original['income_year'] == first_year].groupby('normalized_income_range')['individuals_count'].sum()
-    redis_first = df_redistributed[df_redistributed['income_year'] == first_year].groupby('normalized_income_range')['individuals_count'].sum()
+    orig_first = df_original[df_original['income_year'] == year].groupby('normalized_income_range', observed=True)['individuals_count'].sum()
+    redis_first = df_redistributed[df_redistributed['income_year'] == year].groupby('normalized_income_range', observed=True)['individuals_count'].sum()
     
-    print(f"\n{first_year} Bracket Distribution Changes:")
+    print(f"\n{year} Bracket Distribution Changes:")
     print(f"{'Income Range':<25} {'Original':>15} {'Redistributed':>15} {'Change':>15}")
     print("-" * 75)
     
     # Get all brackets from both datasets
-    all_brackets = sorted(set(orig_first.index) | set(redis_first.index), 
-                         key=lambda x: int(x.replace('$', '').replace(',', '').split()[0]) if x != '$1,000,001 or more' else 9999999)
+    all_brackets = sorted(set(orig_first.index) | set(redis_first.index),
+                         key=lambda x: INCOME_RANGE_INDEX.get(x, len(INCOME_RANGE_INDEX)))
     
     for bracket in all_brackets:
         orig_count = orig_first.get(bracket, 0)
@@ -150,5 +172,49 @@ def verify_redistribution():
         change = redis_count - orig_count
         print(f"{bracket:<25} {orig_count:15,.0f} {redis_count:15,.0f} {change:+15,.0f}")
 
+def write_results(results, json_path=RESULTS_JSON, csv_path=RESULTS_CSV):
+    """Write the result table as CSV and as JSON with a pass/fail summary."""
+    if csv_path:
+        results.to_csv(csv_path, index=False)
+    if json_path:
+        summary = {
+            'passed': bool(results['passed'].all()),
+            'years_checked': int((results['level'] == 'year').sum()),
+            'cells_checked': int((results['level'] == 'cell').sum()),
+            'failures': int((~results['passed']).sum()),
+            'results': json.loads(results.to_json(orient='records'))
+        }
+        with open(json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+def verify_redistribution(df_original=None, df_redistributed=None, factors=None):
+    """Check and report on the redistributed dataset; loads both datasets unless given.
+    
+    Returns the result table from verification_table.
+    """
+    if df_original is None or df_redistributed is None:
+        # Load both datasets
+        print("Loading datasets...")
+        df_original = read_dataset('ato_2010-2023.csv', columns=VERIFY_COLUMNS)
+        df_redistributed = read_dataset('ato_2010-2023_inflation_redistributed.csv', columns=VERIFY_COLUMNS)
+    
+    results = verification_table(df_original, df_redistributed, factors)
+    print_report(results)
+    print_bracket_changes(df_original, df_redistributed)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--json', default=RESULTS_JSON, help=f'JSON results file (default: {RESULTS_JSON})')
+    parser.add_argument('--csv', default=RESULTS_CSV, help=f'CSV results file (default: {RESULTS_CSV})')
+    args = parser.parse_args()
+    
+    results = verify_redistribution()
+    write_results(results, args.json, args.csv)
+    print(f"\n✓ Results written to {args.json} and {args.csv}")
+    
+    if not results['passed'].all():
+        sys.exit(1)
+
 if __name__ == '__main__':
-    verify_redistribution()
\ No newline at end of file
+    main()